@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from config import DB_EXECUTOR_WORKERS
+from commands import database
+
+logger = logging.getLogger(__name__)
+
+# database modülündeki fonksiyonlar senkron çalışır ve diske erişir.
+# Bu modül aynı fonksiyonların await edilebilir sürümlerini sunar; çağrılar asyncio olay döngüsünü
+# bloklamamak için ayrılmış bir thread havuzunda çalıştırılır.
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+async def _run(func, *args, **kwargs):
+    """Senkron bir veritabanı fonksiyonunu veritabanı thread havuzunda çalıştırır."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+async def shutdown():
+    """Bekleyen veritabanı işlerinin bitmesini bekler ve bağlantıları kapatır."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, partial(_executor.shutdown, wait=True))
+    database.close_connections()
+
+async def create_tables():
+    return await _run(database.create_tables)
+
+async def update_user_info(user_id: str, username: str | None, first_name: str | None, last_name: str | None, is_bot: bool):
+    return await _run(database.update_user_info, user_id, username, first_name, last_name, is_bot)
+
+async def write_ingest_batch(message_rows: list[tuple], user_rows: list[tuple]):
+    return await _run(database.write_ingest_batch, message_rows, user_rows)
+
+async def update_users_last_activity(activity_rows: list[tuple]):
+    return await _run(database.update_users_last_activity, activity_rows)
+
+async def get_user_display_names() -> dict:
+    return await _run(database.get_user_display_names)
+
+async def get_user_display_name(user_id: str) -> str | None:
+    return await _run(database.get_user_display_name, user_id)
+
+async def get_punishment_data(chat_id: int, user_id: str) -> dict:
+    return await _run(database.get_punishment_data, chat_id, user_id)
+
+async def get_all_punishments() -> list[dict]:
+    return await _run(database.get_all_punishments)
+
+async def save_punishment_data(chat_id: int, user_id: str, data: dict):
+    return await _run(database.save_punishment_data, chat_id, user_id, dict(data)) # Thread'e kopya gönder
+
+async def clear_user_punishments(chat_id: int, user_id: str):
+    return await _run(database.clear_user_punishments, chat_id, user_id)
+
+async def add_message_record(chat_id: int, user_id: str):
+    return await _run(database.add_message_record, chat_id, user_id)
+
+async def add_reminder(user_id: str, reminder_text: str, remind_at) -> int:
+    return await _run(database.add_reminder, user_id, reminder_text, remind_at)
+
+async def add_note(user_id: str, note: str) -> int:
+    return await _run(database.add_note, user_id, note)
+
+async def get_all_reminders() -> dict:
+    return await _run(database.get_all_reminders)
+
+async def get_due_reminders(until) -> list[dict]:
+    return await _run(database.get_due_reminders, until)
+
+async def remove_reminders(reminder_ids: list[int]):
+    return await _run(database.remove_reminders, list(reminder_ids))
+
+async def sync_pending_deletions(added_rows: list[tuple], removed_keys: list[tuple]):
+    return await _run(database.sync_pending_deletions, list(added_rows), list(removed_keys))
+
+async def get_media_file_id(path: str, content_hash: str) -> str | None:
+    return await _run(database.get_media_file_id, path, content_hash)
+
+async def save_media_file_id(path: str, content_hash: str, file_id: str):
+    return await _run(database.save_media_file_id, path, content_hash, file_id)
+
+async def delete_media_file_id(path: str, content_hash: str):
+    return await _run(database.delete_media_file_id, path, content_hash)
+
+async def get_chats_with_word_overrides() -> list[int]:
+    return await _run(database.get_chats_with_word_overrides)
+
+async def get_chat_word_overrides(chat_id: int) -> dict[str, bool]:
+    return await _run(database.get_chat_word_overrides, chat_id)
+
+async def set_chat_word_override(chat_id: int, word: str, is_forbidden: bool):
+    return await _run(database.set_chat_word_override, chat_id, word, is_forbidden)
+
+async def delete_chat_word_override(chat_id: int, word: str):
+    return await _run(database.delete_chat_word_override, chat_id, word)
+
+async def rebuild_rollups() -> int:
+    return await _run(database.rebuild_rollups)
+
+async def prune_raw_messages(before, batch_size: int) -> int:
+    return await _run(database.prune_raw_messages, before, batch_size)
+
+async def prune_hourly_rollups(before_hour: str) -> int:
+    return await _run(database.prune_hourly_rollups, before_hour)
+
+async def uses_incremental_vacuum() -> bool:
+    return await _run(database.uses_incremental_vacuum)
+
+async def incremental_vacuum(pages: int) -> int:
+    return await _run(database.incremental_vacuum, pages)
+
+async def get_total_messages_count(chat_id: int) -> int:
+    return await _run(database.get_total_messages_count, chat_id)
+
+async def get_total_unique_users_count(chat_id: int) -> int:
+    return await _run(database.get_total_unique_users_count, chat_id)
+
+async def get_active_users_last_24_hours(chat_id: int) -> int:
+    return await _run(database.get_active_users_last_24_hours, chat_id)
+
+async def get_top_message_senders(chat_id: int, limit: int = 5) -> list[tuple[str, int]]:
+    return await _run(database.get_top_message_senders, chat_id, limit)
+
+async def get_leaderboards(chat_id: int, user_id: str, limit: int = 3) -> dict[str, dict]:
+    return await _run(database.get_leaderboards, chat_id, user_id, limit)
+
+async def get_user_stats(chat_id: int, user_id: str) -> dict:
+    return await _run(database.get_user_stats, chat_id, user_id)
+
+async def get_statistics(chat_id: int, user_id: str = None) -> str:
+    return await _run(database.get_statistics, chat_id, user_id)
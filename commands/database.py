@@ -2,22 +2,183 @@ import sqlite3
 import datetime
 import logging
 import json
-from collections import defaultdict # Import eklendi
+import queue
+import threading
+from contextlib import contextmanager
+from collections import Counter, defaultdict # Import eklendi
 
-from config import DB_PATH
+from commands import metrics
+from config import DB_PATH, DB_READ_POOL_SIZE, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_STATEMENT_CACHE_SIZE, DB_BUSY_TIMEOUT_MS, LEGACY_CHAT_ID
 
 logger = logging.getLogger(__name__)
 
+# Kalıcı bağlantılar: tek bir yazıcı ve küçük bir okuma havuzu.
+# Her mesajda bağlantı açıp kapatmak (ve her seferinde fsync) yerine bağlantılar süreç boyunca açık kalır.
+_writer_conn = None
+_writer_lock = threading.RLock()
+_reader_pool = queue.Queue()
+_reader_count = 0
+_pool_lock = threading.Lock()
+
 def get_db_connection():
-    """Veritabanı bağlantısı sağlar."""
-    conn = sqlite3.connect(DB_PATH)
+    """Ayarlanmış yeni bir veritabanı bağlantısı açar (WAL, synchronous=NORMAL, önbellek ve mmap)."""
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False, # Bağlantılar kilitlerle korunur, farklı thread'lerden kullanılabilir
+        cached_statements=DB_STATEMENT_CACHE_SIZE
+    )
     conn.row_factory = sqlite3.Row # Sütun isimleriyle erişim için
+    # Yeni veritabanlarında boş sayfalar saklama işinde parça parça geri verilir; mevcut dosyalar
+    # tools/convert_auto_vacuum.py ile dönüştürülür
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}')
+    conn.execute(f'PRAGMA mmap_size={int(DB_MMAP_SIZE)}')
+    conn.execute(f'PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}')
+    conn.execute('PRAGMA temp_store=MEMORY')
     return conn
 
-def create_tables():
-    """Gerekli veritabanı tablolarını oluşturur."""
-    conn = get_db_connection()
+def _get_writer():
+    """Kalıcı yazma bağlantısını döndürür, gerekirse açar. _writer_lock tutulurken çağrılmalıdır."""
+    global _writer_conn
+    if _writer_conn is None:
+        _writer_conn = get_db_connection()
+    return _writer_conn
+
+@contextmanager
+def _write_cursor():
+    """Yazma bağlantısı üzerinde tek bir işlem (transaction) açar; başarıda commit, hatada rollback yapar."""
+    with _writer_lock:
+        conn = _get_writer()
+        cursor = conn.cursor()
+        try:
+            if not conn.in_transaction:
+                # Birden çok süreç aynı veritabanına yazabilir; yazma kilidi işlemin başında (busy_timeout kadar
+                # beklenerek) alınır, böylece önce okuyup sonra yazan işlemler SQLITE_BUSY ile yarıda kalmaz
+                cursor.execute('BEGIN IMMEDIATE')
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+@contextmanager
+def _read_cursor():
+    """Okuma havuzundan bir bağlantı ödünç alır ve iş bitince havuza geri koyar."""
+    global _reader_count
+    try:
+        conn = _reader_pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            can_open = _reader_count < DB_READ_POOL_SIZE
+            if can_open:
+                _reader_count += 1
+        if can_open:
+            try:
+                conn = get_db_connection()
+            except Exception:
+                with _pool_lock:
+                    _reader_count -= 1
+                raise
+        else:
+            conn = _reader_pool.get() # Havuz dolu, boşalan bir bağlantıyı bekle
     cursor = conn.cursor()
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+        if conn.in_transaction:
+            conn.rollback() # Okuma anlık görüntüsünü serbest bırak
+        _reader_pool.put(conn)
+
+# Saklama süresi ve sıkıştırma
+def prune_raw_messages(before: datetime.datetime, batch_size: int) -> int:
+    """
+    Zaman damgası `before`dan eski en fazla `batch_size` ham mesaj kaydını siler ve silinen kayıt sayısını döndürür.
+    Özet tabloları mesajlar yazılırken güncellendiği için toplam ve günlük sayılar korunur. Her parti kendi kısa
+    işleminde silinir ki yazma bağlantısı uzun süre kilitli kalmasın.
+    """
+    with _write_cursor() as cursor:
+        cursor.execute('''
+            DELETE FROM messages WHERE id IN (
+                SELECT id FROM messages WHERE timestamp < ? LIMIT ?
+            )
+        ''', (before, batch_size))
+        return cursor.rowcount
+
+def prune_hourly_rollups(before_hour: str) -> int:
+    """`before_hour`dan eski saatlik özetleri siler (günlük ve toplam özetler korunur)."""
+    with _write_cursor() as cursor:
+        cursor.execute('DELETE FROM message_rollup_hourly WHERE hour < ?', (before_hour,))
+        return cursor.rowcount
+
+def uses_incremental_vacuum() -> bool:
+    """Veritabanı dosyası auto_vacuum=INCREMENTAL modundaysa True döner."""
+    with _read_cursor() as cursor:
+        return cursor.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+def convert_to_incremental_vacuum() -> bool:
+    """
+    Veritabanı auto_vacuum=INCREMENTAL değilse ayarlar ve ayarın geçerli olması için VACUUM çalıştırır.
+    Dönüştürme yapıldıysa True döner. VACUUM bütün dosyayı yeniden yazar ve bu sürede yazma bağlantısını kilitler;
+    bu yüzden bot çalışırken değil, bot durdurulmuşken tools/convert_auto_vacuum.py ile çalıştırılır.
+    """
+    with _writer_lock:
+        conn = _get_writer()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return False
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return True
+
+def incremental_vacuum(pages: int) -> int:
+    """Boş sayfalardan en fazla `pages` tanesini dosyadan geri verir; kalan boş sayfa sayısını döndürür."""
+    with _writer_lock:
+        conn = _get_writer()
+        conn.execute(f'PRAGMA incremental_vacuum({int(pages)})').fetchall()
+        return conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+def close_connections():
+    """Açık tüm veritabanı bağlantılarını kapatır (bot kapanırken çağrılır)."""
+    global _writer_conn, _reader_count
+    with _writer_lock:
+        if _writer_conn is not None:
+            try:
+                _writer_conn.execute('PRAGMA optimize')
+            except sqlite3.Error as e:
+                logger.warning("PRAGMA optimize çalıştırılamadı: %s", e)
+            _writer_conn.close()
+            _writer_conn = None
+    while True:
+        try:
+            conn = _reader_pool.get_nowait()
+        except queue.Empty:
+            break
+        conn.close()
+        with _pool_lock:
+            _reader_count -= 1
+    logger.info("Veritabanı bağlantıları kapatıldı.")
+
+# Şema göçleri (migrations)
+# Her göç bir kez ve sırayla çalışır; uygulanan sürümler schema_version tablosunda tutulur.
+# Göçler idempotent yazılır (IF NOT EXISTS, eksik sütun kontrolü), böylece eski veritabanlarında da güvenle çalışır.
+
+def _column_exists(cursor, table: str, column: str) -> bool:
+    """Tabloda belirtilen sütunun olup olmadığını kontrol eder."""
+    return any(row['name'] == column for row in cursor.execute(f'PRAGMA table_info({table})'))
+
+def _add_column_if_missing(cursor, table: str, column: str, definition: str):
+    """Sütun yoksa tabloya ekler (eski şemalı veritabanları için)."""
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        logger.info("Göç: %s.%s sütunu eklendi.", table, column)
+
+def _migration_001_base_tables(cursor):
+    """Temel tabloları oluşturur ve eski şemalarda eksik sütunları tamamlar."""
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
             user_id TEXT PRIMARY KEY,
@@ -58,203 +219,754 @@ def create_tables():
             FOREIGN KEY (user_id) REFERENCES users (user_id)
         )
     ''')
-    conn.commit()
-    conn.close()
-    logger.info("Veritabanı tabloları kontrol edildi/oluşturuldu.")
+    # Eski sürümlerden kalan veritabanlarında bulunmayabilecek sütunlar
+    for column, definition in [('username', 'TEXT'), ('display_name', 'TEXT'), ('first_name', 'TEXT'),
+                               ('last_name', 'TEXT'), ('is_bot', 'INTEGER DEFAULT 0'), ('last_activity', 'TIMESTAMP')]:
+        _add_column_if_missing(cursor, 'users', column, definition)
+    _add_column_if_missing(cursor, 'messages', 'timestamp', 'TIMESTAMP')
+    for column, definition in [('reminder_text', 'TEXT'), ('remind_at', 'TIMESTAMP'), ('created_at', 'TIMESTAMP')]:
+        _add_column_if_missing(cursor, 'reminders', column, definition)
+    for column, definition in [('strike_count', 'INTEGER DEFAULT 0'), ('is_muted', 'INTEGER DEFAULT 0'), ('mute_until', 'TIMESTAMP'),
+                               ('next_mute_type', "TEXT DEFAULT '5_min'"), ('total_mutes_served', 'INTEGER DEFAULT 0')]:
+        _add_column_if_missing(cursor, 'punishments', column, definition)
 
-def update_user_info(user_id: str, username: str | None, first_name: str | None, last_name: str | None, is_bot: bool):
-    """Kullanıcı bilgilerini günceller veya ekler."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def _migration_002_hot_query_indexes(cursor):
+    """Sık çalışan sorgular için kapsayan (covering) indeksleri ekler."""
+    # Kullanıcı başına mesaj sayısı ve GROUP BY user_id sorguları
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_user_timestamp ON messages (user_id, timestamp)')
+    # Zaman aralığı sorguları (son 24 saatte aktif kullanıcılar); user_id dahil edildiği için tabloya dönülmez
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_timestamp_user ON messages (timestamp, user_id)')
+    # Süresi dolan hatırlatıcıların taranması
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_remind_at ON reminders (remind_at)')
+
+def _migration_003_chat_word_overrides(cursor):
+    """Sohbete özel yasaklı kelime ekleme/çıkarma kayıtları için tabloyu oluşturur."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_word_overrides (
+            chat_id INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            is_forbidden INTEGER NOT NULL, -- 1: bu sohbette yasaklı, 0: bu sohbette serbest
+            PRIMARY KEY (chat_id, word)
+        ) WITHOUT ROWID
+    ''')
+
+def _migration_004_pending_deletions(cursor):
+    """Gecikmeli silinecek bot mesajlarının tablosunu oluşturur; bot yeniden başlasa da silme işlemleri kaybolmaz."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pending_deletions (
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            delete_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (chat_id, message_id)
+        ) WITHOUT ROWID
+    ''')
+
+def _migration_005_media_cache(cursor):
+    """Telegram'a yüklenmiş medya dosyalarının file_id önbelleği için tabloyu oluşturur."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS media_cache (
+            path TEXT NOT NULL,
+            content_hash TEXT NOT NULL, -- Dosya içeriğinin SHA-256 özeti; dosya değişince yeni kayıt oluşur
+            file_id TEXT NOT NULL,
+            PRIMARY KEY (path, content_hash)
+        ) WITHOUT ROWID
+    ''')
+
+def _migration_006_message_rollups(cursor):
+    """
+    Mesaj istatistikleri için saatlik, günlük ve toplam kullanıcı başına özet tablolarını oluşturur ve
+    mevcut mesaj geçmişinden doldurur.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS message_rollup_hourly (
+            hour TEXT NOT NULL, -- 'YYYY-MM-DD HH:00:00'
+            user_id TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            PRIMARY KEY (hour, user_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS message_rollup_daily (
+            day TEXT NOT NULL, -- 'YYYY-MM-DD'
+            user_id TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            PRIMARY KEY (day, user_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS message_rollup_total (
+            user_id TEXT PRIMARY KEY,
+            message_count INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # En çok mesaj gönderenler sıralaması için
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_rollup_total_count ON message_rollup_total (message_count)')
+    _rebuild_unpartitioned_rollups(cursor)
+
+def _rebuild_unpartitioned_rollups(cursor):
+    """
+    Göç 6'nın yazıldığı sürümdeki (sohbet ayrımı olmayan) özet tablolarını messages tablosundaki bütün geçmişten
+    doldurur. Yalnızca göç 6 kullanır; güncel şema için _rebuild_rollups kullanılır.
+    """
+    cursor.execute('DELETE FROM message_rollup_hourly')
+    cursor.execute('DELETE FROM message_rollup_daily')
+    cursor.execute('DELETE FROM message_rollup_total')
+    cursor.execute('''
+        INSERT INTO message_rollup_hourly (hour, user_id, message_count)
+        SELECT strftime('%Y-%m-%d %H:00:00', timestamp), user_id, COUNT(*)
+        FROM messages
+        WHERE strftime('%Y-%m-%d %H:00:00', timestamp) IS NOT NULL -- Eski sürümlerden kalan zaman damgasız kayıtlar atlanır
+        GROUP BY 1, 2
+    ''')
+    cursor.execute('''
+        INSERT INTO message_rollup_daily (day, user_id, message_count)
+        SELECT substr(hour, 1, 10), user_id, SUM(message_count)
+        FROM message_rollup_hourly
+        GROUP BY 1, 2
+    ''')
+    # Toplamlara zaman damgasız kayıtlar da dahildir
+    cursor.execute('''
+        INSERT INTO message_rollup_total (user_id, message_count)
+        SELECT user_id, COUNT(*)
+        FROM messages
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+    ''')
+
+def _resolve_legacy_chat_id(cursor) -> int | None:
+    """
+    Sohbet ayrımından önce kaydedilmiş mesajların ve cezaların atanacağı sohbeti belirler. Taşınacak kayıt yoksa
+    None döner. Sırasıyla config.LEGACY_CHAT_ID, ardından bekleyen silmelerde ve sohbet kelime ayarlarında geçen
+    tek grup kullanılır; sohbet belirlenemiyorsa göç yapılmaz.
+    """
+    has_legacy_rows = any(
+        cursor.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone()
+        for table in ('messages', 'message_rollup_hourly', 'message_rollup_total', 'punishments')
+    )
+    if not has_legacy_rows:
+        return None
+    if LEGACY_CHAT_ID:
+        return int(LEGACY_CHAT_ID)
+    # Botun mesaj sildiği veya kelime ayarı yapılmış gruplar (grup ID'leri negatiftir)
+    group_ids = [row[0] for row in cursor.execute('''
+        SELECT chat_id FROM pending_deletions WHERE chat_id < 0
+        UNION
+        SELECT chat_id FROM chat_word_overrides WHERE chat_id < 0
+    ''')]
+    if len(group_ids) == 1:
+        logger.info("Mevcut mesaj ve ceza kayıtları, kayıtlarda geçen tek grup olan %s sohbetine atanıyor.", group_ids[0])
+        return group_ids[0]
+    raise RuntimeError(
+        "Mevcut mesaj ve ceza kayıtlarının hangi sohbete ait olduğu belirlenemedi "
+        f"(kayıtlarda geçen gruplar: {group_ids or 'yok'}). config.py'deki LEGACY_CHAT_ID değerini botun "
+        "kullanıldığı grubun ID'si olarak ayarlayıp botu yeniden başlatın."
+    )
+
+def _copy_into_new_table(cursor, table: str, create_sql: str, columns: list[str], chat_id: int | None):
+    """
+    Tabloyu yeni şemayla yeniden oluşturur: eski tablo yeniden adlandırılır, satırları verilen chat_id ile yeni
+    tabloya kopyalanır ve eski tablo (indeksleriyle birlikte) silinir.
+    """
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+    cursor.execute(create_sql)
+    column_list = ', '.join(columns)
+    cursor.execute(f'INSERT INTO {table} (chat_id, {column_list}) SELECT ?, {column_list} FROM {table}_old', (chat_id,))
+    cursor.execute(f'DROP TABLE {table}_old')
+
+def _migration_007_chat_partitioning(cursor):
+    """
+    Mesajları, özet tablolarını ve cezaları sohbete göre ayırır. Bütün anahtarlar chat_id ile başlar; böylece bir
+    sohbetin istatistik sorguları yalnızca o sohbetin satırlarını okur. Mevcut kayıtlar _resolve_legacy_chat_id ile
+    belirlenen sohbete atanır.
+    """
+    legacy_chat_id = _resolve_legacy_chat_id(cursor)
+    # Sabit varsayılanlı sütun eklemek tabloyu yeniden yazmaz; eski satırlar varsayılan değerle okunur.
+    # Taşınacak kayıt yoksa varsayılan hiçbir satıra uygulanmaz (yeni kayıtlar chat_id ile yazılır).
+    default_chat_id = legacy_chat_id if legacy_chat_id is not None else 0
+    _add_column_if_missing(cursor, 'messages', 'chat_id', f'INTEGER NOT NULL DEFAULT {int(default_chat_id)}')
+    cursor.execute('DROP INDEX IF EXISTS idx_messages_user_timestamp') # Ham kayıtlar artık kullanıcıya göre sorgulanmıyor
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_chat_timestamp ON messages (chat_id, timestamp)')
+
+    _copy_into_new_table(cursor, 'message_rollup_hourly', '''
+        CREATE TABLE message_rollup_hourly (
+            chat_id INTEGER NOT NULL,
+            hour TEXT NOT NULL, -- 'YYYY-MM-DD HH:00:00'
+            user_id TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, hour, user_id)
+        ) WITHOUT ROWID
+    ''', ['hour', 'user_id', 'message_count'], legacy_chat_id)
+    _copy_into_new_table(cursor, 'message_rollup_daily', '''
+        CREATE TABLE message_rollup_daily (
+            chat_id INTEGER NOT NULL,
+            day TEXT NOT NULL, -- 'YYYY-MM-DD'
+            user_id TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, day, user_id)
+        ) WITHOUT ROWID
+    ''', ['day', 'user_id', 'message_count'], legacy_chat_id)
+    _copy_into_new_table(cursor, 'message_rollup_total', '''
+        CREATE TABLE message_rollup_total (
+            chat_id INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        ) WITHOUT ROWID
+    ''', ['user_id', 'message_count'], legacy_chat_id)
+    # Saklama işinin eski saatlik özetleri bütün sohbetlerde silebilmesi için
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_rollup_hourly_hour ON message_rollup_hourly (hour)')
+    # Sohbetteki en çok mesaj gönderenler sıralaması için
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_rollup_total_count ON message_rollup_total (chat_id, message_count)')
+
+    _copy_into_new_table(cursor, 'punishments', '''
+        CREATE TABLE punishments (
+            chat_id INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            strike_count INTEGER DEFAULT 0,
+            is_muted INTEGER DEFAULT 0,
+            mute_until TIMESTAMP,
+            next_mute_type TEXT DEFAULT '5_min', -- '5_min', '1_hr', '1_hr_served'
+            total_mutes_served INTEGER DEFAULT 0,
+            PRIMARY KEY (chat_id, user_id),
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        ) WITHOUT ROWID
+    ''', ['user_id', 'strike_count', 'is_muted', 'mute_until', 'next_mute_type', 'total_mutes_served'], legacy_chat_id)
+    # Ham kaydı bulunan günler sohbet bilgisiyle yeniden hesaplanır; ham kaydı silinmiş günler yukarıda kopyalandı
+    _rebuild_rollups(cursor)
+
+def _migration_008_notes(cursor):
+    """/not komutunun notlarını tutan tabloyu oluşturur (eski sürümlerden kalan tabloyla aynı şema)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            note TEXT,
+            timestamp TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+    ''')
+
+# (sürüm, açıklama, fonksiyon) - yeni göçler listenin sonuna, artan sürüm numarasıyla eklenmelidir
+MIGRATIONS = [
+    (1, "temel tablolar", _migration_001_base_tables),
+    (2, "sık sorgu indeksleri", _migration_002_hot_query_indexes),
+    (3, "sohbete özel yasaklı kelimeler", _migration_003_chat_word_overrides),
+    (4, "bekleyen mesaj silme işlemleri", _migration_004_pending_deletions),
+    (5, "medya file_id önbelleği", _migration_005_media_cache),
+    (6, "mesaj istatistiği özet tabloları", _migration_006_message_rollups),
+    (7, "sohbete göre ayrılmış mesajlar, özetler ve cezalar", _migration_007_chat_partitioning),
+    (8, "kullanıcı notları", _migration_008_notes),
+]
+
+def get_schema_version() -> int:
+    """Veritabanına uygulanmış en yüksek göç sürümünü döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+        if cursor.fetchone() is None:
+            return 0
+        return cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+def run_migrations():
+    """Henüz uygulanmamış göçleri sırayla, her birini kendi işleminde çalıştırır."""
+    with _writer_lock:
+        conn = _get_writer()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+        applied = {row['version'] for row in conn.execute('SELECT version FROM schema_version')}
+        for version, description, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            cursor = conn.cursor()
+            try:
+                cursor.execute('BEGIN IMMEDIATE') # DDL ifadeleri de aynı işleme dahil olsun
+                migration(cursor)
+                cursor.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logger.error("Göç %s (%s) uygulanırken hata oluştu.", version, description, exc_info=True)
+                raise
+            finally:
+                cursor.close()
+            logger.info("Göç %s uygulandı: %s", version, description)
+
+def create_tables():
+    """Gerekli veritabanı tablolarını oluşturur ve bekleyen şema göçlerini uygular."""
+    run_migrations()
+    logger.info("Veritabanı tabloları kontrol edildi/oluşturuldu. Şema sürümü: %s", get_schema_version())
+    for name, (uses_index, plan) in check_hot_query_plans().items():
+        if not uses_index:
+            logger.warning("Sık çalışan sorgu '%s' indeks kullanmıyor: %s", name, plan)
+
+# Her sorgu planında indeks kullanması beklenen sık sorgular: isim -> (SQL, parametreler)
+HOT_QUERIES = {
+    'active_users_last_24_hours': ('SELECT COUNT(DISTINCT user_id) FROM message_rollup_hourly WHERE chat_id = ? AND hour >= ?', (0, '2000-01-01 00:00:00')),
+    'user_message_count': ('SELECT message_count FROM message_rollup_total WHERE chat_id = ? AND user_id = ?', (0, '0')),
+    'chat_message_count': ('SELECT COALESCE(SUM(message_count), 0), COUNT(*) FROM message_rollup_total WHERE chat_id = ?', (0,)),
+    'top_message_senders': ('''
+        SELECT u.display_name, t.message_count
+        FROM message_rollup_total t
+        JOIN users u ON t.user_id = u.user_id
+        WHERE t.chat_id = ?
+        ORDER BY t.message_count DESC
+        LIMIT ?
+    ''', (0, 10)),
+    'due_reminders': ('SELECT id, user_id, reminder_text, remind_at FROM reminders WHERE remind_at <= ? ORDER BY remind_at', ('2000-01-01 00:00:00',)),
+}
+
+def check_hot_query_plans() -> dict[str, tuple[bool, str]]:
+    """
+    HOT_QUERIES içindeki her sorgu için EXPLAIN QUERY PLAN çalıştırır.
+    İsim -> (indeks kullanıyor mu, plan metni) sözlüğü döndürür. İlk tablo erişimi
+    indeks (veya birincil anahtar) üzerinden değilse sorgu tam tablo taraması yapıyor sayılır.
+    """
+    results = {}
+    with _read_cursor() as cursor:
+        for name, (sql, params) in HOT_QUERIES.items():
+            plan_rows = [row['detail'] for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+            table_accesses = [detail for detail in plan_rows if detail.startswith(('SCAN', 'SEARCH'))]
+            uses_index = bool(table_accesses) and all('INDEX' in detail or 'PRIMARY KEY' in detail for detail in table_accesses)
+            results[name] = (uses_index, '; '.join(plan_rows))
+    return results
+
+def build_display_name(username: str | None, first_name: str | None, last_name: str | None) -> str:
+    """Kullanıcı alanlarından görünen adı oluşturur."""
     # display_name'i daha doğru oluştur
     display_name = first_name if first_name else "Bilinmeyen Kullanıcı"
     if last_name:
         display_name += f" {last_name}"
     elif username: # Eğer first_name yoksa ve username varsa, display_name olarak username'i kullan
         display_name = username
-    
+    return display_name
+
+# Kullanıcı satırını silip yeniden ekleyen INSERT OR REPLACE yerine gerçek UPSERT: yalnızca değişen satır güncellenir
+_USER_UPSERT_SQL = '''
+    INSERT INTO users (user_id, username, display_name, first_name, last_name, is_bot, last_activity)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = excluded.username,
+        display_name = excluded.display_name,
+        first_name = excluded.first_name,
+        last_name = excluded.last_name,
+        is_bot = excluded.is_bot,
+        last_activity = excluded.last_activity
+'''
+
+def update_user_info(user_id: str, username: str | None, first_name: str | None, last_name: str | None, is_bot: bool):
+    """Kullanıcı bilgilerini günceller veya ekler."""
+    display_name = build_display_name(username, first_name, last_name)
+
+    with _write_cursor() as cursor:
+        cursor.execute(_USER_UPSERT_SQL, (user_id, username, display_name, first_name, last_name, int(is_bot), datetime.datetime.now()))
+
+# Özet tablolarına eklenen sayıları mevcut sayıların üzerine ekleyen UPSERT'ler
+_ROLLUP_HOURLY_UPSERT_SQL = '''
+    INSERT INTO message_rollup_hourly (chat_id, hour, user_id, message_count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (chat_id, hour, user_id) DO UPDATE SET message_count = message_count + excluded.message_count
+'''
+_ROLLUP_DAILY_UPSERT_SQL = '''
+    INSERT INTO message_rollup_daily (chat_id, day, user_id, message_count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (chat_id, day, user_id) DO UPDATE SET message_count = message_count + excluded.message_count
+'''
+_ROLLUP_TOTAL_UPSERT_SQL = '''
+    INSERT INTO message_rollup_total (chat_id, user_id, message_count) VALUES (?, ?, ?)
+    ON CONFLICT (chat_id, user_id) DO UPDATE SET message_count = message_count + excluded.message_count
+'''
+
+def hour_bucket(timestamp: datetime.datetime) -> str:
+    """Zaman damgasının saatlik özet anahtarını döndürür."""
+    return timestamp.strftime('%Y-%m-%d %H:00:00')
+
+def day_bucket(timestamp: datetime.datetime) -> str:
+    """Zaman damgasının günlük özet anahtarını döndürür."""
+    return timestamp.strftime('%Y-%m-%d')
+
+def _update_rollups(cursor, message_rows: list[tuple]):
+    """Yeni mesajları (chat_id, user_id, timestamp) özet tablolarına ekler. Mesajlarla aynı işlemde çağrılır."""
+    hourly, daily, total = Counter(), Counter(), Counter()
+    for chat_id, user_id, timestamp in message_rows:
+        hourly[(chat_id, hour_bucket(timestamp), user_id)] += 1
+        daily[(chat_id, day_bucket(timestamp), user_id)] += 1
+        total[(chat_id, user_id)] += 1
+    cursor.executemany(_ROLLUP_HOURLY_UPSERT_SQL, [key + (count,) for key, count in hourly.items()])
+    cursor.executemany(_ROLLUP_DAILY_UPSERT_SQL, [key + (count,) for key, count in daily.items()])
+    cursor.executemany(_ROLLUP_TOTAL_UPSERT_SQL, [key + (count,) for key, count in total.items()])
+
+def _rebuild_rollups(cursor):
+    """
+    Özet tablolarını messages tablosundaki geçmişten yeniden oluşturur. Saklama süresi dolduğu için ham kayıtları
+    silinmiş günlerin özetleri korunur; yalnızca ham kaydı bulunan en eski günden itibaren yeniden hesaplanır.
+    """
+    first_raw_day = cursor.execute('SELECT date(MIN(timestamp)) FROM messages').fetchone()[0]
+    if first_raw_day is not None:
+        cursor.execute('DELETE FROM message_rollup_hourly WHERE hour >= ?', (first_raw_day,))
+        cursor.execute('DELETE FROM message_rollup_daily WHERE day >= ?', (first_raw_day,))
+        cursor.execute('''
+            INSERT INTO message_rollup_hourly (chat_id, hour, user_id, message_count)
+            SELECT chat_id, strftime('%Y-%m-%d %H:00:00', timestamp), user_id, COUNT(*)
+            FROM messages
+            WHERE strftime('%Y-%m-%d %H:00:00', timestamp) IS NOT NULL -- Eski sürümlerden kalan zaman damgasız kayıtlar atlanır
+            GROUP BY 1, 2, 3
+        ''')
+        cursor.execute('''
+            INSERT INTO message_rollup_daily (chat_id, day, user_id, message_count)
+            SELECT chat_id, substr(hour, 1, 10), user_id, SUM(message_count)
+            FROM message_rollup_hourly
+            WHERE hour >= ?
+            GROUP BY 1, 2, 3
+        ''', (first_raw_day,))
+    # Toplamlar: günlük özetler + zaman damgasız eski kayıtlar
+    cursor.execute('DELETE FROM message_rollup_total')
     cursor.execute('''
-        INSERT OR REPLACE INTO users 
-        (user_id, username, display_name, first_name, last_name, is_bot, last_activity)
-        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (user_id, username, display_name, first_name, last_name, int(is_bot)))
-    conn.commit()
-    conn.close()
+        INSERT INTO message_rollup_total (chat_id, user_id, message_count)
+        SELECT chat_id, user_id, SUM(message_count)
+        FROM (
+            SELECT chat_id, user_id, message_count FROM message_rollup_daily
+            UNION ALL
+            SELECT chat_id, user_id, 1 FROM messages WHERE user_id IS NOT NULL AND strftime('%Y', timestamp) IS NULL
+        )
+        GROUP BY chat_id, user_id
+    ''')
+
+def rebuild_rollups() -> int:
+    """
+    Özet tablolarını mevcut mesaj geçmişinden tek bir işlemde yeniden oluşturur.
+    Özetlerdeki toplam mesaj sayısını döndürür.
+    """
+    with _write_cursor() as cursor:
+        _rebuild_rollups(cursor)
+        return cursor.execute('SELECT COALESCE(SUM(message_count), 0) FROM message_rollup_total').fetchone()[0]
+
+def write_ingest_batch(message_rows: list[tuple], user_rows: list[tuple]):
+    """
+    Tamponda biriken mesaj ve kullanıcı kayıtlarını tek bir işlemde (transaction) yazar; mesaj özet
+    tabloları da aynı işlemde güncellenir.
+    message_rows: (chat_id, user_id, timestamp) demetleri.
+    user_rows: (user_id, username, display_name, first_name, last_name, is_bot, last_activity) demetleri;
+    yalnızca profil bilgisi değişen kullanıcılar için gönderilir.
+    """
+    with _write_cursor() as cursor:
+        if user_rows:
+            cursor.executemany(_USER_UPSERT_SQL, user_rows)
+        if message_rows:
+            cursor.executemany('INSERT INTO messages (chat_id, user_id, timestamp) VALUES (?, ?, ?)', message_rows)
+            _update_rollups(cursor, message_rows)
+
+def update_users_last_activity(activity_rows: list[tuple]):
+    """Kullanıcıların son etkinlik zamanlarını toplu olarak günceller. activity_rows: (last_activity, user_id) demetleri."""
+    with _write_cursor() as cursor:
+        cursor.executemany('UPDATE users SET last_activity = ? WHERE user_id = ?', activity_rows)
 
 def get_user_display_names():
     """Tüm kullanıcıların user_id'sine göre display_name'ini içeren bir sözlük döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT user_id, display_name FROM users')
-    users = cursor.fetchall()
-    conn.close()
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT user_id, display_name FROM users')
+        users = cursor.fetchall()
     return {user['user_id']: user['display_name'] for user in users}
 
-def get_punishment_data(user_id: str):
-    """Kullanıcının ceza verilerini alır. Yoksa varsayılan değerlerle oluşturur."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM punishments WHERE user_id = ?', (user_id,))
-    data = cursor.fetchone()
-    conn.close()
+def parse_timestamp(value) -> datetime.datetime | None:
+    """Veritabanından string olarak gelen zaman damgasını datetime objesine dönüştürür."""
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value) # 'YYYY-MM-DD HH:MM:SS[.ffffff]' ve eski kayıtlardaki 'T' ayraçlı biçim
+
+def get_user_display_name(user_id: str) -> str | None:
+    """Tek bir kullanıcının display_name'ini döndürür; kullanıcı yoksa None."""
+    with _read_cursor() as cursor:
+        row = cursor.execute('SELECT display_name FROM users WHERE user_id = ?', (user_id,)).fetchone()
+    return row['display_name'] if row else None
+
+def get_punishment_data(chat_id: int, user_id: str):
+    """Kullanıcının bir sohbetteki ceza verilerini alır. Kaydı yoksa varsayılan değerleri döndürür (veritabanına yazmaz)."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT * FROM punishments WHERE chat_id = ? AND user_id = ?', (chat_id, user_id))
+        data = cursor.fetchone()
 
     if data:
         return dict(data)
-    else:
-        # Varsayılan değerlerle yeni bir giriş oluştur
-        default_data = {
-            'user_id': user_id,
-            'strike_count': 0,
-            'is_muted': False,
-            'mute_until': None,
-            'next_mute_type': '5_min',
-            'total_mutes_served': 0
-        }
-        save_punishment_data(user_id, default_data) # Veritabanına kaydet
-        return default_data
-
-def save_punishment_data(user_id: str, data: dict):
-    """Kullanıcının ceza verilerini kaydeder."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT OR REPLACE INTO punishments 
-        (user_id, strike_count, is_muted, mute_until, next_mute_type, total_mutes_served)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (
-        user_id,
-        data.get('strike_count', 0),
-        int(data.get('is_muted', False)),
-        data.get('mute_until'), # datetime nesnesi direk kaydedilebilir
-        data.get('next_mute_type', '5_min'),
-        data.get('total_mutes_served', 0)
-    ))
-    conn.commit()
-    conn.close()
-
-def clear_user_punishments(user_id: str):
-    """Bir kullanıcının tüm ceza verilerini sıfırlar."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM punishments WHERE user_id = ?', (user_id,))
-    conn.commit()
-    conn.close()
-    logger.info(f"Kullanıcı {user_id} için cezalar temizlendi.")
+    return {
+        'chat_id': chat_id,
+        'user_id': user_id,
+        'strike_count': 0,
+        'is_muted': False,
+        'mute_until': None,
+        'next_mute_type': '5_min',
+        'total_mutes_served': 0
+    }
+
+def get_all_punishments() -> list[dict]:
+    """punishments tablosundaki tüm kayıtları döndürür (ceza önbelleğini doldurmak için)."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT chat_id, user_id, strike_count, is_muted, mute_until, next_mute_type, total_mutes_served FROM punishments')
+        rows = cursor.fetchall()
+    return [dict(row) for row in rows]
+
+def save_punishment_data(chat_id: int, user_id: str, data: dict):
+    """Kullanıcının bir sohbetteki ceza verilerini kaydeder."""
+    with _write_cursor() as cursor:
+        cursor.execute('''
+            INSERT OR REPLACE INTO punishments 
+            (chat_id, user_id, strike_count, is_muted, mute_until, next_mute_type, total_mutes_served)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            chat_id,
+            user_id,
+            data.get('strike_count', 0),
+            int(data.get('is_muted', False)),
+            data.get('mute_until'), # datetime nesnesi direk kaydedilebilir
+            data.get('next_mute_type', '5_min'),
+            data.get('total_mutes_served', 0)
+        ))
+
+def clear_user_punishments(chat_id: int, user_id: str):
+    """Bir kullanıcının bir sohbetteki tüm ceza verilerini sıfırlar."""
+    with _write_cursor() as cursor:
+        cursor.execute('DELETE FROM punishments WHERE chat_id = ? AND user_id = ?', (chat_id, user_id))
+    logger.info("Kullanıcı %s için sohbet %s içindeki cezalar temizlendi.", user_id, chat_id)
 
-def add_message_record(user_id: str):
+def add_message_record(chat_id: int, user_id: str):
     """Bir kullanıcı mesaj attığında kayıt ekler."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('INSERT INTO messages (user_id) VALUES (?)', (user_id,))
-    conn.commit()
-    conn.close()
+    write_ingest_batch([(chat_id, user_id, datetime.datetime.now())], []) # Özet tabloları da güncellensin
 
 def add_reminder(user_id: str, reminder_text: str, remind_at: datetime.datetime):
     """Yeni bir hatırlatıcı ekler."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO reminders (user_id, reminder_text, remind_at)
-        VALUES (?, ?, ?)
-    ''', (user_id, reminder_text, remind_at))
-    conn.commit()
-    new_id = cursor.lastrowid
-    conn.close()
+    with _write_cursor() as cursor:
+        cursor.execute('''
+            INSERT INTO reminders (user_id, reminder_text, remind_at)
+            VALUES (?, ?, ?)
+        ''', (user_id, reminder_text, remind_at))
+        new_id = cursor.lastrowid
     return new_id
 
+def add_note(user_id: str, note: str) -> int:
+    """Kullanıcı için yeni bir not ekler ve notun ID'sini döndürür."""
+    with _write_cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO notes (user_id, note, timestamp) VALUES (?, ?, ?)',
+            (user_id, note, datetime.datetime.now().isoformat()) # Mevcut kayıtlarla aynı biçim
+        )
+        return cursor.lastrowid
+
 def get_all_reminders():
     """Tüm hatırlatıcıları kullanıcı ID'sine göre gruplayarak döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, user_id, reminder_text, remind_at FROM reminders')
-    reminders = cursor.fetchall()
-    conn.close()
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT id, user_id, reminder_text, remind_at FROM reminders')
+        reminders = cursor.fetchall()
 
     grouped_reminders = defaultdict(list)
     for r in reminders:
         # 'remind_at' string olarak geliyor, datetime objesine dönüştür
         r_dict = dict(r)
-        if isinstance(r_dict['remind_at'], str):
-            try:
-                r_dict['remind_at'] = datetime.datetime.strptime(r_dict['remind_at'], '%Y-%m-%d %H:%M:%S.%f')
-            except ValueError:
-                r_dict['remind_at'] = datetime.datetime.strptime(r_dict['remind_at'], '%Y-%m-%d %H:%M:%S')
+        r_dict['remind_at'] = parse_timestamp(r_dict['remind_at'])
         grouped_reminders[r_dict['user_id']].append(r_dict)
     return grouped_reminders
 
-def remove_reminder(reminder_id: int):
-    """Belirtilen ID'ye sahip hatırlatıcıyı siler."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
-    conn.commit()
-    conn.close()
+def get_due_reminders(until: datetime.datetime) -> list[dict]:
+    """remind_at zamanı verilen zamana kadar olan hatırlatıcıları zamana göre sıralı döndürür (indeksli sorgu)."""
+    with _read_cursor() as cursor:
+        cursor.execute(
+            'SELECT id, user_id, reminder_text, remind_at FROM reminders WHERE remind_at <= ? ORDER BY remind_at',
+            (until,)
+        )
+        reminders = cursor.fetchall()
+    due_reminders = []
+    for r in reminders:
+        r_dict = dict(r)
+        r_dict['remind_at'] = parse_timestamp(r_dict['remind_at'])
+        due_reminders.append(r_dict)
+    return due_reminders
+
+def remove_reminders(reminder_ids: list[int]):
+    """Belirtilen ID'lere sahip hatırlatıcıları tek bir işlemde siler."""
+    if not reminder_ids:
+        return
+    with _write_cursor() as cursor:
+        cursor.executemany('DELETE FROM reminders WHERE id = ?', [(reminder_id,) for reminder_id in reminder_ids])
+
+# Gecikmeli mesaj silme
+def get_pending_deletions() -> list[tuple[int, int, datetime.datetime]]:
+    """Bekleyen tüm silme işlemlerini (chat_id, message_id, delete_at) olarak döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT chat_id, message_id, delete_at FROM pending_deletions')
+        rows = cursor.fetchall()
+    return [(row['chat_id'], row['message_id'], parse_timestamp(row['delete_at'])) for row in rows]
+
+def sync_pending_deletions(added_rows: list[tuple], removed_keys: list[tuple]):
+    """
+    Yeni silme işlemlerini (chat_id, message_id, delete_at) ekler ve tamamlananları (chat_id, message_id)
+    tek bir işlemde siler.
+    """
+    if not added_rows and not removed_keys:
+        return
+    with _write_cursor() as cursor:
+        if added_rows:
+            cursor.executemany('INSERT OR REPLACE INTO pending_deletions (chat_id, message_id, delete_at) VALUES (?, ?, ?)', added_rows)
+        if removed_keys:
+            cursor.executemany('DELETE FROM pending_deletions WHERE chat_id = ? AND message_id = ?', removed_keys)
+
+# Medya file_id önbelleği
+def get_media_file_id(path: str, content_hash: str) -> str | None:
+    """Dosyanın bu içerikle daha önce yüklenmiş halinin file_id'sini döndürür; yoksa None."""
+    with _read_cursor() as cursor:
+        row = cursor.execute('SELECT file_id FROM media_cache WHERE path = ? AND content_hash = ?', (path, content_hash)).fetchone()
+    return row['file_id'] if row else None
+
+def save_media_file_id(path: str, content_hash: str, file_id: str):
+    """Dosyanın file_id'sini kaydeder; aynı yolun eski içeriklerine ait kayıtları siler."""
+    with _write_cursor() as cursor:
+        cursor.execute('DELETE FROM media_cache WHERE path = ? AND content_hash != ?', (path, content_hash))
+        cursor.execute('INSERT OR REPLACE INTO media_cache (path, content_hash, file_id) VALUES (?, ?, ?)', (path, content_hash, file_id))
+
+def delete_media_file_id(path: str, content_hash: str):
+    """Telegram'ın artık kabul etmediği file_id kaydını siler."""
+    with _write_cursor() as cursor:
+        cursor.execute('DELETE FROM media_cache WHERE path = ? AND content_hash = ?', (path, content_hash))
+
+# Sohbete özel yasaklı kelime listeleri
+def get_chats_with_word_overrides() -> list[int]:
+    """Özel yasaklı kelime ayarı olan sohbetlerin ID'lerini döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT DISTINCT chat_id FROM chat_word_overrides')
+        rows = cursor.fetchall()
+    return [row['chat_id'] for row in rows]
+
+def get_chat_word_overrides(chat_id: int) -> dict[str, bool]:
+    """Bir sohbetin özel kelime ayarlarını kelime -> yasaklı mı (True/False) olarak döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT word, is_forbidden FROM chat_word_overrides WHERE chat_id = ?', (chat_id,))
+        rows = cursor.fetchall()
+    return {row['word']: bool(row['is_forbidden']) for row in rows}
+
+def set_chat_word_override(chat_id: int, word: str, is_forbidden: bool):
+    """Bir sohbet için kelimeyi yasaklı veya serbest olarak işaretler."""
+    with _write_cursor() as cursor:
+        cursor.execute('''
+            INSERT INTO chat_word_overrides (chat_id, word, is_forbidden) VALUES (?, ?, ?)
+            ON CONFLICT (chat_id, word) DO UPDATE SET is_forbidden = excluded.is_forbidden
+        ''', (chat_id, word, int(is_forbidden)))
+
+def delete_chat_word_override(chat_id: int, word: str):
+    """Bir sohbetin kelime için yaptığı özel ayarı siler (genel liste geçerli olur)."""
+    with _write_cursor() as cursor:
+        cursor.execute('DELETE FROM chat_word_overrides WHERE chat_id = ? AND word = ?', (chat_id, word))
 
 # Yeni istatistik fonksiyonları
-def get_total_messages_count() -> int:
-    """Tüm sohbetlerde gönderilen toplam mesaj sayısını döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM messages')
-    count = cursor.fetchone()[0]
-    conn.close()
+# İstatistikler sohbet başına özet tablolarından okunur. Bütün özet anahtarları chat_id ile başladığı için
+# sorgu süresi veritabanının tamamına değil, yalnızca o sohbetin özet satırı sayısına bağlıdır.
+def get_total_messages_count(chat_id: int) -> int:
+    """Sohbette gönderilen toplam mesaj sayısını döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT COALESCE(SUM(message_count), 0) FROM message_rollup_total WHERE chat_id = ?', (chat_id,))
+        count = cursor.fetchone()[0]
     return count
 
-def get_total_unique_users_count() -> int:
-    """Toplam benzersiz kullanıcı sayısını döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(DISTINCT user_id) FROM users')
-    count = cursor.fetchone()[0]
-    conn.close()
+def get_total_unique_users_count(chat_id: int) -> int:
+    """Sohbette mesaj göndermiş benzersiz kullanıcı sayısını döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM message_rollup_total WHERE chat_id = ?', (chat_id,))
+        count = cursor.fetchone()[0]
     return count
 
-def get_active_users_last_24_hours() -> int:
-    """Son 24 saat içinde mesaj gönderen benzersiz kullanıcı sayısını döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    twenty_four_hours_ago = datetime.datetime.now() - datetime.timedelta(hours=24)
-    cursor.execute(
-        'SELECT COUNT(DISTINCT user_id) FROM messages WHERE timestamp >= ?',
-        (twenty_four_hours_ago,)
-    )
-    count = cursor.fetchone()[0]
-    conn.close()
+def get_active_users_last_24_hours(chat_id: int) -> int:
+    """
+    Son 24 saat içinde sohbette mesaj gönderen benzersiz kullanıcı sayısını döndürür. Saatlik özetler kullanıldığı için
+    pencere, 24 saat önceki saatin başından itibaren sayılır (kimse atlanmaz, en fazla bir saat fazlası dahil olur).
+    """
+    since_hour = hour_bucket(datetime.datetime.now() - datetime.timedelta(hours=24))
+    with _read_cursor() as cursor:
+        cursor.execute(
+            'SELECT COUNT(DISTINCT user_id) FROM message_rollup_hourly WHERE chat_id = ? AND hour >= ?',
+            (chat_id, since_hour)
+        )
+        count = cursor.fetchone()[0]
     return count
 
-def get_top_message_senders(limit: int = 5) -> list[tuple[str, int]]:
-    """En çok mesaj gönderen kullanıcıları (display_name, mesaj_sayısı) olarak döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT u.display_name, COUNT(m.id) as message_count
-        FROM messages m
-        JOIN users u ON m.user_id = u.user_id
-        GROUP BY u.user_id
-        ORDER BY message_count DESC
-        LIMIT ?
-    ''', (limit,))
-    top_senders = cursor.fetchall()
-    conn.close()
+def get_top_message_senders(chat_id: int, limit: int = 5) -> list[tuple[str, int]]:
+    """Sohbette en çok mesaj gönderen kullanıcıları (display_name, mesaj_sayısı) olarak döndürür."""
+    with _read_cursor() as cursor:
+        cursor.execute('''
+            SELECT u.display_name, t.message_count
+            FROM message_rollup_total t
+            JOIN users u ON t.user_id = u.user_id
+            WHERE t.chat_id = ?
+            ORDER BY t.message_count DESC
+            LIMIT ?
+        ''', (chat_id, limit))
+        top_senders = cursor.fetchall()
     return [(row['display_name'], row['message_count']) for row in top_senders]
 
-def get_user_stats(user_id: str) -> dict:
-    """Belirli bir kullanıcının mesaj ve ceza istatistiklerini döndürür."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Sıralama dönemleri: günlük pencere saatlik özetlerden, haftalık ve aylık pencereler günlük özetlerden hesaplanır
+LEADERBOARD_PERIODS = ('daily', 'weekly', 'monthly', 'overall')
+
+def get_leaderboards(chat_id: int, user_id: str, limit: int = 3) -> dict[str, dict]:
+    """
+    Sohbette günlük (son 24 saat), haftalık (bugün dahil son 7 gün), aylık (bugün dahil son 30 gün) ve tüm zamanlar için
+    en çok mesaj gönderen `limit` kullanıcıyı ve verilen kullanıcının her dönemdeki sırasını tek bir sorguyla döndürür.
+    Dönüş: dönem -> {'top': [(sıra, display_name, mesaj_sayısı), ...], 'me': (sıra, mesaj_sayısı) veya None}
+    """
+    now = datetime.datetime.now()
+    since_hour = hour_bucket(now - datetime.timedelta(hours=24))
+    since_week = day_bucket(now - datetime.timedelta(days=6))
+    since_month = day_bucket(now - datetime.timedelta(days=29))
+    with _read_cursor() as cursor:
+        cursor.execute('''
+            WITH counts AS (
+                SELECT 'daily' AS period, user_id, SUM(message_count) AS message_count
+                FROM message_rollup_hourly WHERE chat_id = :chat_id AND hour >= :since_hour GROUP BY user_id
+                UNION ALL
+                SELECT 'weekly', user_id, SUM(message_count)
+                FROM message_rollup_daily WHERE chat_id = :chat_id AND day >= :since_week GROUP BY user_id
+                UNION ALL
+                SELECT 'monthly', user_id, SUM(message_count)
+                FROM message_rollup_daily WHERE chat_id = :chat_id AND day >= :since_month GROUP BY user_id
+                UNION ALL
+                SELECT 'overall', user_id, message_count
+                FROM message_rollup_total WHERE chat_id = :chat_id
+            ),
+            ranked AS (
+                SELECT period, user_id, message_count,
+                       ROW_NUMBER() OVER (PARTITION BY period ORDER BY message_count DESC, user_id) AS rank
+                FROM counts
+            )
+            SELECT r.period, r.user_id, r.message_count, r.rank, u.display_name
+            FROM ranked r
+            LEFT JOIN users u ON u.user_id = r.user_id
+            WHERE r.rank <= :limit OR r.user_id = :user_id
+            ORDER BY r.period, r.rank
+        ''', {'chat_id': chat_id, 'since_hour': since_hour, 'since_week': since_week, 'since_month': since_month,
+              'limit': limit, 'user_id': user_id})
+        rows = cursor.fetchall()
 
-    user_info = cursor.execute('SELECT display_name FROM users WHERE user_id = ?', (user_id,)).fetchone()
-    # Eğer kullanıcı bilgisi yoksa, varsayılan bir display_name kullan
-    display_name = user_info['display_name'] if user_info else f"Kullanıcı {user_id}"
+    leaderboards = {period: {'top': [], 'me': None} for period in LEADERBOARD_PERIODS}
+    for row in rows:
+        board = leaderboards[row['period']]
+        if row['rank'] <= limit:
+            display_name = row['display_name'] or f"Kullanıcı {row['user_id']}"
+            board['top'].append((row['rank'], display_name, row['message_count']))
+        if row['user_id'] == user_id:
+            board['me'] = (row['rank'], row['message_count'])
+    return leaderboards
 
-    message_count = cursor.execute(
-        'SELECT COUNT(*) FROM messages WHERE user_id = ?', (user_id,)
-    ).fetchone()[0]
+def get_user_stats(chat_id: int, user_id: str) -> dict:
+    """Belirli bir kullanıcının sohbetteki mesaj ve ceza istatistiklerini döndürür."""
+    with _read_cursor() as cursor:
+        user_info = cursor.execute('SELECT display_name FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        # Eğer kullanıcı bilgisi yoksa, varsayılan bir display_name kullan
+        display_name = user_info['display_name'] if user_info else f"Kullanıcı {user_id}"
+
+        row = cursor.execute(
+            'SELECT message_count FROM message_rollup_total WHERE chat_id = ? AND user_id = ?', (chat_id, user_id)
+        ).fetchone()
+        message_count = row['message_count'] if row else 0
+
+    punishment_data = get_punishment_data(chat_id, user_id) # Zaten bir dict döndürüyor
 
-    punishment_data = get_punishment_data(user_id) # Zaten bir dict döndürüyor
-    
-    conn.close()
     return {
         'display_name': display_name,
         'message_count': message_count,
@@ -263,14 +975,14 @@ def get_user_stats(user_id: str) -> dict:
         'mute_until': punishment_data.get('mute_until')
     }
 
-def get_statistics(user_id: str = None) -> str:
+def get_statistics(chat_id: int, user_id: str = None) -> str:
     """
-    Genel istatistikler sağlar veya belirli bir kullanıcının istatistiklerini.
+    Sohbetin genel istatistiklerini veya belirli bir kullanıcının sohbetteki istatistiklerini sağlar.
     Bu fonksiyonu yeni detaylı istatistik fonksiyonları yerine kullanmayacağız.
     """
-    total_messages = get_total_messages_count()
-    total_users = get_total_unique_users_count()
-    active_users_24h = get_active_users_last_24_hours()
+    total_messages = get_total_messages_count(chat_id)
+    total_users = get_total_unique_users_count(chat_id)
+    active_users_24h = get_active_users_last_24_hours(chat_id)
 
     stats_text = (
         f"**Genel İstatistikler:**\n"
@@ -280,7 +992,7 @@ def get_statistics(user_id: str = None) -> str:
     )
     
     if user_id:
-        user_stats = get_user_stats(user_id)
+        user_stats = get_user_stats(chat_id, user_id)
         stats_text += (
             f"\n**{user_stats['display_name']} Kullanıcı İstatistikleri:**\n"
             f"Gönderilen Mesaj: {user_stats['message_count']}\n"
@@ -292,3 +1004,6 @@ def get_statistics(user_id: str = None) -> str:
             stats_text += f"Susturma Bitiş Tarihi: {mute_until_dt.strftime('%d.%m.%Y %H:%M:%S')}\n"
 
     return stats_text
+
+# Sorgu süreleri: modüldeki public veritabanı fonksiyonları ölçülür (bağlantı ve biçimlendirme yardımcıları hariç)
+metrics.instrument_module(globals(), exclude={'get_db_connection', 'close_connections', 'parse_timestamp', 'hour_bucket', 'day_bucket', 'build_display_name'})
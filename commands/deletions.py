@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+import heapq
+import logging
+from collections import defaultdict
+
+from telegram import Message
+from telegram.error import BadRequest, Forbidden
+from telegram.ext import ContextTypes
+
+from config import DELETION_RETRY_DELAY_S
+from commands import database
+from commands import async_database
+from commands import outbound
+from commands import sharding
+
+logger = logging.getLogger(__name__)
+
+# Geçici bot mesajları için tek silme sistemi.
+# Her mesaj için ayrı bir JobQueue işi ve ayrı bir deleteMessage isteği yerine silme işlemleri silinme zamanına
+# göre sıralı bir heap'te tutulur ve pending_deletions tablosuna yazılır. Tek bir süpürücü iş zamanı gelenleri
+# sohbet başına gruplar ve deleteMessages ile en fazla 100'lük parçalar halinde siler. Bot yeniden başladığında
+# bekleyen silme işlemleri veritabanından yüklenir.
+_MAX_IDS_PER_REQUEST = 100
+
+_heap: list[tuple[datetime.datetime, int, int]] = [] # (delete_at, chat_id, message_id)
+_unsaved: list[tuple[int, int, datetime.datetime]] = [] # Henüz veritabanına yazılmamış yeni kayıtlar
+_sweep_lock = asyncio.Lock()
+
+def pending_count() -> int:
+    """Bekleyen silme işlemi sayısını döndürür."""
+    return len(_heap)
+
+def load_pending():
+    """
+    Veritabanındaki bekleyen silme işlemlerini yükler. Bot başlarken bir kez çağrılır. Çok süreçli çalışmada
+    her işçi yalnızca kendi sohbetlerinin kayıtlarını yükler.
+    """
+    _heap.clear()
+    for chat_id, message_id, delete_at in database.get_pending_deletions():
+        if sharding.owns_chat(chat_id):
+            _heap.append((delete_at, chat_id, message_id))
+    heapq.heapify(_heap)
+    logger.info("%s bekleyen mesaj silme işlemi yüklendi.", len(_heap))
+
+def schedule(chat_id: int, message_id: int, delay_s: float):
+    """Mesajı `delay_s` saniye sonra silinmek üzere kaydeder."""
+    delete_at = datetime.datetime.now() + datetime.timedelta(seconds=delay_s)
+    heapq.heappush(_heap, (delete_at, chat_id, message_id))
+    _unsaved.append((chat_id, message_id, delete_at)) # Bir sonraki süpürmede toplu olarak yazılır
+
+def schedule_message(message: Message, delay_s: float):
+    """Gönderilmiş bir bot mesajını `delay_s` saniye sonra silinmek üzere kaydeder."""
+    schedule(message.chat_id, message.message_id, delay_s)
+
+async def _delete_chunk(bot, chat_id: int, message_ids: list[int]) -> bool:
+    """Bir sohbetteki mesajları tek istekte siler. Tekrar denenmesi gerekiyorsa False döner."""
+    try:
+        await outbound.delete_messages(bot, chat_id, message_ids)
+        logger.debug("Sohbet %s içinde %d mesaj silindi.", chat_id, len(message_ids))
+    except (BadRequest, Forbidden) as e:
+        # Mesajlar zaten silinmiş, çok eski veya bot sohbetten çıkarılmış; tekrar denemenin anlamı yok
+        logger.warning("Sohbet %s içinde %s mesaj silinemedi: %s", chat_id, len(message_ids), e)
+    except Exception as e:
+        logger.error("Sohbet %s içinde %s mesaj silinirken hata oluştu: %s. Tekrar denenecek.", chat_id, len(message_ids), e)
+        return False
+    return True
+
+async def sweep(bot):
+    """Zamanı gelen mesajları sohbet başına toplu olarak siler ve değişiklikleri veritabanına yazar."""
+    global _unsaved
+    async with _sweep_lock:
+        now = datetime.datetime.now()
+        due_by_chat: dict[int, list[int]] = defaultdict(list)
+        while _heap and _heap[0][0] <= now:
+            _, chat_id, message_id = heapq.heappop(_heap)
+            due_by_chat[chat_id].append(message_id)
+
+        removed_keys = []
+        if due_by_chat:
+            chunks = [
+                (chat_id, message_ids[i:i + _MAX_IDS_PER_REQUEST])
+                for chat_id, message_ids in due_by_chat.items()
+                for i in range(0, len(message_ids), _MAX_IDS_PER_REQUEST)
+            ]
+            results = await asyncio.gather(*(_delete_chunk(bot, chat_id, message_ids) for chat_id, message_ids in chunks))
+            retry_at = datetime.datetime.now() + datetime.timedelta(seconds=DELETION_RETRY_DELAY_S)
+            for (chat_id, message_ids), done in zip(chunks, results):
+                for message_id in message_ids:
+                    if done:
+                        removed_keys.append((chat_id, message_id))
+                    else:
+                        heapq.heappush(_heap, (retry_at, chat_id, message_id))
+                        _unsaved.append((chat_id, message_id, retry_at))
+
+        added_rows = _unsaved
+        _unsaved = []
+        # Henüz yazılmadan silinen mesajların satırı eklenip hemen silinir; ikisi de aynı işlemde olur
+        try:
+            await async_database.sync_pending_deletions(added_rows, removed_keys)
+        except Exception as e:
+            logger.error("Bekleyen silme işlemleri veritabanına yazılamadı: %s", e)
+            _unsaved = added_rows + _unsaved # Eklemeler tekrar denenir; silinenlerin satırları açılışta zararsızdır
+
+async def sweep_job(context: ContextTypes.DEFAULT_TYPE):
+    """Zamanı gelen mesajları silen zamanlanmış iş."""
+    if _sweep_lock.locked():
+        return # Önceki süpürme hâlâ sürüyor (ör. hız sınırı nedeniyle bekliyor)
+    await sweep(context.bot)
+
+async def flush():
+    """Henüz yazılmamış silme kayıtlarını veritabanına yazar. Kapanışta çağrılır."""
+    global _unsaved
+    if not _unsaved:
+        return
+    added_rows = _unsaved
+    _unsaved = []
+    await async_database.sync_pending_deletions(added_rows, [])
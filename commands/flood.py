@@ -0,0 +1,112 @@
+import logging
+import time
+from collections import OrderedDict
+
+from config import (
+    FLOOD_ENABLED, FLOOD_USER_RATE_PER_S, FLOOD_USER_BURST, FLOOD_CHAT_RATE_PER_S, FLOOD_CHAT_BURST,
+    FLOOD_STRIKE_COOLDOWN_S, FLOOD_MAX_TRACKED_USERS, MUTE_NOTICE_COOLDOWN_S
+)
+
+logger = logging.getLogger(__name__)
+
+# Mesaj taşkını (flood) tespiti.
+# Her (sohbet, kullanıcı) çifti ve her sohbet için bellekte bir token bucket tutulur; mesaj başına iş sabit
+# sürelidir. Kovalar son kullanım sırasıyla OrderedDict'te durur: dolmaya yetecek kadar süredir kullanılmayan
+# kovalar (yeniden oluşturulsa aynı durumda olacaklar) baştan silinir ve kullanıcı kovalarının sayısı
+# FLOOD_MAX_TRACKED_USERS ile sınırlıdır. Çok süreçli çalışmada her sohbet tek bir süreçte işlendiği için
+# süreç içi durum yeterlidir.
+
+# check_message sonuçları
+USER_FLOOD_STRIKE = 'user_strike' # Kullanıcı sınırı aştı ve ihlal verilmeli
+USER_FLOOD = 'user' # Kullanıcı sınırın üzerinde, ama bu taşkın için ihlal zaten verildi
+CHAT_FLOOD = 'chat' # Sohbetin toplam mesaj hızı sınırın üzerinde
+
+class _Bucket:
+    """
+    Saniyede `rate` token üreten, en fazla `capacity` token biriktiren kova.
+    `flagged_at`: son ihlal/uyarı zamanı, `noticed_at`: susturulmuş kullanıcıya son bildirim zamanı.
+    """
+    __slots__ = ('tokens', 'updated', 'flagged_at', 'noticed_at')
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+        self.flagged_at = float('-inf')
+        self.noticed_at = float('-inf')
+
+    def refill(self, rate: float, capacity: float, now: float):
+        """Geçen sürede üretilen tokenları ekler; `updated` aynı zamanda kovanın son kullanım zamanıdır."""
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def take(self, rate: float, capacity: float, now: float) -> bool:
+        """Bir token harcar; kova boşsa False döner."""
+        self.refill(rate, capacity, now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+_user_buckets: OrderedDict[tuple[int, str], _Bucket] = OrderedDict()
+_chat_buckets: OrderedDict[int, _Bucket] = OrderedDict()
+
+# Bu kadar süre kullanılmayan kova yeniden dolmuştur ve ihlal/bildirim bekleme süreleri de geçmiştir; silinebilir
+_USER_IDLE_S = max(FLOOD_USER_BURST / FLOOD_USER_RATE_PER_S, FLOOD_STRIKE_COOLDOWN_S, MUTE_NOTICE_COOLDOWN_S)
+_CHAT_IDLE_S = max(FLOOD_CHAT_BURST / FLOOD_CHAT_RATE_PER_S, FLOOD_STRIKE_COOLDOWN_S)
+
+def _get_bucket(buckets: OrderedDict, key, capacity: float, idle_s: float, now: float) -> _Bucket:
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = _Bucket(capacity, now)
+    else:
+        buckets.move_to_end(key)
+    # En eski kovalar baştadır; boşta kalanlar silinir (mesaj başına ortalama sabit iş)
+    while buckets:
+        oldest_key, oldest = next(iter(buckets.items()))
+        if oldest is bucket or now - oldest.updated < idle_s:
+            break
+        del buckets[oldest_key]
+    return bucket
+
+def check_message(chat_id: int, user_id: str, now: float | None = None) -> str | None:
+    """
+    Mesajı kullanıcının ve sohbetin kovasına işler. Sınır aşılmadıysa None, aşıldıysa USER_FLOOD_STRIKE,
+    USER_FLOOD veya CHAT_FLOOD döner. Taşkın mesajları sohbetin kovasından harcamaz.
+    """
+    if not FLOOD_ENABLED:
+        return None
+    now = time.monotonic() if now is None else now
+
+    bucket = _get_bucket(_user_buckets, (chat_id, user_id), FLOOD_USER_BURST, _USER_IDLE_S, now)
+    if len(_user_buckets) > FLOOD_MAX_TRACKED_USERS:
+        _user_buckets.popitem(last=False)
+    if not bucket.take(FLOOD_USER_RATE_PER_S, FLOOD_USER_BURST, now):
+        if now - bucket.flagged_at < FLOOD_STRIKE_COOLDOWN_S:
+            return USER_FLOOD
+        bucket.flagged_at = now
+        return USER_FLOOD_STRIKE
+
+    chat_bucket = _get_bucket(_chat_buckets, chat_id, FLOOD_CHAT_BURST, _CHAT_IDLE_S, now)
+    if not chat_bucket.take(FLOOD_CHAT_RATE_PER_S, FLOOD_CHAT_BURST, now):
+        if now - chat_bucket.flagged_at >= FLOOD_STRIKE_COOLDOWN_S:
+            chat_bucket.flagged_at = now
+            logger.warning("Sohbet %s mesaj hızı sınırını (%s/sn) aştı; taşkın süresince mesajlar kaydedilmiyor.", chat_id, FLOOD_CHAT_RATE_PER_S)
+        return CHAT_FLOOD
+    return None
+
+def notice_due(chat_id: int, user_id: str, now: float | None = None) -> bool:
+    """
+    Susturulmuş kullanıcıya bu sohbette son MUTE_NOTICE_COOLDOWN_S içinde bildirim gönderilmediyse True döner ve
+    bildirim zamanını kaydeder. Taşkın koruması kapalıyken de çalışır.
+    """
+    now = time.monotonic() if now is None else now
+    bucket = _get_bucket(_user_buckets, (chat_id, user_id), FLOOD_USER_BURST, _USER_IDLE_S, now)
+    bucket.refill(FLOOD_USER_RATE_PER_S, FLOOD_USER_BURST, now) # Boşta silinme son kullanıma göre yapılır
+    if now - bucket.noticed_at < MUTE_NOTICE_COOLDOWN_S:
+        return False
+    bucket.noticed_at = now
+    return True
+
+def tracked_count() -> int:
+    """Bellekte tutulan kullanıcı kovası sayısı."""
+    return len(_user_buckets)
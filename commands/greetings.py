@@ -1,11 +1,12 @@
-import datetime
 from telegram import Update, Message # Message tipini içe aktarın
 from telegram.ext import ContextTypes, JobQueue
 import os
 import logging
 
 from config import GREETING_IMAGES_DIR
-from commands.utils import delete_message_job
+from commands import deletions
+from commands import outbound
+from commands import media_cache
 
 logger = logging.getLogger(__name__)
 
@@ -31,28 +32,19 @@ async def send_greeting_image(update: Update, context: ContextTypes.DEFAULT_TYPE
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Görsel dosyası bulunamadı: {image_path}")
 
-        with open(image_path, 'rb') as image_file:
-            sent_message = await context.bot.send_photo(chat_id=chat_id, photo=image_file, caption=caption)
-        logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id})'ye '{image_filename}' gönderildi.")
+        sent_message = await media_cache.send_photo(context.bot, chat_id, image_path, caption=caption)
+        logger.info("Kullanıcı %s (%s)'ye '%s' gönderildi.", display_name, user_id, image_filename)
         return sent_message # Başarılı mesajı geri döndür
     except FileNotFoundError:
         error_message_text = f"ZeaLouS: {display_name}, üzgünüm, selamlama görselini bulamadım: '{image_filename}'"
-        sent_error_message = await update.message.reply_text(error_message_text)
-        job_queue.run_once( # Burası düzeltildi: context.job_queue yerine job_queue kullanıldı
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
-        logger.error(f"[{datetime.datetime.now()}] Görsel '{image_filename}' bulunamadı. Kullanıcıya hata mesajı gönderildi ve silinmesi zamanlandı.")
+        sent_error_message = await outbound.reply_text(update.message, error_message_text)
+        deletions.schedule_message(sent_error_message, 15)
+        logger.error("Görsel '%s' bulunamadı. Kullanıcıya hata mesajı gönderildi ve silinmesi zamanlandı.", image_filename)
         return None # Hata durumunda None döndür
     except Exception as e:
         error_message_text = f"ZeaLouS: {display_name}, görsel gönderilirken bir hata oluştu: {e}"
-        sent_error_message = await update.message.reply_text(error_message_text)
-        job_queue.run_once( # Burası düzeltildi: context.job_queue yerine job_queue kullanıldı
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
-        logger.error(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id})'ye görsel '{image_filename}' gönderilirken hata oluştu: {e}. Hata mesajı silinmek üzere zamanlandı.")
+        sent_error_message = await outbound.reply_text(update.message, error_message_text)
+        deletions.schedule_message(sent_error_message, 15)
+        logger.error("Kullanıcı %s (%s)'ye görsel '%s' gönderilirken hata oluştu: %s. Hata mesajı silinmek üzere zamanlandı.", display_name, user_id, image_filename, e)
         return None # Hata durumunda None döndür
 
@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+import logging
+from collections import Counter
+
+from telegram.ext import ContextTypes
+
+from config import INGEST_FLUSH_ROWS, INGEST_MAX_PENDING_ROWS
+from commands import async_database
+from commands.database import build_display_name
+
+logger = logging.getLogger(__name__)
+
+# Yazma tamponu (write-behind): her mesaj için ayrı INSERT + commit yapmak yerine kayıtlar bellekte
+# biriktirilir ve executemany ile tek bir işlemde yazılır. Tampon, zamanlayıcıyla (INGEST_FLUSH_INTERVAL_MS)
+# veya INGEST_FLUSH_ROWS kayda ulaşınca (hangisi önce gelirse) boşaltılır.
+_pending_messages: list[tuple] = [] # (chat_id, user_id, timestamp)
+_pending_users: dict[str, tuple] = {} # user_id -> users satırı; yalnızca profili değişen kullanıcılar
+# Profil önbelleği: user_id -> (username, first_name, last_name, is_bot). Profil değişmedikçe users tablosuna
+# yazılmaz; son etkinlik zamanı ayrıca biriktirilir ve USER_ACTIVITY_FLUSH_INTERVAL_S aralıkla toplu yazılır.
+_known_profiles: dict[str, tuple] = {}
+_pending_activity: dict[str, datetime.datetime] = {} # user_id -> son etkinlik zamanı
+_flush_lock = asyncio.Lock()
+_flush_task: asyncio.Task | None = None
+_flushed_messages: Counter[int] = Counter() # chat_id -> bu süreçte veritabanına yazılan mesaj sayısı
+
+def flushed_message_count(chat_id: int) -> int:
+    """
+    Bu süreçte sohbet için veritabanına yazılmış mesaj sayısını döndürür. İstatistik önbelleği bu sayaca bakar;
+    böylece bir sohbetteki mesajlar diğer sohbetlerin önbelleğini geçersiz kılmaz.
+    """
+    return _flushed_messages[chat_id]
+
+def pending_count() -> int:
+    """Tamponda bekleyen toplam kayıt sayısını döndürür."""
+    return len(_pending_messages) + len(_pending_users)
+
+async def record_message(chat_id: int, user_id: str, timestamp: datetime.datetime | None = None):
+    """Bir sohbetteki mesaj kaydını tampona ekler."""
+    await _wait_for_capacity()
+    _pending_messages.append((chat_id, user_id, timestamp or datetime.datetime.now()))
+    _maybe_schedule_flush()
+
+async def record_user_info(user_id: str, username: str | None, first_name: str | None, last_name: str | None, is_bot: bool):
+    """
+    Kullanıcının etkinliğini kaydeder. Profil alanları önceki halinden farklıysa (veya kullanıcı bu süreçte
+    ilk kez görülüyorsa) tampona bir UPSERT eklenir; aksi halde yalnızca son etkinlik zamanı güncellenir.
+    """
+    now = datetime.datetime.now()
+    profile = (username, first_name, last_name, bool(is_bot))
+    if _known_profiles.get(user_id) == profile:
+        _pending_activity[user_id] = now
+        return
+
+    await _wait_for_capacity()
+    _known_profiles[user_id] = profile
+    display_name = build_display_name(username, first_name, last_name)
+    _pending_users[user_id] = (user_id, username, display_name, first_name, last_name, int(is_bot), now)
+    _pending_activity.pop(user_id, None) # UPSERT son etkinlik zamanını da yazar
+    _maybe_schedule_flush()
+
+async def _wait_for_capacity():
+    """Tampon üst sınıra ulaştıysa yazma bitene kadar bekler (geri basınç)."""
+    while pending_count() >= INGEST_MAX_PENDING_ROWS:
+        logger.warning("Yazma tamponu dolu (%s kayıt). Yazma bekleniyor.", pending_count())
+        await flush()
+
+def _maybe_schedule_flush():
+    """Tampon INGEST_FLUSH_ROWS sınırına ulaştıysa arka planda bir yazma başlatır."""
+    global _flush_task
+    if pending_count() >= INGEST_FLUSH_ROWS and (_flush_task is None or _flush_task.done()):
+        _flush_task = asyncio.get_running_loop().create_task(flush())
+
+async def flush():
+    """Tampondaki tüm kayıtları tek bir işlemde veritabanına yazar."""
+    global _pending_messages
+    async with _flush_lock:
+        if not _pending_messages and not _pending_users:
+            return
+        message_rows = _pending_messages
+        user_rows = list(_pending_users.values())
+        _pending_messages = []
+        _pending_users.clear()
+        try:
+            await async_database.write_ingest_batch(message_rows, user_rows)
+            _flushed_messages.update(chat_id for chat_id, _, _ in message_rows)
+            logger.debug("Yazma tamponu boşaltıldı: %d mesaj, %d kullanıcı.", len(message_rows), len(user_rows))
+        except Exception as e:
+            logger.error("Yazma tamponu boşaltılırken hata oluştu: %s. Kayıtlar tekrar denenecek.", e)
+            # Kayıtları sıralarını koruyarak geri koy; yeni gelen kullanıcı bilgileri eskilerin üzerine yazılır
+            _pending_messages = message_rows + _pending_messages
+            for row in user_rows:
+                _pending_users.setdefault(row[0], row)
+            raise
+
+async def flush_activity():
+    """Biriken son etkinlik zamanlarını tek bir işlemde yazar."""
+    global _pending_activity
+    if not _pending_activity:
+        return
+    await flush() # Yeni kullanıcıların satırları önce oluşturulsun
+    activity = _pending_activity
+    _pending_activity = {}
+    try:
+        await async_database.update_users_last_activity([(timestamp, user_id) for user_id, timestamp in activity.items()])
+    except Exception as e:
+        logger.error("Kullanıcı etkinlik zamanları yazılırken hata oluştu: %s. Tekrar denenecek.", e)
+        for user_id, timestamp in activity.items():
+            _pending_activity.setdefault(user_id, timestamp)
+        raise
+
+async def activity_flush_job(context: ContextTypes.DEFAULT_TYPE):
+    """Son etkinlik zamanlarını belirli aralıklarla yazan zamanlanmış iş."""
+    try:
+        await flush_activity()
+    except Exception:
+        pass # Hata flush_activity() içinde loglandı
+
+async def flush_job(context: ContextTypes.DEFAULT_TYPE):
+    """Tamponu belirli aralıklarla boşaltan zamanlanmış iş."""
+    try:
+        await flush()
+    except Exception:
+        pass # Hata flush() içinde loglandı, kayıtlar bir sonraki turda tekrar denenecek
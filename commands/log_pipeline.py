@@ -0,0 +1,194 @@
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from functools import wraps
+
+from telegram.ext import Application
+
+from config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_MESSAGE_CONTENT, LOG_SAMPLE_RATES, LOG_EVENT_RATE_LIMIT_PER_S, LOG_QUEUE_SIZE
+)
+
+# Loglama hattı: kayıtlar olay döngüsünde yalnızca bir kuyruğa konur; biçimlendirme ve stdout/dosyaya yazma
+# arka plandaki tek bir yazıcı thread'inde (QueueListener) yapılır. Mesajlar %-biçimiyle verildiğinde
+# (logger.info("... %s", x)) metin de yalnızca kayıt gerçekten yazılırken oluşturulur.
+# Her kayda o an işlenen güncellemenin işleyici, sohbet ve kullanıcı bilgisi eklenir. `extra={'event': ...}` ile
+# işaretlenen yüksek hacimli kayıtlar LOG_SAMPLE_RATES ile örneklenir ve olay başına saniyede en fazla
+# LOG_EVENT_RATE_LIMIT_PER_S kayıtla sınırlanır; uyarı ve hatalar hiçbir zaman atlanmaz.
+_CONTEXT_FIELDS = ('handler', 'chat_id', 'user_id')
+_EXTRA_FIELDS = ('event', 'violation', 'text', 'text_length', 'suppressed', 'dropped')
+
+_update_context: contextvars.ContextVar[tuple | None] = contextvars.ContextVar('log_update_context', default=None)
+_listener: logging.handlers.QueueListener | None = None
+_dropped = 0 # Kuyruk dolu olduğu için atılan kayıt sayısı (bir sonraki kayda eklenir)
+
+def message_text(text: str | None) -> dict:
+    """
+    Mesaj içeriğini LOG_MESSAGE_CONTENT ayarına göre loga eklenecek alanlara çevirir:
+    "full" metni, "redact" yalnızca uzunluğu ekler, "drop" hiçbir şey eklemez. Sonuç `extra` ile birleştirilir.
+    """
+    if text is None or LOG_MESSAGE_CONTENT == "drop":
+        return {}
+    if LOG_MESSAGE_CONTENT == "full":
+        return {'text': text}
+    return {'text_length': len(text)}
+
+class _ContextFilter(logging.Filter):
+    """Kayda güncelleme bilgisini ekler; örneklenen ve sınırı aşan olay kayıtlarını eler."""
+
+    def __init__(self):
+        super().__init__()
+        self._windows: dict[str, list] = {} # Olay -> [pencere başlangıcı, penceredeki kayıt, atlanan kayıt]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _update_context.get()
+        if context is not None:
+            for name, value in zip(_CONTEXT_FIELDS, context):
+                if not hasattr(record, name):
+                    setattr(record, name, value)
+        event = getattr(record, 'event', None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        rate = LOG_SAMPLE_RATES.get(event, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return False
+        now = time.monotonic()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= 1.0:
+            suppressed = window[2] if window else 0
+            window = self._windows[event] = [now, 0, 0]
+            if suppressed:
+                record.suppressed = suppressed # Önceki saniyede sınır nedeniyle yazılmayanlar
+        if window[1] >= LOG_EVENT_RATE_LIMIT_PER_S:
+            window[2] += 1
+            return False
+        window[1] += 1
+        return True
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Kaydı biçimlendirmeden kuyruğa koyar; kuyruk doluysa beklemek yerine kaydı atar."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Traceback çağıranın thread'inde metne çevrilir; istisna nesnesi kuyrukta tutulmaz
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+class JsonFormatter(logging.Formatter):
+    """Her kaydı tek satırlık bir JSON nesnesi olarak yazar."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        global _dropped
+        data = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.processName != 'MainProcess':
+            data['process'] = record.processName
+        for name in _CONTEXT_FIELDS + _EXTRA_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                data[name] = value
+        if _dropped:
+            data['dropped'], _dropped = _dropped, 0
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Okunabilir satırlar; bağlam ve olay alanları satır sonuna anahtar=değer olarak eklenir."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        global _dropped
+        line = super().format(record)
+        fields = [f"{name}={getattr(record, name)}" for name in _CONTEXT_FIELDS + _EXTRA_FIELDS if getattr(record, name, None) is not None]
+        if _dropped:
+            fields.append(f"dropped={_dropped}")
+            _dropped = 0
+        return f"{line} [{' '.join(fields)}]" if fields else line
+
+def configure():
+    """
+    Kök logger'ı kuyruk tabanlı hatta bağlar ve yazıcı thread'ini başlatır. Program başında bir kez çağrılır;
+    kapanışta kuyrukta kalan kayıtlar yazılır.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else TextFormatter()
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        handlers.append(logging.FileHandler(LOG_FILE, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    # httpx her Bot API isteğini INFO seviyesinde loglar; bu, mesaj başına birkaç satır demektir
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+def shutdown():
+    """Kuyruktaki kayıtları yazar ve yazıcı thread'ini durdurur."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def redirect_output(stream):
+    """Yazıcı thread'inin konsol çıktısını verilen akışa yönlendirir (ör. ölçüm araçlarında os.devnull)."""
+    if _listener is None:
+        return
+    for handler in _listener.handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setStream(stream)
+
+def bind_update(callback):
+    """İşleyiciyi, çalıştığı süre boyunca loglara işleyici, sohbet ve kullanıcı bilgisini ekleyecek şekilde sarar."""
+    handler_name = callback.__name__
+
+    @wraps(callback)
+    async def wrapper(update, context):
+        chat = getattr(update, 'effective_chat', None)
+        user = getattr(update, 'effective_user', None)
+        token = _update_context.set((handler_name, chat.id if chat else None, str(user.id) if user else None))
+        try:
+            return await callback(update, context)
+        finally:
+            _update_context.reset(token)
+    return wrapper
+
+def bind_handlers(application: Application):
+    """Uygulamaya kayıtlı bütün işleyicileri bind_update ile sarar. İşleyiciler eklendikten sonra çağrılır."""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            handler.callback = bind_update(handler.callback)
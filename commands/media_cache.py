@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import logging
+import os
+
+from telegram import Bot, Message
+from telegram.error import BadRequest
+
+from commands import async_database
+from commands import outbound
+
+logger = logging.getLogger(__name__)
+
+# Telegram'a bir kez yüklenen medya dosyaları file_id ile tekrar gönderilir; böylece her komutta
+# megabaytlarca dosya yüklemek yerine küçük bir istek yapılır. Önbellek anahtarı dosya yolu ve içerik
+# özetidir (SHA-256), dolayısıyla diskteki dosya değiştiğinde eski file_id kendiliğinden geçersiz kalır.
+# Dosyayı her seferinde yeniden okumamak için özet, dosyanın değişiklik zamanı ve boyutuyla birlikte bellekte tutulur.
+_hashes: dict[str, tuple[int, int, str]] = {} # path -> (mtime_ns, size, content_hash)
+_file_ids: dict[tuple[str, str], str] = {} # (path, content_hash) -> file_id
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def _content_hash(path: str) -> str:
+    """Dosyanın içerik özetini döndürür; dosya değişmediyse bellekteki özeti kullanır."""
+    stat = os.stat(path) # Dosya yoksa FileNotFoundError çağırana iletilir
+    cached = _hashes.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    content_hash = await asyncio.to_thread(_hash_file, path)
+    _hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+    return content_hash
+
+async def _get_file_id(path: str, content_hash: str) -> str | None:
+    key = (path, content_hash)
+    if key not in _file_ids:
+        file_id = await async_database.get_media_file_id(path, content_hash)
+        if file_id is None:
+            return None
+        _file_ids[key] = file_id
+    return _file_ids[key]
+
+def _extract_file_id(message: Message) -> str | None:
+    if message.audio:
+        return message.audio.file_id
+    if message.photo:
+        return message.photo[-1].file_id # En büyük boyut
+    if message.document:
+        return message.document.file_id
+    return None
+
+async def _send_cached(send, bot: Bot, chat_id: int, path: str, **kwargs) -> Message:
+    """
+    Dosyayı önbellekteki file_id ile gönderir. Kayıt yoksa veya Telegram file_id'yi reddederse dosyayı
+    yükler ve dönen file_id'yi kaydeder.
+    """
+    content_hash = await _content_hash(path)
+    file_id = await _get_file_id(path, content_hash)
+    if file_id:
+        try:
+            return await send(bot, chat_id, file_id, **kwargs)
+        except BadRequest as e:
+            logger.warning("'%s' için kayıtlı file_id geçersiz: %s. Dosya yeniden yüklenecek.", path, e)
+            _file_ids.pop((path, content_hash), None)
+            await async_database.delete_media_file_id(path, content_hash)
+
+    with open(path, 'rb') as media_file:
+        sent_message = await send(bot, chat_id, media_file, **kwargs)
+    file_id = _extract_file_id(sent_message)
+    if file_id:
+        _file_ids[(path, content_hash)] = file_id
+        await async_database.save_media_file_id(path, content_hash, file_id)
+        logger.info("'%s' Telegram'a yüklendi, file_id önbelleğe alındı.", path)
+    return sent_message
+
+async def send_audio(bot: Bot, chat_id: int, path: str, priority: int = outbound.PRIORITY_LOW, **kwargs) -> Message:
+    return await _send_cached(outbound.send_audio, bot, chat_id, path, priority=priority, **kwargs)
+
+async def send_photo(bot: Bot, chat_id: int, path: str, priority: int = outbound.PRIORITY_LOW, **kwargs) -> Message:
+    return await _send_cached(outbound.send_photo, bot, chat_id, path, priority=priority, **kwargs)
@@ -0,0 +1,263 @@
+import bisect
+import inspect
+import logging
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from telegram.ext import Application, ApplicationHandlerStop, ContextTypes
+
+from config import METRICS_ENABLED, METRICS_SUMMARY_INTERVAL_S
+
+logger = logging.getLogger(__name__)
+
+# Süre ve sayaç metrikleri: işleyiciler, veritabanı fonksiyonları ve Bot API çağrıları.
+# Histogramlar sabit kovalarla tutulur; bir ölçüm iki perf_counter çağrısı, bir bisect ve birkaç toplamadır.
+# Veriler isteğe bağlı yerel bir HTTP adresinden Prometheus metin formatında sunulur ve aralıklarla tek satırlık
+# bir özet loglanır. METRICS_ENABLED kapalıysa hiçbir fonksiyon sarılmaz ve ölçüm yapılmaz.
+HANDLER_SECONDS = 'bot_handler_duration_seconds'
+HANDLER_ERRORS = 'bot_handler_errors_total'
+DB_SECONDS = 'bot_db_query_duration_seconds'
+DB_ERRORS = 'bot_db_query_errors_total'
+API_SECONDS = 'bot_api_request_duration_seconds'
+API_REQUESTS = 'bot_api_requests_total'
+API_QUEUE_WAIT_SECONDS = 'bot_api_queue_wait_seconds'
+
+# Ad -> (tür, açıklama, etiket adları)
+_FAMILIES = {
+    HANDLER_SECONDS: ('histogram', "Güncelleme işleyicilerinin süresi", ('handler',)),
+    HANDLER_ERRORS: ('counter', "Hata ile biten işleyici çağrıları", ('handler',)),
+    DB_SECONDS: ('histogram', "Veritabanı fonksiyonlarının süresi", ('query',)),
+    DB_ERRORS: ('counter', "Hata ile biten veritabanı fonksiyonu çağrıları", ('query',)),
+    API_SECONDS: ('histogram', "Bot API isteklerinin süresi", ('method',)),
+    API_REQUESTS: ('counter', "Sonucuna göre Bot API istekleri (ok, retry_after, error)", ('method', 'result')),
+    API_QUEUE_WAIT_SECONDS: ('histogram', "İsteklerin giden kuyrukta bekleme süresi", ('priority',)),
+}
+
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS) + 1) # Son kova: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+_lock = threading.Lock() # Veritabanı fonksiyonları executor thread'lerinde, HTTP sunucusu kendi thread'inde çalışır
+_histograms: dict[str, dict[tuple, _Histogram]] = {name: {} for name, (kind, _, _) in _FAMILIES.items() if kind == 'histogram'}
+_counters: dict[str, dict[tuple, int]] = {name: {} for name, (kind, _, _) in _FAMILIES.items() if kind == 'counter'}
+_gauges: dict[str, tuple[str, Callable[[], float]]] = {} # Ad -> (açıklama, değer fonksiyonu)
+_last_summary: dict[str, dict[tuple, list[int]]] = {} # Özet logu için önceki kova sayıları
+_last_errors: dict[str, dict[tuple, int]] = {} # Özet logu için önceki hata sayıları
+_server: ThreadingHTTPServer | None = None
+
+def observe(name: str, labels: tuple, seconds: float):
+    """Histograma bir ölçüm ekler."""
+    if not METRICS_ENABLED:
+        return
+    family = _histograms[name]
+    with _lock:
+        histogram = family.get(labels)
+        if histogram is None:
+            histogram = family[labels] = _Histogram()
+        histogram.observe(seconds)
+
+def inc(name: str, labels: tuple, amount: int = 1):
+    """Sayacı artırır."""
+    if not METRICS_ENABLED:
+        return
+    family = _counters[name]
+    with _lock:
+        family[labels] = family.get(labels, 0) + amount
+
+def register_gauge(name: str, help_text: str, func: Callable[[], float]):
+    """Okunduğu anda `func` ile hesaplanan bir değer ekler (ör. kuyruk uzunluğu)."""
+    _gauges[name] = (help_text, func)
+
+# Ölçüm sarmalayıcıları
+def instrument_handler(callback):
+    """Asenkron bir işleyiciyi süresini ve hatalarını kaydeden sürümüyle sarar."""
+    labels = (callback.__name__,)
+
+    @wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except ApplicationHandlerStop:
+            raise
+        except Exception:
+            inc(HANDLER_ERRORS, labels)
+            raise
+        finally:
+            observe(HANDLER_SECONDS, labels, time.perf_counter() - started)
+    return wrapper
+
+def instrument_handlers(application: Application):
+    """Uygulamaya kayıtlı bütün işleyicilerin callback'lerini sarar. İşleyiciler eklendikten sonra çağrılır."""
+    if not METRICS_ENABLED:
+        return
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            handler.callback = instrument_handler(handler.callback)
+
+def instrument_query(func):
+    """Senkron bir veritabanı fonksiyonunu süresini ve hatalarını kaydeden sürümüyle sarar."""
+    labels = (func.__name__,)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            inc(DB_ERRORS, labels)
+            raise
+        finally:
+            observe(DB_SECONDS, labels, time.perf_counter() - started)
+    return wrapper
+
+def instrument_module(namespace: dict, exclude: set[str]):
+    """
+    Bir modüldeki (globals()) alt çizgiyle başlamayan bütün fonksiyonları instrument_query ile sarar.
+    Modülün sonunda çağrılır; modül içi çağrılar da sarılmış sürümleri kullanır.
+    """
+    if not METRICS_ENABLED:
+        return
+    module_name = namespace['__name__']
+    for name, value in list(namespace.items()):
+        if inspect.isfunction(value) and value.__module__ == module_name and not name.startswith('_') and name not in exclude:
+            namespace[name] = instrument_query(value)
+
+# Prometheus metin formatı
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def render_prometheus() -> str:
+    """Bütün metrikleri Prometheus metin formatında döndürür."""
+    with _lock:
+        histograms = {name: {labels: (list(h.counts), h.sum, h.count) for labels, h in family.items()} for name, family in _histograms.items()}
+        counters = {name: dict(family) for name, family in _counters.items()}
+    lines = []
+    for name, (kind, help_text, label_names) in _FAMILIES.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == 'counter':
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+            continue
+        for labels, (counts, total, count) in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, bucket_count in zip(_BUCKETS + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f"{name}_bucket{_format_labels(label_names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(label_names, labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(label_names, labels)} {count}")
+    for name, (help_text, func) in _gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        try:
+            lines.append(f"{name} {func()}")
+        except Exception as e:
+            logger.warning("%s değeri okunamadı: %s", name, e)
+    return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Her kazıma isteğini loglamaya gerek yok
+
+def start_server(port: int):
+    """/metrics adresini 127.0.0.1 üzerinde ayrı bir thread'de sunar."""
+    global _server
+    if not METRICS_ENABLED or _server is not None:
+        return
+    try:
+        _server = ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+    except OSError as e:
+        logger.error("Metrik sunucusu %s portunda başlatılamadı: %s", port, e)
+        return
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+    logger.info("Metrikler http://127.0.0.1:%s/metrics adresinde sunuluyor.", port)
+
+def stop_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+# Özet logu
+def _percentile_bound(counts: list[int], fraction: float) -> float:
+    """Kova sayılarından yüzdelik dilimin üst sınırını tahmin eder."""
+    target = fraction * sum(counts)
+    cumulative = 0
+    for bound, count in zip(_BUCKETS + (float('inf'),), counts):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float('inf')
+
+def _format_ms(seconds: float) -> str:
+    return f">{_BUCKETS[-1] * 1000:.0f}ms" if seconds == float('inf') else f"≤{seconds * 1000:g}ms"
+
+def _summarize_family(name: str, errors: dict[tuple, int], limit: int = 5) -> str:
+    """Son özetten bu yana çağrı sayısı en yüksek etiketleri 'ad çağrı/p95/hata' biçiminde döndürür."""
+    previous = _last_summary.setdefault(name, {})
+    with _lock:
+        current = {labels: list(h.counts) for labels, h in _histograms[name].items()}
+    deltas = []
+    for labels, counts in current.items():
+        before = previous.get(labels, [0] * len(counts))
+        delta = [now - old for now, old in zip(counts, before)]
+        if sum(delta):
+            deltas.append((sum(delta), labels, delta))
+        previous[labels] = counts
+    deltas.sort(reverse=True)
+    previous_errors = _last_errors.get(name, {})
+    _last_errors[name] = errors
+    parts = []
+    for count, labels, delta in deltas[:limit]:
+        error_count = errors.get(labels, 0) - previous_errors.get(labels, 0)
+        parts.append(f"{labels[0]} {count}x p95 {_format_ms(_percentile_bound(delta, 0.95))}" + (f" {error_count} hata" if error_count else ""))
+    return ", ".join(parts) or "-"
+
+async def summary_job(context: ContextTypes.DEFAULT_TYPE):
+    """Son aralıktaki en sık işleyici, sorgu ve Bot API çağrılarını tek satırda loglar."""
+    with _lock:
+        handler_errors = dict(_counters[HANDLER_ERRORS])
+        db_errors = dict(_counters[DB_ERRORS])
+        api_errors = {}
+        for (method, result), count in _counters[API_REQUESTS].items():
+            if result != 'ok':
+                api_errors[(method,)] = api_errors.get((method,), 0) + count
+    logger.info(
+        "Metrikler (son %s sn) | işleyiciler: %s | veritabanı: %s | Bot API: %s",
+        METRICS_SUMMARY_INTERVAL_S,
+        _summarize_family(HANDLER_SECONDS, handler_errors),
+        _summarize_family(DB_SECONDS, db_errors),
+        _summarize_family(API_SECONDS, api_errors)
+    )
@@ -1,9 +1,9 @@
-import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 from commands.utils import get_user_display_name_and_storage_name
-from commands import database # Eklendi: database modülünü içe aktar
+from commands import async_database # Olay döngüsünü bloklamayan veritabanı erişimi
+from commands import outbound
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +17,9 @@ async def handle_note_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     command_args = " ".join(context.args).strip()
 
     if not command_args:
-        await update.message.reply_text(f"ZeaLouS: {display_name}, Hata: Kaydedilecek bir not belirtmediniz. Örn: /not Toplantı saat 10:00")
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, Hata: Kaydedilecek bir not belirtmediniz. Örn: /not Toplantı saat 10:00")
         return
 
-    database.add_note(user_id, command_args) # Veritabanına not ekle
-    await update.message.reply_text(f"ZeaLouS: {display_name}, Notunuz kaydedildi: '{command_args}'")
-    logger.info(f"[{datetime.datetime.now()}] {user_id} için not kaydedildi: '{command_args}'")
+    await async_database.add_note(user_id, command_args) # Veritabanına not ekle
+    await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, Notunuz kaydedildi: '{command_args}'")
+    logger.info("%s için not kaydedildi: '%s'", user_id, command_args)
@@ -0,0 +1,413 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from telegram import Bot, Message, ReplyParameters
+from telegram.constants import ChatType
+from telegram.error import RetryAfter
+
+from config import (
+    OUTBOUND_GLOBAL_RATE_PER_S, OUTBOUND_GLOBAL_BURST, OUTBOUND_GROUP_RATE_PER_MIN, OUTBOUND_GROUP_BURST,
+    OUTBOUND_PRIVATE_RATE_PER_S, OUTBOUND_PRIVATE_BURST, OUTBOUND_MAX_CONCURRENCY,
+    OUTBOUND_MAX_RETRY_AFTER, OUTBOUND_QUEUE_WARN_DEPTH
+)
+from commands import metrics
+
+logger = logging.getLogger(__name__)
+
+# Giden Telegram istekleri için ortak kuyruk.
+# Tüm gönderme/yanıtlama/düzenleme/silme çağrıları buradan geçer. İstekler öncelik sırasıyla, Telegram'ın genel
+# (~30 mesaj/sn) ve sohbet başına (grupta ~20 mesaj/dk) sınırlarını aşmayacak şekilde token bucket'larla gönderilir.
+# RetryAfter (429) alındığında ilgili sohbet belirtilen süre kadar duraklatılır ve istek kuyruğa geri konur.
+
+# Öncelik sınıfları: küçük değer önce gönderilir
+PRIORITY_DELETE = 0 # Mesaj silme (yasaklı kelime, susturulmuş kullanıcı, geçici mesajlar)
+PRIORITY_MODERATION = 1 # Uyarı ve ceza bildirimleri
+PRIORITY_COMMAND = 2 # Komut yanıtları, istatistikler, hatırlatıcılar
+PRIORITY_LOW = 3 # Selamlama görselleri ve marşlar
+
+_PRIORITY_NAMES = {
+    PRIORITY_DELETE: 'delete',
+    PRIORITY_MODERATION: 'moderation',
+    PRIORITY_COMMAND: 'command',
+    PRIORITY_LOW: 'low'
+}
+
+class _TokenBucket:
+    """Saniyede `rate` token üreten, en fazla `capacity` token biriktiren basit token bucket."""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Bir token kullanılabilmesi için beklenmesi gereken süre (sn). 0 ise hemen kullanılabilir."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float):
+        self.paused_until = max(self.paused_until, until)
+
+    def is_idle(self, now: float) -> bool:
+        """Kova dolmuşsa ve duraklatılmamışsa True döner; böyle bir kova silinebilir."""
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+@dataclass(order=True, slots=True)
+class _Request:
+    priority: int
+    seq: int
+    lane: int | None = field(compare=False) # Sohbet ID'si; sohbet sınırına tabi olmayan istekler için None
+    method: Callable[..., Awaitable[Any]] = field(compare=False)
+    kwargs: dict = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    retry_after_count: int = field(default=0, compare=False)
+    enqueued_at: float = field(default=0.0, compare=False) # time.perf_counter() değeri
+
+_seq = itertools.count()
+_lanes: dict[int | None, list[_Request]] = {} # Sohbet -> o sohbetin bekleyen istekleri (heap)
+_ready: list[tuple[int, int, int | None]] = [] # Gönderime hazır sohbetler: (öncelik, sıra, sohbet), heap
+_ready_keys: dict[int | None, tuple[int, int]] = {} # Sohbetin _ready içindeki geçerli anahtarı
+_parked: list[tuple[float, int | None]] = [] # Token bekleyen sohbetler: (hazır olacağı an, sohbet), heap
+_parked_lanes: set[int | None] = set()
+_chat_buckets: dict[int, _TokenBucket] = {}
+_global_bucket: _TokenBucket | None = None
+_global_share = 1.0 # Çok süreçli çalışmada genel sınırın bu sürece düşen payı
+_wakeup: asyncio.Event | None = None
+_semaphore: asyncio.Semaphore | None = None
+_dispatcher_task: asyncio.Task | None = None
+_in_flight = 0 # Gönderilmekte olan istek sayısı
+_last_prune = 0.0
+
+# Kuyruk metrikleri
+_queue_depth = 0
+_metrics = {
+    'enqueued': 0,
+    'sent': 0,
+    'failed': 0,
+    'retry_after': 0,
+    'max_queue_depth': 0
+}
+_depth_by_priority = dict.fromkeys(_PRIORITY_NAMES, 0)
+_depth_warned = False
+
+def queue_depth() -> int:
+    """Kuyrukta bekleyen istek sayısını döndürür."""
+    return _queue_depth
+
+def is_idle() -> bool:
+    """Kuyrukta bekleyen ve gönderilmekte olan istek yoksa True döner."""
+    return not _queue_depth and not _in_flight
+
+def get_metrics() -> dict:
+    """Kuyruk metriklerinin bir kopyasını döndürür."""
+    metrics = dict(_metrics)
+    metrics['queue_depth'] = _queue_depth
+    metrics['queue_depth_by_priority'] = {_PRIORITY_NAMES[p]: depth for p, depth in _depth_by_priority.items()}
+    metrics['tracked_chats'] = len(_chat_buckets)
+    return metrics
+
+def set_global_rate_share(share: float):
+    """
+    Genel sınırın bu sürece düşen payını ayarlar. Birden çok süreç aynı bot token'ıyla istek gönderdiğinde
+    Telegram'ın genel sınırı aşılmasın diye her süreç sınırın bir payını kullanır. İlk istekten önce çağrılmalıdır.
+    """
+    global _global_share
+    _global_share = share
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """RetryAfter süresini saniyeye çevirir (kütüphane sürümüne göre sayı veya timedelta olabilir)."""
+    if isinstance(error.retry_after, datetime.timedelta):
+        return error.retry_after.total_seconds()
+    return float(error.retry_after)
+
+def _chat_bucket(chat_id: int, now: float) -> _TokenBucket:
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        if chat_id < 0: # Grup ve kanal ID'leri negatiftir
+            bucket = _TokenBucket(OUTBOUND_GROUP_RATE_PER_MIN / 60, OUTBOUND_GROUP_BURST, now)
+        else:
+            bucket = _TokenBucket(OUTBOUND_PRIVATE_RATE_PER_S, OUTBOUND_PRIVATE_BURST, now)
+        _chat_buckets[chat_id] = bucket
+    return bucket
+
+def _lane_bucket(lane: int | None, now: float) -> _TokenBucket:
+    return _global_bucket if lane is None else _chat_bucket(lane, now)
+
+def _activate(lane: int | None, now: float):
+    """Sohbetin ilk isteğini, token'ı varsa hazır listesine, yoksa bekleme listesine koyar."""
+    if lane in _parked_lanes:
+        return
+    head = _lanes[lane][0]
+    key = (head.priority, head.seq)
+    current = _ready_keys.get(lane)
+    if current is not None and current <= key:
+        return
+    wait = _lane_bucket(lane, now).wait_time(now)
+    if wait > 0:
+        _ready_keys.pop(lane, None) # Eski hazır kaydı geçersiz kalır
+        _parked_lanes.add(lane)
+        heapq.heappush(_parked, (now + wait, lane))
+        return
+    _ready_keys[lane] = key
+    heapq.heappush(_ready, (key[0], key[1], lane))
+
+def _enqueue(request: _Request):
+    global _queue_depth, _depth_warned
+    now = asyncio.get_running_loop().time()
+    heapq.heappush(_lanes.setdefault(request.lane, []), request)
+    _activate(request.lane, now)
+    _queue_depth += 1
+    _depth_by_priority[request.priority] += 1
+    _metrics['max_queue_depth'] = max(_metrics['max_queue_depth'], _queue_depth)
+    if _queue_depth >= OUTBOUND_QUEUE_WARN_DEPTH and not _depth_warned:
+        _depth_warned = True
+        logger.warning("Giden istek kuyruğu %s isteğe ulaştı. Öncelik dağılımı: %s", _queue_depth, get_metrics()['queue_depth_by_priority'])
+    elif _queue_depth < OUTBOUND_QUEUE_WARN_DEPTH // 2:
+        _depth_warned = False
+    _wakeup.set()
+
+def _ensure_started():
+    global _global_bucket, _wakeup, _semaphore, _dispatcher_task
+    if _dispatcher_task is not None and not _dispatcher_task.done():
+        return
+    loop = asyncio.get_running_loop()
+    if _global_bucket is None:
+        _global_bucket = _TokenBucket(OUTBOUND_GLOBAL_RATE_PER_S * _global_share, max(1.0, OUTBOUND_GLOBAL_BURST * _global_share), loop.time())
+    _wakeup = asyncio.Event()
+    _semaphore = asyncio.Semaphore(OUTBOUND_MAX_CONCURRENCY)
+    _dispatcher_task = loop.create_task(_dispatch_loop())
+
+async def _wait(timeout: float | None):
+    """Yeni bir istek gelene veya süre dolana kadar bekler."""
+    _wakeup.clear()
+    try:
+        await asyncio.wait_for(_wakeup.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+def _prune_buckets(now: float):
+    """Kuyruğu boş ve kovası dolmuş sohbetlerin kovalarını siler."""
+    global _last_prune
+    if now - _last_prune < 60:
+        return
+    _last_prune = now
+    for chat_id in [chat_id for chat_id, bucket in _chat_buckets.items() if chat_id not in _lanes and bucket.is_idle(now)]:
+        del _chat_buckets[chat_id]
+
+async def _dispatch_loop():
+    """Kuyruktaki istekleri öncelik ve hız sınırlarına göre gönderen ana döngü."""
+    global _queue_depth, _in_flight
+    loop = asyncio.get_running_loop()
+    while True:
+        now = loop.time()
+        while _parked and _parked[0][0] <= now:
+            _, lane = heapq.heappop(_parked)
+            _parked_lanes.discard(lane)
+            if lane in _lanes:
+                _activate(lane, now)
+        if not _ready:
+            _prune_buckets(now)
+            await _wait(_parked[0][0] - now if _parked else None)
+            continue
+
+        wait = _global_bucket.wait_time(now)
+        if wait > 0:
+            await asyncio.sleep(wait)
+            continue
+
+        priority, seq, lane = heapq.heappop(_ready)
+        if _ready_keys.get(lane) != (priority, seq):
+            continue # Daha öncelikli bir istek geldiği için geçersiz kalmış kayıt
+        del _ready_keys[lane]
+        bucket = _lane_bucket(lane, now)
+        wait = bucket.wait_time(now)
+        if wait > 0:
+            _parked_lanes.add(lane)
+            heapq.heappush(_parked, (now + wait, lane))
+            continue
+
+        request = heapq.heappop(_lanes[lane])
+        if lane is not None:
+            bucket.consume(now)
+        _global_bucket.consume(now)
+        if _lanes[lane]:
+            _activate(lane, now)
+        else:
+            del _lanes[lane]
+        _queue_depth -= 1
+        _depth_by_priority[request.priority] -= 1
+
+        await _semaphore.acquire()
+        _in_flight += 1
+        loop.create_task(_execute(request))
+
+async def _execute(request: _Request):
+    """Tek bir isteği gönderir; RetryAfter alınırsa sohbeti duraklatıp isteği kuyruğa geri koyar."""
+    global _in_flight
+    try:
+        if request.future.cancelled():
+            return
+        method_labels = (request.method.__name__,)
+        started = time.perf_counter()
+        metrics.observe(metrics.API_QUEUE_WAIT_SECONDS, (_PRIORITY_NAMES[request.priority],), started - request.enqueued_at)
+        try:
+            result = await request.method(**request.kwargs)
+        except RetryAfter as e:
+            metrics.observe(metrics.API_SECONDS, method_labels, time.perf_counter() - started)
+            metrics.inc(metrics.API_REQUESTS, method_labels + ('retry_after',))
+            _metrics['retry_after'] += 1
+            delay = retry_after_seconds(e)
+            if request.retry_after_count >= OUTBOUND_MAX_RETRY_AFTER:
+                _metrics['failed'] += 1
+                if not request.future.cancelled():
+                    request.future.set_exception(e)
+                return
+            now = asyncio.get_running_loop().time()
+            _lane_bucket(request.lane, now).pause(now + delay)
+            request.retry_after_count += 1
+            logger.warning("Telegram sınırına takıldı (%s, sohbet %s). %.0f sn sonra tekrar denenecek.", _PRIORITY_NAMES[request.priority], request.lane, delay)
+            _enqueue(request)
+            return
+        except Exception as e:
+            metrics.observe(metrics.API_SECONDS, method_labels, time.perf_counter() - started)
+            metrics.inc(metrics.API_REQUESTS, method_labels + ('error',))
+            _metrics['failed'] += 1
+            if not request.future.cancelled():
+                request.future.set_exception(e)
+            return
+        metrics.observe(metrics.API_SECONDS, method_labels, time.perf_counter() - started)
+        metrics.inc(metrics.API_REQUESTS, method_labels + ('ok',))
+        _metrics['sent'] += 1
+        if not request.future.cancelled():
+            request.future.set_result(result)
+    finally:
+        _in_flight -= 1
+        _semaphore.release()
+
+def _submit_nowait(method: Callable[..., Awaitable[Any]], priority: int, limited: bool = True, **kwargs) -> asyncio.Future:
+    """İsteği kuyruğa ekler ve sonucunu verecek future'ı hemen döndürür."""
+    _ensure_started()
+    request = _Request(
+        priority=priority,
+        seq=next(_seq),
+        lane=int(kwargs['chat_id']) if limited else None,
+        method=method,
+        kwargs=kwargs,
+        future=asyncio.get_running_loop().create_future(),
+        enqueued_at=time.perf_counter()
+    )
+    _metrics['enqueued'] += 1
+    _enqueue(request)
+    return request.future
+
+async def _submit(method: Callable[..., Awaitable[Any]], priority: int, limited: bool = True, **kwargs) -> Any:
+    """İsteği kuyruğa ekler ve gönderilene kadar bekler. Telegram hataları çağırana iletilir."""
+    return await _submit_nowait(method, priority, limited, **kwargs)
+
+def _fire(future: asyncio.Future, description: str, on_sent: Callable[[Any], None] | None = None) -> asyncio.Future:
+    """
+    Sonucu beklenmeyen bir isteği izler: gönderildiğinde `on_sent(sonuç)` çağrılır, hata loglanır.
+    Sohbetin hız sınırı dolduğunda isteğin gönderilmesi saniyeler sürebilir; işleyici bunu beklememelidir.
+    """
+    def done(future: asyncio.Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.warning("%s gönderilemedi: %s", description, error)
+            return
+        if on_sent is not None:
+            try:
+                on_sent(future.result())
+            except Exception:
+                logger.error("%s gönderildikten sonraki işlem başarısız oldu.", description, exc_info=True)
+    future.add_done_callback(done)
+    return future
+
+async def send_message(bot: Bot, chat_id: int | str, text: str, priority: int = PRIORITY_COMMAND, **kwargs) -> Message:
+    return await _submit(bot.send_message, priority, chat_id=chat_id, text=text, **kwargs)
+
+async def send_photo(bot: Bot, chat_id: int | str, photo, priority: int = PRIORITY_LOW, **kwargs) -> Message:
+    return await _submit(bot.send_photo, priority, chat_id=chat_id, photo=photo, **kwargs)
+
+async def send_audio(bot: Bot, chat_id: int | str, audio, priority: int = PRIORITY_LOW, **kwargs) -> Message:
+    return await _submit(bot.send_audio, priority, chat_id=chat_id, audio=audio, **kwargs)
+
+async def edit_message_text(bot: Bot, chat_id: int | str, message_id: int, text: str, priority: int = PRIORITY_COMMAND, **kwargs) -> Message | bool:
+    return await _submit(bot.edit_message_text, priority, chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+
+async def delete_message(bot: Bot, chat_id: int | str, message_id: int, priority: int = PRIORITY_DELETE) -> bool:
+    # Silme işlemleri sohbet başına mesaj sınırına sayılmaz, yalnızca genel sınıra tabidir
+    return await _submit(bot.delete_message, priority, limited=False, chat_id=chat_id, message_id=message_id)
+
+async def delete_messages(bot: Bot, chat_id: int | str, message_ids: list[int], priority: int = PRIORITY_DELETE) -> bool:
+    # Tek istekte en fazla 100 mesaj silinebilir (deleteMessages)
+    return await _submit(bot.delete_messages, priority, limited=False, chat_id=chat_id, message_ids=message_ids)
+
+async def reply_text(message: Message, text: str, priority: int = PRIORITY_COMMAND, **kwargs) -> Message:
+    """
+    Message.reply_text karşılığı: gruplarda mesajı alıntılayarak yanıtlar. Yanıtlanan mesaj bu arada silinmişse
+    (ör. komut mesajı) yanıt yine de gönderilir.
+    """
+    if message.chat.type != ChatType.PRIVATE:
+        kwargs.setdefault('reply_parameters', ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True))
+    return await send_message(message.get_bot(), message.chat_id, text, priority, **kwargs)
+
+async def delete(message: Message, priority: int = PRIORITY_DELETE) -> bool:
+    """Message.delete karşılığı."""
+    return await delete_message(message.get_bot(), message.chat_id, message.message_id, priority)
+
+# Sonucu beklenmeyen (fire-and-forget) istekler: moderasyon uyarıları ve bildirimleri gibi, işleyicinin devam etmek
+# için gönderilmesini beklemesi gerekmeyen mesajlar. Gönderilen mesajla yapılacak iş (ör. silinmesini zamanlamak)
+# `on_sent` ile verilir.
+def send_message_nowait(bot: Bot, chat_id: int | str, text: str, priority: int = PRIORITY_COMMAND, on_sent: Callable[[Message], None] | None = None, **kwargs) -> asyncio.Future:
+    future = _submit_nowait(bot.send_message, priority, chat_id=chat_id, text=text, **kwargs)
+    return _fire(future, f"Sohbet {chat_id} mesajı", on_sent)
+
+def reply_text_nowait(message: Message, text: str, priority: int = PRIORITY_COMMAND, on_sent: Callable[[Message], None] | None = None, **kwargs) -> asyncio.Future:
+    """reply_text'in sonucu beklenmeyen karşılığı."""
+    if message.chat.type != ChatType.PRIVATE:
+        kwargs.setdefault('reply_parameters', ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True))
+    return send_message_nowait(message.get_bot(), message.chat_id, text, priority, on_sent, **kwargs)
+
+def delete_nowait(message: Message, priority: int = PRIORITY_DELETE) -> asyncio.Future:
+    """delete'in sonucu beklenmeyen karşılığı."""
+    future = _submit_nowait(message.get_bot().delete_message, priority, limited=False, chat_id=message.chat_id, message_id=message.message_id)
+    return _fire(future, f"Sohbet {message.chat_id} mesaj silme")
+
+async def shutdown(timeout: float = 5.0):
+    """Kuyruktaki isteklerin gönderilmesini en fazla `timeout` saniye bekler ve dağıtıcıyı durdurur."""
+    global _dispatcher_task
+    if _dispatcher_task is None:
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while (_queue_depth or _in_flight) and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    if _queue_depth:
+        logger.warning("Kapanışta %s giden istek gönderilemedi.", _queue_depth)
+    _dispatcher_task.cancel()
+    _dispatcher_task = None
@@ -0,0 +1,87 @@
+import datetime
+import logging
+from dataclasses import dataclass, astuple
+
+from commands import database
+from commands import async_database
+from commands import sharding
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class PunishmentState:
+    """Bir kullanıcının bir sohbetteki ceza durumu. punishments tablosundaki bir satırın bellek içi karşılığı."""
+    chat_id: int
+    user_id: str
+    strike_count: int = 0
+    is_muted: bool = False
+    mute_until: datetime.datetime | None = None
+    next_mute_type: str = '5_min' # '5_min', '1_hr', '1_hr_served'
+    total_mutes_served: int = 0
+
+    def is_clean(self) -> bool:
+        """Kullanıcının hiç ceza durumu yoksa (varsayılan değerlerdeyse) True döner."""
+        return astuple(self)[2:] == astuple(PunishmentState(self.chat_id, self.user_id))[2:]
+
+    def as_dict(self) -> dict:
+        return {
+            'chat_id': self.chat_id,
+            'user_id': self.user_id,
+            'strike_count': self.strike_count,
+            'is_muted': self.is_muted,
+            'mute_until': self.mute_until,
+            'next_mute_type': self.next_mute_type,
+            'total_mutes_served': self.total_mutes_served
+        }
+
+# Süreç düzeyinde ceza durumu önbelleği: (chat_id, user_id) -> PunishmentState
+# Cezalar sohbete özeldir; bir grupta susturulan kullanıcı diğer gruplarda yazmaya devam eder.
+# Yalnızca ceza durumu olan kullanıcılar burada (ve veritabanında) tutulur. Önbellekte olmayan
+# kullanıcı temiz kabul edilir, bu yüzden temiz kullanıcılar için veritabanına hiç gidilmez.
+_cache: dict[tuple[int, str], PunishmentState] = {}
+
+def _state_from_row(row: dict) -> PunishmentState:
+    return PunishmentState(
+        chat_id=row['chat_id'],
+        user_id=row['user_id'],
+        strike_count=row.get('strike_count') or 0,
+        is_muted=bool(row.get('is_muted')),
+        mute_until=database.parse_timestamp(row.get('mute_until')),
+        next_mute_type=row.get('next_mute_type') or '5_min',
+        total_mutes_served=row.get('total_mutes_served') or 0
+    )
+
+def load_cache():
+    """Veritabanındaki ceza kayıtlarını (çok süreçli çalışmada bu işçinin sohbetlerine ait olanları) önbelleğe yükler."""
+    _cache.clear()
+    for row in database.get_all_punishments():
+        state = _state_from_row(row)
+        if not state.is_clean() and sharding.owns_chat(state.chat_id):
+            _cache[(state.chat_id, state.user_id)] = state
+    logger.info("%s ceza durumu önbelleğe yüklendi.", len(_cache))
+
+def get_state(chat_id: int, user_id: str) -> PunishmentState:
+    """
+    Kullanıcının sohbetteki ceza durumunu bellekten döndürür. Kaydı olmayan kullanıcı için yeni (temiz) bir
+    durum oluşturur.
+    """
+    state = _cache.get((chat_id, user_id))
+    if state is None:
+        state = PunishmentState(chat_id, user_id) # Önbelleğe eklenmez; yalnızca gerçek bir değişiklik kaydedilir
+    return state
+
+async def save_state(state: PunishmentState):
+    """Ceza durumundaki değişikliği önbelleğe ve veritabanına yazar (write-through)."""
+    key = (state.chat_id, state.user_id)
+    if state.is_clean():
+        # Varsayılan duruma dönen kullanıcının satırına gerek yok
+        if _cache.pop(key, None) is not None:
+            await async_database.clear_user_punishments(state.chat_id, state.user_id)
+        return
+    _cache[key] = state
+    await async_database.save_punishment_data(state.chat_id, state.user_id, state.as_dict())
+
+async def clear_state(chat_id: int, user_id: str):
+    """Kullanıcının sohbetteki tüm cezalarını önbellekten ve veritabanından siler."""
+    _cache.pop((chat_id, user_id), None)
+    await async_database.clear_user_punishments(chat_id, user_id)
@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+import logging
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+from telegram.ext import ContextTypes, JobQueue
+
+from config import (
+    REMINDER_SCHEDULE_HORIZON_S, REMINDER_DELIVERY_CONCURRENCY, REMINDER_MAX_ATTEMPTS, REMINDER_RETRY_BASE_DELAY_S
+)
+from commands import async_database
+from commands import outbound
+from commands import sharding
+
+logger = logging.getLogger(__name__)
+
+# Her hatırlatıcı, zamanı geldiğinde çalışacak ayrı bir JobQueue işi olarak zamanlanır.
+# Tüm tabloyu her dakika taramak yerine yalnızca REMINDER_SCHEDULE_HORIZON_S içinde zamanı gelecek
+# hatırlatıcılar indeksli "remind_at <= ?" sorgusuyla yüklenir; daha ileri tarihli olanlar sonraki yüklemede alınır.
+_scheduled_ids: set[int] = set()
+# Zamanı gelen hatırlatıcılardan en fazla REMINDER_DELIVERY_CONCURRENCY tanesi aynı anda giden istek kuyruğuna girer;
+# yeniden başlatma sonrası biriken hatırlatıcılar moderasyon ve komut yanıtlarıyla kuyrukta yarışmaz
+_delivery_slots = asyncio.Semaphore(REMINDER_DELIVERY_CONCURRENCY)
+
+def schedule_reminder(job_queue: JobQueue, reminder: dict) -> bool:
+    """Hatırlatıcıyı zamanı geldiğinde gönderilmek üzere zamanlar. Zaten zamanlanmışsa False döner."""
+    reminder_id = reminder['id']
+    if reminder_id in _scheduled_ids:
+        return False
+    _scheduled_ids.add(reminder_id)
+    # remind_at yerel saatle (saat dilimi bilgisi olmadan) saklanıyor; JobQueue için yerel saat dilimini ekle
+    when = reminder['remind_at'].astimezone()
+    if when <= datetime.datetime.now().astimezone():
+        when = 0 # Zamanı geçmiş hatırlatıcıyı hemen gönder
+    job_queue.run_once(_send_reminder_job, when, data=reminder, name=f"reminder_{reminder_id}")
+    return True
+
+def schedule_if_due_soon(job_queue: JobQueue, reminder: dict) -> bool:
+    """Yeni eklenen hatırlatıcının zamanı yükleme aralığı içindeyse hemen zamanlar."""
+    if sharding.is_worker():
+        # Hatırlatıcılar yalnızca giriş sürecinde zamanlanır; orada tekrar bu fonksiyon çağrılır
+        sharding.send_to_coordinator('reminder', reminder)
+        return False
+    horizon = datetime.datetime.now() + datetime.timedelta(seconds=REMINDER_SCHEDULE_HORIZON_S)
+    if reminder['remind_at'] <= horizon:
+        return schedule_reminder(job_queue, reminder)
+    return False
+
+async def load_upcoming_reminders_job(context: ContextTypes.DEFAULT_TYPE):
+    """Zamanı yükleme aralığı içinde gelecek (veya geçmiş) hatırlatıcıları veritabanından alıp zamanlar."""
+    horizon = datetime.datetime.now() + datetime.timedelta(seconds=REMINDER_SCHEDULE_HORIZON_S)
+    due_reminders = await async_database.get_due_reminders(horizon)
+    scheduled = sum(1 for reminder in due_reminders if schedule_reminder(context.job_queue, reminder))
+    if scheduled:
+        logger.info("%s hatırlatıcı zamanlandı.", scheduled)
+
+async def _send_reminder_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Zamanı gelen tek bir hatırlatıcıyı kullanıcıya özel mesajla gönderir.
+    Geçici ve beklenmeyen hatalarda (ağ hatası, zaman aşımı, RetryAfter vb.) hatırlatıcı yeniden zamanlanır;
+    yalnızca kalıcı hatalarda (Forbidden/BadRequest, ör. kullanıcı botu engellemiş) ve deneme hakkı bittiğinde silinir.
+    """
+    reminder = context.job.data
+    reminder_id = reminder['id']
+    user_id = reminder['user_id']
+    reminder_text = reminder['reminder_text']
+    attempt = reminder.get('attempt', 0) + 1
+    display_name = f"Kullanıcı {user_id}"
+    try:
+        # Ad yalnızca loglar için kullanılır; okunamazsa hatırlatıcı yine gönderilir
+        display_name = await async_database.get_user_display_name(user_id) or display_name
+    except Exception as e:
+        logger.warning("Hatırlatma için kullanıcı adı okunamadı: %s. Hatırlatma ID: %s", e, reminder_id)
+    try:
+        # Hız sınırı ve RetryAfter beklemeleri giden istek kuyruğunda uygulanır
+        async with _delivery_slots:
+            await outbound.send_message(context.bot, user_id, f"ZeaLouS: Hatırlatma: '{reminder_text}'")
+        logger.info("Kullanıcı %s (%s)'ye hatırlatma gönderildi: '%s'", display_name, user_id, reminder_text)
+    except RetryAfter as e:
+        # Kuyruk isteği defalarca tekrar denediyse hatırlatıcıyı daha sonra yeniden zamanla
+        delay = outbound.retry_after_seconds(e)
+        logger.warning("Hatırlatma gönderimi Telegram tarafından sınırlandı, %.0f sn sonra tekrar denenecek. Hatırlatma ID: %s", delay, reminder_id)
+        context.job_queue.run_once(_send_reminder_job, delay, data=reminder, name=f"reminder_{reminder_id}")
+        return # Sınırlama deneme sayısına eklenmez
+    except (Forbidden, BadRequest) as e:
+        # Kalıcı hata: kullanıcı botu engellemiş, sohbet yok vb. Tekrar denemenin anlamı yok.
+        logger.error("Kullanıcı %s (%s)'ye hatırlatma gönderilemedi: %s. Hatırlatma siliniyor. Hatırlatma ID: %s", display_name, user_id, e, reminder_id)
+    except Exception as e: # NetworkError, TimedOut ve beklenmeyen hatalar geçici sayılır
+        unexpected = not isinstance(e, TelegramError)
+        if attempt < REMINDER_MAX_ATTEMPTS:
+            delay = REMINDER_RETRY_BASE_DELAY_S * 2 ** (attempt - 1)
+            logger.warning("Kullanıcı %s (%s)'ye hatırlatma gönderilirken geçici hata oluştu: %s. %s sn sonra tekrar denenecek (%s/%s). Hatırlatma ID: %s", display_name, user_id, e, delay, attempt, REMINDER_MAX_ATTEMPTS, reminder_id, exc_info=unexpected)
+            context.job_queue.run_once(_send_reminder_job, delay, data={**reminder, 'attempt': attempt}, name=f"reminder_{reminder_id}")
+            return
+        logger.error("Kullanıcı %s (%s)'ye hatırlatma %s denemede gönderilemedi: %s. Hatırlatma siliniyor. Hatırlatma ID: %s", display_name, user_id, attempt, e, reminder_id, exc_info=unexpected)
+    _finished_ids.append(reminder_id) # Silme işlemi toplu olarak yapılır
+
+# Gönderilen (veya kalıcı hata nedeniyle bırakılan) hatırlatıcılar tek tek değil, toplu olarak silinir
+_finished_ids: list[int] = []
+
+async def flush_finished():
+    """Biten hatırlatıcıları veritabanından tek bir işlemde siler."""
+    global _finished_ids
+    if not _finished_ids:
+        return
+    reminder_ids = _finished_ids
+    _finished_ids = []
+    try:
+        await async_database.remove_reminders(reminder_ids)
+    except Exception as e:
+        logger.error("Gönderilen hatırlatıcılar silinirken hata oluştu: %s. Tekrar denenecek.", e)
+        _finished_ids = reminder_ids + _finished_ids
+        raise
+    # Silinene kadar ID'ler zamanlanmış sayılır; böylece yükleme işi onları tekrar zamanlamaz
+    _scheduled_ids.difference_update(reminder_ids)
+
+async def flush_finished_job(context: ContextTypes.DEFAULT_TYPE):
+    """Biten hatırlatıcıları belirli aralıklarla silen zamanlanmış iş."""
+    try:
+        await flush_finished()
+    except Exception:
+        pass # Hata flush_finished() içinde loglandı
@@ -4,7 +4,9 @@ from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 from commands.utils import get_user_display_name_and_storage_name
-from commands import database # Eklendi: database modülünü içe aktar
+from commands import async_database # Olay döngüsünü bloklamayan veritabanı erişimi
+from commands import reminder_scheduler
+from commands import outbound
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +52,12 @@ async def handle_reminder_command(update: Update, context: ContextTypes.DEFAULT_
         if not reminder_text:
             reminder_text = "Hatırlatma"
             
-        database.add_reminder(user_id, reminder_text, remind_at) # Veritabanına hatırlatma ekle
-        await update.message.reply_text(f"ZeaLouS: {display_name} için hatırlatma kaydedildi: '{reminder_text}' {remind_at.strftime('%Y-%m-%d %H:%M')}")
-        logger.info(f"[{datetime.datetime.now()}] {user_id} için hatırlatma kaydedildi: '{reminder_text}' {remind_at.strftime('%Y-%m-%d %H:%M')}")
+        reminder_id = await async_database.add_reminder(user_id, reminder_text, remind_at) # Veritabanına hatırlatma ekle
+        reminder_scheduler.schedule_if_due_soon(
+            context.job_queue,
+            {'id': reminder_id, 'user_id': user_id, 'reminder_text': reminder_text, 'remind_at': remind_at}
+        )
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name} için hatırlatma kaydedildi: '{reminder_text}' {remind_at.strftime('%Y-%m-%d %H:%M')}")
+        logger.info("%s için hatırlatma kaydedildi: '%s' %s", user_id, reminder_text, remind_at.strftime('%Y-%m-%d %H:%M'))
     else:
-        await update.message.reply_text(f"ZeaLouS: {display_name}, Hata: Hatırlatma formatı yanlış. Örn: /hatirlat Buluşma saat 18:00 2024-12-31 18:00 veya /hatirlat Buluşma saat 18:00")
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, Hata: Hatırlatma formatı yanlış. Örn: /hatirlat Buluşma saat 18:00 2024-12-31 18:00 veya /hatirlat Buluşma saat 18:00")
@@ -0,0 +1,75 @@
+import asyncio
+import datetime
+import logging
+
+from telegram.ext import ContextTypes
+
+from config import (
+    MESSAGE_RETENTION_DAYS, HOURLY_ROLLUP_RETENTION_DAYS, RETENTION_BATCH_ROWS, RETENTION_VACUUM_PAGES
+)
+from commands import async_database
+from commands.database import hour_bucket
+
+logger = logging.getLogger(__name__)
+
+# messages tablosu her mesaj için bir satır büyür. Mesajlar yazılırken günlük ve toplam özetler de güncellendiği
+# için MESSAGE_RETENTION_DAYS'den eski ham kayıtlar silinebilir: genel istatistikler özetlerden gelir ve korunur.
+# Silme küçük partiler halinde yapılır; partiler arasında yazma bağlantısı serbest kalır, böylece mesaj yazma
+# tamponu beklemez. Silinen sayfalar incremental VACUUM ile dosyadan geri verilir (auto_vacuum=INCREMENTAL olan
+# dosyalarda; eski dosyalar bot durdurulmuşken tools/convert_auto_vacuum.py ile dönüştürülür).
+_retention_lock = asyncio.Lock()
+_incremental_vacuum: bool | None = None # Dosyanın auto_vacuum modu (ilk çalıştırmada okunur)
+
+def raw_message_cutoff(now: datetime.datetime | None = None) -> datetime.datetime:
+    """Ham kayıtların silineceği sınırı döndürür; gece yarısına hizalanır ki günler parça parça silinmesin."""
+    today = (now or datetime.datetime.now()).date()
+    return datetime.datetime.combine(today - datetime.timedelta(days=MESSAGE_RETENTION_DAYS), datetime.time.min)
+
+async def run_retention():
+    """Eski ham mesajları ve saatlik özetleri siler, ardından boş sayfaları dosyadan geri verir."""
+    global _incremental_vacuum
+    async with _retention_lock:
+        started = datetime.datetime.now()
+        cutoff = raw_message_cutoff(started)
+
+        deleted = 0
+        while True:
+            batch_deleted = await async_database.prune_raw_messages(cutoff, RETENTION_BATCH_ROWS)
+            deleted += batch_deleted
+            if batch_deleted < RETENTION_BATCH_ROWS:
+                break
+            await asyncio.sleep(0) # Diğer yazma işlemlerine sıra ver
+
+        hourly_cutoff = hour_bucket(started - datetime.timedelta(days=HOURLY_ROLLUP_RETENTION_DAYS))
+        deleted_hourly = await async_database.prune_hourly_rollups(hourly_cutoff)
+
+        if _incremental_vacuum is None:
+            _incremental_vacuum = await async_database.uses_incremental_vacuum()
+            if not _incremental_vacuum:
+                # Dönüştürme tam VACUUM gerektirir; bot çalışırken yapılmaz
+                logger.warning(
+                    "Veritabanı auto_vacuum=INCREMENTAL modunda değil; silinen kayıtların yeri dosyadan geri verilmeyecek. "
+                    "Bot durdurulmuşken tools/convert_auto_vacuum.py ile dönüştürün."
+                )
+
+        if _incremental_vacuum:
+            free_pages = await async_database.incremental_vacuum(RETENTION_VACUUM_PAGES)
+            while free_pages > 0:
+                await asyncio.sleep(0)
+                remaining = await async_database.incremental_vacuum(RETENTION_VACUUM_PAGES)
+                if remaining >= free_pages:
+                    break
+                free_pages = remaining
+
+        elapsed = (datetime.datetime.now() - started).total_seconds()
+        if deleted or deleted_hourly:
+            logger.info("Saklama işi: %s öncesine ait %s ham mesaj ve %s saatlik özet silindi (%.1f sn).", cutoff, deleted, deleted_hourly, elapsed)
+
+async def retention_job(context: ContextTypes.DEFAULT_TYPE):
+    """Saklama politikasını belirli aralıklarla uygulayan zamanlanmış iş."""
+    if _retention_lock.locked():
+        return
+    try:
+        await run_retention()
+    except Exception as e:
+        logger.error("Saklama işi sırasında hata oluştu: %s", e, exc_info=True)
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+import zlib
+from typing import Callable
+
+from telegram import Update
+from telegram.ext import Application, BaseUpdateProcessor, ContextTypes
+
+from config import WORKER_SHUTDOWN_TIMEOUT_S
+
+logger = logging.getLogger(__name__)
+
+# Çok süreçli çalışma: tek bir giriş süreci (polling veya webhook) güncellemeleri alır ve chat_id özetine göre
+# işçi süreçlerden birinin kuyruğuna koyar. Bir sohbetin bütün güncellemeleri hep aynı işçiye gider; giriş süreci
+# güncellemeleri sırayla iletir ve işçiler aynı sohbetin güncellemelerini sırayla işlediği için (ChatOrderedUpdateProcessor)
+# aynı sohbetteki sıra korunur.
+# Sohbete özel bellek içi durum (cezalar, istatistik önbelleği, bekleyen silmeler, sohbet kelime listeleri)
+# yalnızca o sohbetin işçisinde tutulur; ortak durum SQLite'tadır. Hatırlatıcılar ve saklama işi gibi tekil işler
+# yalnızca giriş sürecinde çalışır.
+ROLE_SINGLE = 'single' # Tek süreç: güncellemeleri hem alır hem işler
+ROLE_INGRESS = 'ingress' # Güncellemeleri alıp işçilere dağıtır, tekil işleri çalıştırır
+ROLE_WORKER = 'worker' # Kendisine düşen sohbetlerin güncellemelerini işler
+
+_worker_index: int | None = None
+_worker_count = 0
+_update_queues: list = [] # Giriş süreci: işçi başına güncelleme kuyruğu
+_processes: list = []
+_control_queue = None # İşçilerden giriş sürecine giden kontrol mesajları: (tür, veri)
+_control_handlers: dict[str, Callable[[Application, object], None]] = {}
+_control_task: asyncio.Task | None = None
+
+def chat_key(update: object) -> int:
+    """Güncellemenin ait olduğu sohbet; sohbeti olmayan güncellemeler için kullanıcı."""
+    chat = getattr(update, 'effective_chat', None)
+    user = getattr(update, 'effective_user', None)
+    return chat.id if chat else (user.id if user else 0)
+
+def shard_for(chat_id: int, worker_count: int) -> int:
+    """Sohbetin hangi işçiye düştüğünü döndürür. Süreçten sürece değişmeyen bir özet (CRC32) kullanılır."""
+    return zlib.crc32(str(chat_id).encode()) % worker_count
+
+def is_worker() -> bool:
+    return _worker_index is not None
+
+def worker_index() -> int | None:
+    """İşçi sürecinin sırası; giriş sürecinde ve tek süreçli çalışmada None."""
+    return _worker_index
+
+def owns_chat(chat_id: int) -> bool:
+    """Sohbetin durumu bu süreçte tutuluyorsa True döner. Tek süreçli çalışmada her zaman True."""
+    return not is_worker() or shard_for(chat_id, _worker_count) == _worker_index
+
+def configure_worker(index: int, count: int, control_queue):
+    """Bu süreci `count` işçiden `index` numaralı olan olarak ayarlar. Uygulama oluşturulmadan önce çağrılır."""
+    global _worker_index, _worker_count, _control_queue
+    _worker_index = index
+    _worker_count = count
+    _control_queue = control_queue
+
+def send_to_coordinator(kind: str, payload):
+    """Giriş sürecine bir kontrol mesajı gönderir (ör. hemen zamanlanması gereken hatırlatıcı)."""
+    _control_queue.put((kind, payload))
+
+def on_control(kind: str, handler: Callable[[Application, object], None]):
+    """Giriş sürecinde `kind` türündeki kontrol mesajlarını işleyecek fonksiyonu kaydeder."""
+    _control_handlers[kind] = handler
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Farklı sohbetlerin güncellemelerini eşzamanlı, aynı sohbetinkileri geldiği sırayla işler. Böylece hız sınırı
+    dolmuş bir sohbette yanıtını bekleyen bir işleyici diğer sohbetleri bekletmez; sohbete özel durum (cezalar,
+    istatistik mesajları) ise yine tek tek güncellenir.
+    Kilidini bekleyen güncellemeler de eşzamanlılık sınırından pay alır; sınır bu yüzden geniş tutulmalıdır.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks: dict[int, tuple[asyncio.Lock, int]] = {} # Sohbet -> (kilit, kullanan güncelleme sayısı)
+
+    async def do_process_update(self, update: object, coroutine):
+        key = chat_key(update)
+        lock, users = self._chat_locks.get(key) or (asyncio.Lock(), 0)
+        self._chat_locks[key] = (lock, users + 1)
+        try:
+            async with lock: # asyncio.Lock bekleyenleri geliş sırasıyla uyandırır
+                await coroutine
+        finally:
+            lock, users = self._chat_locks[key]
+            if users == 1:
+                del self._chat_locks[key]
+            else:
+                self._chat_locks[key] = (lock, users - 1)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+# Giriş süreci
+def start_workers(count: int, target: Callable):
+    """
+    `count` işçi süreci başlatır. `target(index, count, update_queue, control_queue)` her işçide çalışır.
+    Süreçler 'spawn' ile başlatılır; açık veritabanı bağlantıları ve thread'ler çocuk süreçlere kopyalanmaz.
+    """
+    global _control_queue
+    context = multiprocessing.get_context('spawn')
+    _control_queue = context.Queue()
+    for index in range(count):
+        update_queue = context.Queue()
+        process = context.Process(target=target, args=(index, count, update_queue, _control_queue), name=f"worker-{index}")
+        process.start()
+        _update_queues.append(update_queue)
+        _processes.append(process)
+    logger.info("%s işçi süreci başlatıldı.", count)
+
+async def forward_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Güncellemeyi sohbetinin işçisine iletir (giriş sürecindeki tek işleyici)."""
+    _update_queues[shard_for(chat_key(update), len(_update_queues))].put(update.to_dict())
+
+async def _control_loop(application: Application):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            kind, payload = await loop.run_in_executor(None, _control_queue.get, True, 1.0)
+        except queue.Empty:
+            continue
+        handler = _control_handlers.get(kind)
+        if handler is None:
+            logger.warning("Bilinmeyen kontrol mesajı: %s", kind)
+            continue
+        try:
+            handler(application, payload)
+        except Exception as e:
+            logger.error("Kontrol mesajı (%s) işlenirken hata oluştu: %s", kind, e, exc_info=True)
+
+async def start_control_loop(application: Application):
+    """İşçilerden gelen kontrol mesajlarını dinlemeye başlar (giriş sürecinin post_init'inde çağrılır)."""
+    global _control_task
+    if _processes and _control_task is None:
+        _control_task = asyncio.get_running_loop().create_task(_control_loop(application))
+
+async def stop_workers(timeout: float = WORKER_SHUTDOWN_TIMEOUT_S):
+    """İşçilere durma sinyali gönderir; kuyruklarını bitirip kapanmalarını en fazla `timeout` saniye bekler."""
+    global _control_task
+    if not _processes:
+        return
+    for update_queue in _update_queues:
+        update_queue.put(None)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    for process in _processes:
+        await loop.run_in_executor(None, process.join, max(0.0, deadline - loop.time()))
+        if process.is_alive():
+            logger.warning("%s zamanında kapanmadı, sonlandırılıyor.", process.name)
+            process.terminate()
+    if _control_task is not None:
+        _control_task.cancel()
+        _control_task = None
+    for update_queue in _update_queues:
+        update_queue.cancel_join_thread() # Kapanmış bir işçiye ait okunmamış veri çıkışı bekletmesin
+    _processes.clear()
+    _update_queues.clear()
+    logger.info("İşçi süreçleri durduruldu.")
+
+# İşçi süreci
+def run_worker(application: Application, update_queue):
+    """İşçi sürecinin ana döngüsü: giriş sürecinden gelen güncellemeleri sırayla uygulamaya verir."""
+    # Ctrl+C ve SIGTERM giriş sürecine bırakılır; işçi, kuyruğundaki güncellemeleri bitirip durma sinyaliyle kapanır
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_run_worker(application, update_queue))
+
+async def _run_worker(application: Application, update_queue):
+    loop = asyncio.get_running_loop()
+    parent = multiprocessing.parent_process()
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    logger.info("İşçi %s/%s güncellemeleri bekliyor.", _worker_index, _worker_count)
+    try:
+        while True:
+            try:
+                data = await loop.run_in_executor(None, update_queue.get, True, 1.0)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    logger.warning("Giriş süreci sonlanmış, işçi %s kapanıyor.", _worker_index)
+                    break
+                continue
+            if data is None:
+                break
+            await application.update_queue.put(Update.de_json(data, application.bot))
+    finally:
+        await application.stop() # Kuyrukta kalan güncellemeler durmadan önce işlenir
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
@@ -1,74 +1,158 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, JobQueue
+import asyncio
 import datetime
 import logging
 import json
+import time
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
 
-from commands import database
-from commands.utils import get_user_display_name_and_storage_name, delete_message_job
+from config import STATS_CACHE_TTL_S, STATS_CACHE_INVALIDATE_MESSAGES
+from commands import async_database
+from commands import ingest
+from commands import punishments
+from commands import statistics
+from commands import outbound
+from commands.utils import get_user_display_name_and_storage_name
+from commands import deletions
 
 logger = logging.getLogger(__name__)
 
-async def generate_statistics_text(stat_type: str = "general", user_id: str = None) -> str:
+# Oluşturulan istatistik metinlerinin önbelleği: (stat_type, chat_id, user_id) -> _CacheEntry
+# İstatistikler sohbete özeldir. Kayıt STATS_CACHE_TTL_S dolunca, sohbette STATS_CACHE_INVALIDATE_MESSAGES kadar
+# yeni mesaj yazılınca veya
+# (kullanıcı istatistiklerinde) kullanıcının ceza durumu değişince geçersiz sayılır.
+@dataclass(slots=True)
+class _CacheEntry:
+    text: str
+    expires_at: float # time.monotonic()
+    flushed_messages: int # Oluşturulduğu andaki ingest.flushed_message_count(chat_id)
+    punishment: tuple | None # my_stats için kullanıcının o anki ceza durumu
+
+_cache: dict[tuple[str, int, str | None], _CacheEntry] = {}
+_inflight: dict[tuple[str, int, str | None], asyncio.Task] = {} # Aynı anahtar için süren hesaplama (single-flight)
+_MAX_CACHE_ENTRIES = 256
+
+# Gönderilen/düzenlenen istatistik mesajlarının son hali: (chat_id, message_id) -> (stat_type, user_id, text)
+# Aynı metin için mesajı tekrar düzenlememek ve "Yenile" butonunda mesaj tipini bilmek için kullanılır.
+_rendered: OrderedDict[tuple[int, int], tuple[str, str | None, str]] = OrderedDict()
+_MAX_RENDERED_MESSAGES = 1024
+
+def _punishment_snapshot(chat_id: int, user_id: str | None) -> tuple | None:
+    return astuple(punishments.get_state(chat_id, user_id)) if user_id else None
+
+def _is_fresh(key: tuple[str, int, str | None], entry: _CacheEntry) -> bool:
+    stat_type, chat_id, user_id = key
+    if time.monotonic() >= entry.expires_at:
+        return False
+    if ingest.flushed_message_count(chat_id) - entry.flushed_messages >= STATS_CACHE_INVALIDATE_MESSAGES:
+        return False
+    if stat_type == "my_stats" and entry.punishment != _punishment_snapshot(chat_id, user_id):
+        return False
+    return True
+
+def invalidate():
+    """İstatistik önbelleğini temizler (ör. özet tabloları yeniden oluşturulduğunda)."""
+    _cache.clear()
+
+def _remember_rendered(chat_id: int, message_id: int, stat_type: str, user_id: str | None, text: str):
+    _rendered[(chat_id, message_id)] = (stat_type, user_id, text)
+    _rendered.move_to_end((chat_id, message_id))
+    while len(_rendered) > _MAX_RENDERED_MESSAGES:
+        _rendered.popitem(last=False)
+
+async def generate_statistics_text(chat_id: int, stat_type: str = "general", user_id: str = None) -> str:
     """
-    Belirtilen istatistik tipine göre metin oluşturur.
+    Sohbet için belirtilen istatistik tipine göre metin döndürür. Geçerli bir önbellek kaydı varsa o kullanılır;
+    aynı anda gelen istekler tek bir hesaplamayı bekler.
     """
+    key = (stat_type, chat_id, user_id if stat_type in ("my_stats", "leaderboard") else None) # Diğer tipler kullanıcıya göre değişmez
+    entry = _cache.get(key)
+    if entry is not None and _is_fresh(key, entry):
+        return entry.text
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(_compute_statistics_text(key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task) # Bekleyenlerden biri iptal edilirse diğerleri etkilenmesin
+
+async def _compute_statistics_text(key: tuple[str, int, str | None]) -> str:
+    stat_type, chat_id, user_id = key
+    punishment = _punishment_snapshot(chat_id, user_id) if stat_type == "my_stats" else None
+    try:
+        stats_text = await _build_statistics_text(stat_type, chat_id, user_id)
+    except Exception as e:
+        logger.error("İstatistik metni oluşturulurken hata oluştu (Tip: %s, Sohbet: %s, Kullanıcı: %s): %s", stat_type, chat_id, user_id, e, exc_info=True)
+        return "**📊 ZeaLouS Bot İstatistikleri**\n\nÜzgünüm, istatistikler şu anda yüklenemiyor. Lütfen daha sonra tekrar deneyin." # Önbelleğe alınmaz
+
+    if len(_cache) >= _MAX_CACHE_ENTRIES:
+        for stale_key in [k for k, v in _cache.items() if not _is_fresh(k, v)]:
+            del _cache[stale_key]
+        if len(_cache) >= _MAX_CACHE_ENTRIES:
+            _cache.clear()
+    _cache[key] = _CacheEntry(stats_text, time.monotonic() + STATS_CACHE_TTL_S, ingest.flushed_message_count(chat_id), punishment)
+    return stats_text
+
+async def _build_statistics_text(stat_type: str, chat_id: int, user_id: str | None) -> str:
+    """Sohbet için belirtilen istatistik tipine göre metni veritabanından oluşturur."""
     now = datetime.datetime.now()
     stats_text = f"**📊 ZeaLouS Bot İstatistikleri ({now.strftime('%d.%m.%Y %H:%M:%S')})**\n\n" # Tarih formatı güncellendi
 
-    try:
-        if stat_type == "general":
-            total_messages = database.get_total_messages_count()
-            total_users = database.get_total_unique_users_count()
-            active_users_24h = database.get_active_users_last_24_hours()
-
-            stats_text += (
-                f"**📚 Genel Durum:**\n"
-                f"Toplam Mesaj Sayısı: `{total_messages}`\n" # Inline kod olarak biçimlendirildi
-                f"Toplam Benzersiz Kullanıcı: `{total_users}`\n" # Inline kod olarak biçimlendirildi
-                f"Son 24 Saatte Aktif Kullanıcı: `{active_users_24h}`\n" # Inline kod olarak biçimlendirildi
-            )
-        elif stat_type == "top_senders":
-            top_senders = database.get_top_message_senders(limit=10) # İlk 10 mesajcı
-            stats_text += "**🏆 En Çok Mesaj Gönderenler:**\n"
-            if top_senders:
-                for i, (display_name, count) in enumerate(top_senders):
-                    stats_text += f"`{i+1}.` {display_name}: `{count}` mesaj\n" # Inline kod olarak biçimlendirildi
-            else:
-                stats_text += "Henüz mesaj gönderen yok.\n"
-        elif stat_type == "my_stats" and user_id:
-            user_stats = database.get_user_stats(user_id)
-            stats_text += (
-                f"**👤 {user_stats['display_name']} Kullanıcı İstatistikleri:**\n"
-                f"Gönderilen Mesaj: `{user_stats['message_count']}`\n" # Inline kod olarak biçimlendirildi
-                f"Mevcut İhlal Sayısı: `{user_stats['strike_count']}`\n" # Inline kod olarak biçimlendirildi
-                f"Susturulmuş mu?: `{'Evet' if user_stats['is_muted'] else 'Hayır'}`\n" # Inline kod olarak biçimlendirildi
-            )
-            if user_stats['is_muted'] and user_stats['mute_until']:
-                mute_until_str = user_stats['mute_until']
-                mute_until_dt = None
-                
-                if isinstance(mute_until_str, datetime.datetime): # Zaten datetime objesi ise
-                    mute_until_dt = mute_until_str
-                elif isinstance(mute_until_str, str): # String ise ayrıştırmayı dene
+    await ingest.flush() # Tutarlı sonuç için bekleyen mesaj kayıtlarını önce yaz
+
+    if stat_type == "general":
+        total_messages = await async_database.get_total_messages_count(chat_id)
+        total_users = await async_database.get_total_unique_users_count(chat_id)
+        active_users_24h = await async_database.get_active_users_last_24_hours(chat_id)
+
+        stats_text += (
+            f"**📚 Genel Durum:**\n"
+            f"Toplam Mesaj Sayısı: `{total_messages}`\n" # Inline kod olarak biçimlendirildi
+            f"Toplam Benzersiz Kullanıcı: `{total_users}`\n" # Inline kod olarak biçimlendirildi
+            f"Son 24 Saatte Aktif Kullanıcı: `{active_users_24h}`\n" # Inline kod olarak biçimlendirildi
+        )
+    elif stat_type == "top_senders":
+        top_senders = await async_database.get_top_message_senders(chat_id, limit=10) # İlk 10 mesajcı
+        stats_text += "**🏆 En Çok Mesaj Gönderenler:**\n"
+        if top_senders:
+            for i, (display_name, count) in enumerate(top_senders):
+                stats_text += f"`{i+1}.` {display_name}: `{count}` mesaj\n" # Inline kod olarak biçimlendirildi
+        else:
+            stats_text += "Henüz mesaj gönderen yok.\n"
+    elif stat_type == "my_stats" and user_id:
+        user_stats = await async_database.get_user_stats(chat_id, user_id)
+        stats_text += (
+            f"**👤 {user_stats['display_name']} Kullanıcı İstatistikleri:**\n"
+            f"Gönderilen Mesaj: `{user_stats['message_count']}`\n" # Inline kod olarak biçimlendirildi
+            f"Mevcut İhlal Sayısı: `{user_stats['strike_count']}`\n" # Inline kod olarak biçimlendirildi
+            f"Susturulmuş mu?: `{'Evet' if user_stats['is_muted'] else 'Hayır'}`\n" # Inline kod olarak biçimlendirildi
+        )
+        if user_stats['is_muted'] and user_stats['mute_until']:
+            mute_until_str = user_stats['mute_until']
+            mute_until_dt = None
+            
+            if isinstance(mute_until_str, datetime.datetime): # Zaten datetime objesi ise
+                mute_until_dt = mute_until_str
+            elif isinstance(mute_until_str, str): # String ise ayrıştırmayı dene
+                try:
+                    mute_until_dt = datetime.datetime.strptime(mute_until_str, '%Y-%m-%d %H:%M:%S.%f')
+                except (ValueError, TypeError):
                     try:
-                        mute_until_dt = datetime.datetime.strptime(mute_until_str, '%Y-%m-%d %H:%M:%S.%f')
+                        mute_until_dt = datetime.datetime.strptime(mute_until_str, '%Y-%m-%d %H:%M:%S')
                     except (ValueError, TypeError):
-                        try:
-                            mute_until_dt = datetime.datetime.strptime(mute_until_str, '%Y-%m-%d %H:%M:%S')
-                        except (ValueError, TypeError):
-                            pass # Eğer farklı bir format gelirse burada hata yakalanır
-
-                if mute_until_dt:
-                    stats_text += f"Susturma Bitiş Tarihi: `{mute_until_dt.strftime('%d.%m.%Y %H:%M:%S')}`\n" # Inline kod olarak biçimlendirildi
-                else:
-                    stats_text += f"Susturma Bitiş Tarihi: `Bilinmiyor ({mute_until_str})`\n" # Hata olursa stringi göster
-        else:
-            stats_text += "Geçersiz istatistik tipi veya kullanıcı ID eksik.\n"
-    except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] İstatistik metni oluşturulurken hata oluştu (Tip: {stat_type}, Kullanıcı: {user_id}): {e}", exc_info=True)
-        stats_text = "**📊 ZeaLouS Bot İstatistikleri**\n\nÜzgünüm, istatistikler şu anda yüklenemiyor. Lütfen daha sonra tekrar deneyin."
-    
+                        pass # Eğer farklı bir format gelirse burada hata yakalanır
+
+            if mute_until_dt:
+                stats_text += f"Susturma Bitiş Tarihi: `{mute_until_dt.strftime('%d.%m.%Y %H:%M:%S')}`\n" # Inline kod olarak biçimlendirildi
+            else:
+                stats_text += f"Susturma Bitiş Tarihi: `Bilinmiyor ({mute_until_str})`\n" # Hata olursa stringi göster
+    elif stat_type == "leaderboard" and user_id:
+        stats_text += await statistics.get_statistics(chat_id, user_id)
+    else:
+        stats_text += "Geçersiz istatistik tipi veya kullanıcı ID eksik.\n"
+
     return stats_text
 
 def get_stats_keyboard(user_id: str) -> InlineKeyboardMarkup:
@@ -80,6 +164,9 @@ def get_stats_keyboard(user_id: str) -> InlineKeyboardMarkup:
         ],
         [
             InlineKeyboardButton("Benim İstatistiklerim", callback_data=f"stats_my_stats_{user_id}"),
+            InlineKeyboardButton("Sıralamalar", callback_data="stats_leaderboard")
+        ],
+        [
             InlineKeyboardButton("Yenile", callback_data="stats_refresh")
         ]
     ]
@@ -90,25 +177,23 @@ async def send_statistics_message(update: Update, context: ContextTypes.DEFAULT_
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
     
     try:
-        stats_text = await generate_statistics_text("general", user_id) # user_id de eklendi
+        stats_text = await generate_statistics_text(chat_id, "general", user_id) # user_id de eklendi
         reply_markup = get_stats_keyboard(user_id)
 
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text=stats_text,
+        sent_message = await outbound.send_message(
+            context.bot,
+            chat_id,
+            stats_text,
             reply_markup=reply_markup,
             parse_mode='Markdown' # Markdown desteği eklendi
         )
-        logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) için istatistik mesajı gönderildi.")
+        _remember_rendered(sent_message.chat_id, sent_message.message_id, "general", None, stats_text)
+        logger.info("Kullanıcı %s (%s) için istatistik mesajı gönderildi.", display_name, user_id)
     except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) için ilk istatistik mesajı gönderilirken hata oluştu: {e}", exc_info=True)
+        logger.error("Kullanıcı %s (%s) için ilk istatistik mesajı gönderilirken hata oluştu: %s", display_name, user_id, e, exc_info=True)
         error_msg = f"ZeaLouS: Üzgünüm, istatistikler şu anda gösterilemiyor. Bir hata oluştu."
-        sent_error = await context.bot.send_message(chat_id=chat_id, text=error_msg)
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error.chat_id, 'message_id': sent_error.message_id}
-        )
+        sent_error = await outbound.send_message(context.bot, chat_id, error_msg)
+        deletions.schedule_message(sent_error, 15)
 
 
 async def handle_stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -116,14 +201,11 @@ async def handle_stats_callback(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
 
-    # query.answer() çağrısı hemen yapılmalı
-    await query.answer()
-
     callback_data = query.data
     chat_id = query.message.chat_id
     message_id = query.message.message_id
     
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) istatistik butonu {callback_data} ile etkileşimde bulundu.")
+    logger.info("Kullanıcı %s (%s) istatistik butonu %s ile etkileşimde bulundu.", display_name, user_id, callback_data, extra={'event': 'stats_callback'})
 
     stat_type = "general"
     target_user_id = None
@@ -135,45 +217,55 @@ async def handle_stats_callback(update: Update, context: ContextTypes.DEFAULT_TY
     elif callback_data.startswith("stats_my_stats_"):
         stat_type = "my_stats"
         target_user_id = user_id
+    elif callback_data == "stats_leaderboard":
+        stat_type = "leaderboard"
+        target_user_id = user_id
     elif callback_data == "stats_refresh":
-        current_text = query.message.text # Mevcut mesajın metni
-        if "**📚 Genel Durum:**" in current_text:
+        rendered = _rendered.get((chat_id, message_id))
+        current_text = query.message.text or "" # Mevcut mesajın metni (Markdown işaretleri olmadan gelir)
+        if rendered:
+            stat_type = rendered[0]
+        elif "📚 Genel Durum:" in current_text:
             stat_type = "general"
-        elif "**🏆 En Çok Mesaj Gönderenler:**" in current_text:
+        elif "🏆 En Çok Mesaj Gönderenler:" in current_text:
             stat_type = "top_senders"
-        elif "**👤" in current_text and "Kullanıcı İstatistikleri" in current_text:
+        elif "👤" in current_text and "Kullanıcı İstatistikleri" in current_text:
             stat_type = "my_stats"
+        elif "🏅 Sıralamalar:" in current_text:
+            stat_type = "leaderboard"
+        if stat_type in ("my_stats", "leaderboard"):
             target_user_id = user_id
-        logger.debug(f"[{datetime.datetime.now()}] İstatistik yenileme: '{stat_type}' tipiyle tekrar gösteriliyor.")
+        logger.debug("İstatistik yenileme: '%s' tipiyle tekrar gösteriliyor.", stat_type)
 
     try:
-        new_stats_text = await generate_statistics_text(stat_type, target_user_id)
+        new_stats_text = await generate_statistics_text(chat_id, stat_type, target_user_id)
         new_reply_markup = get_stats_keyboard(user_id)
 
         # Mevcut mesajın metni ve butonlarıyla yeni metin ve butonları karşılaştır
         current_reply_markup_json = json.dumps(query.message.reply_markup.to_dict(), sort_keys=True) if query.message.reply_markup else None
         new_reply_markup_json = json.dumps(new_reply_markup.to_dict(), sort_keys=True) if new_reply_markup else None
 
-        if query.message.text == new_stats_text and current_reply_markup_json == new_reply_markup_json:
-            logger.info(f"[{datetime.datetime.now()}] İstatistikler zaten güncel. Mesaj düzenlenmedi. Kullanıcı {display_name} ({user_id})")
+        # Telegram mesaj metnini Markdown işaretleri olmadan döndürdüğü için son gönderilen metinle karşılaştırılır
+        rendered = _rendered.get((chat_id, message_id))
+        if rendered and rendered[2] == new_stats_text and current_reply_markup_json == new_reply_markup_json:
+            logger.info("İstatistikler zaten güncel. Mesaj düzenlenmedi. Kullanıcı %s (%s)", display_name, user_id, extra={'event': 'stats_unchanged'})
             # Kullanıcıya geçici bir bildirim göndermek için query.answer() daha uygun
             await query.answer("İstatistikler zaten güncel!")
         else:
-            await context.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=message_id,
-                text=new_stats_text,
+            await query.answer() # Buton yükleniyor göstergesini kapat
+            await outbound.edit_message_text(
+                context.bot,
+                chat_id,
+                message_id,
+                new_stats_text,
                 reply_markup=new_reply_markup,
                 parse_mode='Markdown' # Markdown desteği eklendi
             )
-            logger.info(f"[{datetime.datetime.now()}] İstatistik mesajı güncellendi: {stat_type}. Kullanıcı {display_name} ({user_id})")
+            _remember_rendered(chat_id, message_id, stat_type, target_user_id, new_stats_text)
+            logger.info("İstatistik mesajı güncellendi: %s. Kullanıcı %s (%s)", stat_type, display_name, user_id, extra={'event': 'stats_updated'})
     except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] İstatistik mesajı güncellenirken hata oluştu: {e}. Mesaj ID: {message_id}, Callback Data: {callback_data}", exc_info=True)
+        logger.error("İstatistik mesajı güncellenirken hata oluştu: %s. Mesaj ID: %s, Callback Data: %s", e, message_id, callback_data, exc_info=True)
         error_msg = f"ZeaLouS: İstatistikler güncellenirken bir hata oluştu: {e}"
-        sent_error = await context.bot.send_message(chat_id=chat_id, text=error_msg)
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error.chat_id, 'message_id': sent_error.message_id}
-        )
+        sent_error = await outbound.send_message(context.bot, chat_id, error_msg)
+        deletions.schedule_message(sent_error, 15)
 
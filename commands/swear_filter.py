@@ -1,45 +1,486 @@
-import datetime
+import asyncio
+import bisect
+import logging
+import os
 import re
-from config import FORBIDDEN_WORDS_FILE # config.py'den dosya yolunu import et
+import unicodedata
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+from telegram.ext import ContextTypes
+from config import FORBIDDEN_WORDS_FILE, CHAT_MATCHER_CACHE_SIZE # config.py'den dosya yolunu import et
+from commands import database
+from commands import async_database
+from commands.log_pipeline import message_text
+
+logger = logging.getLogger(__name__)
 # from commands.utils import get_user_display_name_and_storage_name # Şu an için buraya doğrudan gerek yok, main.py hallediyor.
 
 # Yasaklı kelimeleri depolayacak modül seviyesinde bir set
 _forbidden_words_set = set()
+# Yasaklı kelimelerden derlenen eşleştirici (bkz. SwearMatcher); dosya değişince yenisiyle değiştirilir
+_matcher = None
+_words_file_mtime = None
+
+# --- Normalizasyon ---
+# Mesaj ve yasaklı kelimeler aynı adımlardan geçirilir:
+# 1. Türkçe büyük/küçük harf dönüşümü (I -> ı, İ -> i); Türkçe harfler (ç, ğ, ı, ö, ş, ü) korunur,
+#    böylece "sık" ile "sik" gibi farklı kelimeler birbirine karışmaz.
+# 2. Diğer aksanlar atılır, benzer görünen Kiril/Yunan harfleri Latin karşılıklarına çevrilir.
+# 3. Harf içeren kelimelerde rakam/sembol yerine kullanılan harfler çözülür (s1k -> sik, @m -> am).
+# 4. Kelime içindeki tekil ayırıcılar atılır (s*k, a.q) ve tek harflik parçalar birleştirilir (s.i.k, s i k).
+# 5. Tekrarlanan harfler teke indirilir (siiiik -> sik).
+# Sonuç, kelimeleri tek boşlukla ayrılmış bir metindir. Eşleşmeler yalnızca tam kelimeler üzerinde
+# kabul edildiği için her kelimenin orijinal mesajdaki aralığını bilmek yeterlidir.
+
+_TURKISH_LETTERS = set('çğıöşü')
+_HOMOGLYPHS = {
+    'а': 'a', 'е': 'e', 'о': 'o', 'р': 'p', 'с': 'c', 'у': 'y', 'х': 'x', 'к': 'k', 'м': 'm', 'т': 't',
+    'і': 'i', 'ѕ': 's', 'ј': 'j', 'ԛ': 'q', 'ԝ': 'w',
+    'α': 'a', 'ε': 'e', 'ι': 'i', 'κ': 'k', 'ο': 'o', 'ρ': 'p', 'τ': 't', 'υ': 'u', 'ν': 'v', 'χ': 'x',
+}
+_LEET_TABLE = str.maketrans({'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '6': 'g', '7': 't', '8': 'b', '9': 'g', '@': 'a', '$': 's'})
+_SOFT_SEPARATORS = ".-_*'’`"
+_SOFT_SEPARATOR_TABLE = str.maketrans('', '', _SOFT_SEPARATORS)
+_TURKISH_UPPER_TABLE = str.maketrans({'I': 'ı', 'İ': 'i'})
+
+# Kelime: harf/rakam (veya @, $) dizisi; içinde tekil yumuşak ayırıcılar olabilir (s*k, a.q)
+_TOKEN_RE = re.compile(r"(?:[^\W_]|[@$])+(?:[" + re.escape(_SOFT_SEPARATORS) + r"](?:[^\W_]|[@$])+)*")
+_REPEAT_RE = re.compile(r'(.)\1+')
+_CHUNK_RE = re.compile(r'\S+') # str.split() ile aynı parçalar
+
+_char_cache: dict[str, str] = {}
+
+def _fold_char(ch: str) -> str:
+    """ASCII olmayan tek bir (küçük harfli) karakteri normalize eder. Sonuçlar önbelleğe alınır."""
+    folded = _char_cache.get(ch)
+    if folded is not None:
+        return folded
+    folded = _HOMOGLYPHS.get(ch, ch)
+    if folded not in _TURKISH_LETTERS and not folded.isascii():
+        decomposed = unicodedata.normalize('NFKD', folded)
+        base = ''.join(c for c in decomposed if not unicodedata.combining(c))
+        folded = _HOMOGLYPHS.get(base, base)
+    if len(_char_cache) < 4096:
+        _char_cache[ch] = folded
+    return folded
+
+# Latin, Yunan ve Kiril harfleri için _fold_char sonuçları önceden hesaplanır; kelimeler str.translate ile tek
+# adımda katlanır. Bu aralığın dışında karakter içeren kelimeler (ör. tam genişlikli harfler) tek tek çözülür.
+# Yalnızca ASCII ve Türkçe harf içeren kelimeler (çoğunluk) katlanmadan geçer.
+_FOLD_TABLE = {cp: _fold_char(chr(cp)) for cp in range(0x80, 0x530) if _fold_char(chr(cp)) != chr(cp)}
+_NEEDS_FOLD_RE = re.compile('[^\x00-\x7fçğıöşü]')
+_OUTSIDE_FOLD_TABLE_RE = re.compile('[^\x00-\u052f]')
+
+# Sohbetlerde aynı kelimeler sürekli tekrarlandığı için kelime normalizasyonu önbelleğe alınır
+_TOKEN_CACHE_SIZE = 50000
+_token_cache: dict[str, tuple[str, str]] = {}
+
+def _normalize_token(token: str) -> tuple[str, str]:
+    """Tek bir kelimeyi normalize eder. Dönüş: (tekrarlar indirilmeden önceki hali, indirilmiş hali)."""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
+    # Çoğu kelimede ayırıcı ve büyük harf yoktur; gereksiz translate çağrıları atlanır
+    raw = token if token.isalnum() else token.translate(_SOFT_SEPARATOR_TABLE)
+    if not raw.islower():
+        raw = raw.translate(_TURKISH_UPPER_TABLE).lower()
+    if not raw.isascii() and _NEEDS_FOLD_RE.search(raw):
+        if _OUTSIDE_FOLD_TABLE_RE.search(raw):
+            raw = ''.join(_fold_char(ch) for ch in raw)
+        else:
+            raw = raw.translate(_FOLD_TABLE)
+    if not raw.isalpha() and not raw.isdigit():
+        raw = raw.translate(_LEET_TABLE) # Harf içeren kelimelerde rakam/sembolleri çöz
+    # Tekrar içermeyen kelimelerde search, sub'dan belirgin şekilde hızlıdır
+    result = (raw, _REPEAT_RE.sub(r'\1', raw) if _REPEAT_RE.search(raw) else raw)
+    if len(_token_cache) >= _TOKEN_CACHE_SIZE:
+        _token_cache.clear()
+    _token_cache[token] = result
+    return result
+
+def _tokenize(text: str, with_spans: bool = False) -> tuple[list[str], list[tuple[int, int]] | None]:
+    """
+    Metni kelimelere ayırır ve ardışık tek karakterlik parçaları birleştirir (s.i.k, s i k -> sik).
+    with_spans True ise her kelimenin orijinal metindeki (başlangıç, bitiş) aralığı da döndürülür.
+    """
+    pieces = _TOKEN_RE.findall(text)
+    if not with_spans and all(len(piece) > 1 for piece in pieces):
+        return pieces, None # Birleştirilecek parça yok, hızlı yol
+
+    merged, spans = [], []
+    previous_single = False
+    for match in _TOKEN_RE.finditer(text):
+        start, end = match.span()
+        single = end - start == 1
+        if single and previous_single:
+            gap = text[spans[-1][1]:start]
+            if len(gap) <= 2 and '\n' not in gap:
+                merged[-1] += match.group()
+                spans[-1] = (spans[-1][0], end)
+                continue
+        merged.append(match.group())
+        spans.append((start, end))
+        previous_single = single
+    return merged, spans
+
+def normalize(text: str) -> tuple[str, list[str]]:
+    """
+    Metni eşleştirme için normalize eder. Mesaj uzunluğunda doğrusal çalışır.
+    Dönüş: (kelimeleri tek boşlukla ayrılmış normalize metin, tekrarlar indirilmeden önceki kelimeler).
+    """
+    pieces, _ = _tokenize(text)
+    normalized = [_normalize_token(piece) for piece in pieces]
+    return ' '.join([collapsed for _, collapsed in normalized]), [raw for raw, _ in normalized]
+
+
+class SwearMatch(NamedTuple):
+    """Bulunan bir yasaklı kelime: listedeki kelime ve mesajdaki [start, end) aralığı."""
+    word: str
+    start: int
+    end: int
+
+
+# Temiz olduğu bilinen boşluksuz parça sayısının üst sınırı (eşleştirici başına)
+_CLEAN_CHUNK_CACHE_SIZE = 50000
+
+class SwearMatcher:
+    """
+    Yasaklı kelime listesinden derlenen Aho-Corasick otomatı.
+    Normalize edilmiş mesaj üzerinde tek geçişte tüm kelimeleri arar; eşleşmeler yalnızca
+    kelime sınırlarında kabul edilir (eski kelime bazlı kontrolle aynı davranış).
+    add_word/remove_word ile tüm liste yeniden derlenmeden kelime eklenip çıkarılabilir.
+
+    Mesaj, boşluklardan bölünen parçalarla ön elemeden geçirilir. Mesajdaki tek bir kelime boşluk içermez, ama
+    yasaklı girişler içerebilir (yasakli.txt'deki "cock suck" veya /yasakekle ile eklenen çok kelimeli girişler);
+    böyle bir eşleşme birden fazla parçaya yayılır. Bu yüzden girişlerin kelimeleri tek tek _pattern_tokens'a
+    eklenir ve yalnızca hiçbir kelimesi herhangi bir girişin kelimesi olmayan parçalar temiz sayılıp önbelleğe alınır
+    (tek harf içeren parçalar ancak komşuları da temizse; bkz. _classify_chunk). Bütün parçaları temiz olan mesajlar
+    (çoğunluk) otomata hiç girmez; diğerlerinde arama ilk ve son temiz olmayan parça arasıyla sınırlanır.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Her durumun kendi çıktısı ve hata bağlantılarıyla birleştirilmiş çıktısı:
+        # (kelime, normalize uzunluk, içindeki boşluk sayısı)
+        self._own_output: list[list[tuple[str, int, int]]] = [[]]
+        self._output: list[list[tuple[str, int, int]]] = [[]]
+        # Normalizasyon sonrası tek harfe inen kelimeler (örn. "xxx" -> "x") tekrar indirgenmeden karşılaştırılır
+        self._raw_words: dict[str, str] = {}
+        # Yasaklı kelimelerin normalize edilmiş kelimeleri ve ön elemede temiz bulunan parçalar
+        self._pattern_tokens: set[str] = set()
+        self._clean_chunks: set[str] = set()
+        self._isolated_chunks: set[str] = set()
+        self.words: set[str] = set()
+        for word in words:
+            self._insert(word)
+        self._build_failure_links()
+
+    def add_word(self, word: str):
+        """Listeye tek bir kelime ekler; yalnızca hata bağlantıları yeniden hesaplanır."""
+        self._insert(word)
+        self._build_failure_links()
+        self._clean_chunks.clear()
+        self._isolated_chunks.clear()
+
+    def remove_word(self, word: str):
+        """Listeden tek bir kelimeyi çıkarır; yalnızca hata bağlantıları yeniden hesaplanır."""
+        word = word.strip()
+        if word not in self.words:
+            return
+        self.words.discard(word)
+        for raw, existing in list(self._raw_words.items()):
+            if existing == word:
+                del self._raw_words[raw]
+        for state, own in enumerate(self._own_output):
+            if own and own[0][0] == word:
+                self._own_output[state] = []
+        self._pattern_tokens.clear()
+        # Aynı biçime normalize olan başka bir kelime varsa artık o raporlanır (otomata yeni durum eklenmez)
+        for other in self.words:
+            self._insert(other, only_if_missing=True)
+        self._build_failure_links()
+        self._clean_chunks.clear()
+        self._isolated_chunks.clear()
+
+    def _insert(self, word: str, only_if_missing: bool = False):
+        word = word.strip()
+        if not word:
+            return
+        pattern, raw_tokens = normalize(word)
+        if not pattern:
+            return
+        self.words.add(word)
+        self._pattern_tokens.update(pattern.split(' '))
+        if len(pattern) < 2:
+            self._raw_words.setdefault(raw_tokens[0], word)
+            return
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                if only_if_missing:
+                    return
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._own_output.append([])
+                self._output.append([])
+                self._goto[state][ch] = next_state
+            state = next_state
+        if not self._own_output[state]: # Aynı biçime normalize olan kelimelerden ilki raporlanır (a.q / aq)
+            self._own_output[state] = [(word, len(pattern), pattern.count(' '))]
+
+    def _build_failure_links(self):
+        """Genişlik öncelikli gezinmeyle hata (failure) bağlantılarını ve birleşik çıktıları hesaplar."""
+        self._output[0] = self._own_output[0]
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+            self._output[state] = self._own_output[state]
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._own_output[next_state] + self._output[self._fail[next_state]]
+
+    def _classify_chunk(self, chunk: str):
+        """
+        Boşluksuz bir parçanın kelimelerini yasaklı girişlerin kelimeleriyle karşılaştırır. Hiçbir eşleşmeye
+        katılamayacak parçalar _clean_chunks'a eklenir. Tek harf içeren parçalar komşu parçalardaki tek harflerle
+        birleşebileceği için (s i k) _isolated_chunks'a eklenir: bunlar yalnızca iki komşusu da temizse temizdir.
+        """
+        pieces = _TOKEN_RE.findall(chunk)
+        has_single = False
+        for piece in pieces:
+            if len(piece) == 1:
+                has_single = True
+                break
+        for token in (_tokenize(chunk)[0] if has_single else pieces): # Parça içindeki tek harfler birleştirilir
+            raw, collapsed = _normalize_token(token)
+            if collapsed in self._pattern_tokens or raw in self._raw_words:
+                return
+        cache = self._isolated_chunks if has_single else self._clean_chunks
+        if len(cache) >= _CLEAN_CHUNK_CACHE_SIZE:
+            cache.clear()
+        cache.add(chunk)
+
+    def find(self, text: str) -> list[SwearMatch]:
+        """Metindeki tüm yasaklı kelimeleri orijinal metindeki aralıklarıyla döndürür."""
+        # Mesajdaki kelimeler boşluk içermez, bu yüzden mesajın kelimeleri boşluklardan bölünen parçaların
+        # kelimeleridir. Yasaklı girişler boşluk içerebilir; çok kelimeli bir eşleşmenin bütün parçaları temiz değildir.
+        chunks = text.split()
+        clean_chunks, isolated_chunks = self._clean_chunks, self._isolated_chunks
+        if clean_chunks.issuperset(chunks):
+            return []
+        for chunk in chunks:
+            if chunk not in clean_chunks and chunk not in isolated_chunks:
+                self._classify_chunk(chunk)
+        last = len(chunks) - 1
+        unclean = [
+            index for index, chunk in enumerate(chunks)
+            if chunk not in clean_chunks and not (
+                chunk in isolated_chunks
+                and (index == 0 or chunks[index - 1] in clean_chunks)
+                and (index == last or chunks[index + 1] in clean_chunks)
+            )
+        ]
+        if not unclean:
+            return []
+        # Temiz parçalar hiçbir eşleşmeye katılamaz; arama ilk ve son temiz olmayan parçanın arasıyla sınırlanır
+        offset = 0
+        if unclean[0] > 0 or unclean[-1] < len(chunks) - 1:
+            bounds = [match.span() for match in _CHUNK_RE.finditer(text)]
+            offset = bounds[unclean[0]][0]
+            text = text[offset:bounds[unclean[-1]][1]]
+
+        normalized, raw_tokens = normalize(text)
+        found = [] # (ilk kelime indeksi, son kelime indeksi, yasaklı kelime)
+        if self._raw_words:
+            for index, raw in enumerate(raw_tokens):
+                word = self._raw_words.get(raw)
+                if word is not None:
+                    found.append((index, index, word))
+
+        # Eşleşme bir kelimenin başında başlayıp bir kelimenin sonunda bitmelidir
+        goto, fail, output = self._goto, self._fail, self._output
+        length = len(normalized)
+        spaces = None # Kelime indeksleri için boşlukların konumları; ilk eşleşmede hesaplanır
+        state = 0
+        for i, ch in enumerate(normalized):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state] or (i + 1 < length and normalized[i + 1] != ' '):
+                continue
+            for word, pattern_length, inner_spaces in output[state]:
+                start = i + 1 - pattern_length
+                if start == 0 or normalized[start - 1] == ' ':
+                    if spaces is None:
+                        spaces = [index for index, space in enumerate(normalized) if space == ' ']
+                    last_index = bisect.bisect_left(spaces, i)
+                    found.append((last_index - inner_spaces, last_index, word))
+
+        if not found:
+            return []
+        # Konumlar yalnızca eşleşme olduğunda hesaplanır
+        _, spans = _tokenize(text, with_spans=True)
+        matches = [SwearMatch(word, offset + spans[first][0], offset + spans[last][1]) for first, last, word in found]
+        matches.sort(key=lambda match: match.start)
+        return matches
+
+
+def _read_forbidden_words_file() -> set[str]:
+    """Yasaklı kelimeler dosyasını okur."""
+    with open(FORBIDDEN_WORDS_FILE, 'r', encoding='utf-8') as f:
+        # Her satırı oku, boşlukları temizle ve küçük harfe çevirerek sete ekle
+        return {line.strip().lower() for line in f if line.strip()}
+
+def _get_words_file_mtime() -> float | None:
+    try:
+        return os.stat(FORBIDDEN_WORDS_FILE).st_mtime
+    except OSError:
+        return None
 
 def load_forbidden_words_from_file():
     """
-    Yasaklı kelimeleri belirtilen dosyadan yükler.
+    Yasaklı kelimeleri belirtilen dosyadan yükler ve eşleştiriciyi derler.
     """
-    global _forbidden_words_set
+    global _forbidden_words_set, _matcher, _words_file_mtime
+    _words_file_mtime = _get_words_file_mtime()
     try:
-        with open(FORBIDDEN_WORDS_FILE, 'r', encoding='utf-8') as f:
-            # Her satırı oku, boşlukları temizle ve küçük harfe çevirerek sete ekle
-            _forbidden_words_set = {line.strip().lower() for line in f if line.strip()}
-        print(f"[{datetime.datetime.now()}] {len(_forbidden_words_set)} yasaklı kelime yüklendi.")
+        _forbidden_words_set = _read_forbidden_words_file()
+        logger.info("%d yasaklı kelime yüklendi.", len(_forbidden_words_set))
     except FileNotFoundError:
-        print(f"[{datetime.datetime.now()}] UYARI: Yasaklı kelimeler dosyası bulunamadı: {FORBIDDEN_WORDS_FILE}")
+        logger.warning("Yasaklı kelimeler dosyası bulunamadı: %s", FORBIDDEN_WORDS_FILE)
         _forbidden_words_set = set() # Dosya bulunamazsa seti boş bırak
     except Exception as e:
-        print(f"[{datetime.datetime.now()}] HATA: Yasaklı kelimeler yüklenirken bir hata oluştu: {e}")
+        logger.error("Yasaklı kelimeler yüklenirken bir hata oluştu: %s", e)
         _forbidden_words_set = set()
+    _matcher = SwearMatcher(_forbidden_words_set)
+    _chat_matchers.clear()
 
-def check_for_swears(user_id: str, message_content: str) -> bool:
+async def reload_forbidden_words_if_changed() -> bool:
     """
-    Mesaj içeriğinde yasaklı kelime olup olmadığını kontrol eder.
-    Varsayılan olarak mesajı siler veya uyarı gönderir (gerçek bir bot ortamında).
+    yasakli.txt değiştiyse listeyi arka planda yeniden derler ve tek adımda devreye alır.
+    Derleme bitene kadar eski eşleştirici kullanılmaya devam eder. Liste yenilendiyse True döner.
     """
-    if not _forbidden_words_set:
-        # Kelimeler yüklenmemişse veya dosya boşsa kontrol yapma
+    global _forbidden_words_set, _matcher, _words_file_mtime
+    mtime = _get_words_file_mtime()
+    if mtime is None or mtime == _words_file_mtime:
         return False
 
-    # Mesajı küçük harfe çevir ve kelimelere ayır
-    words = re.findall(r'\b\w+\b', message_content.lower())
-    
-    found_swears = [word for word in words if word in _forbidden_words_set] # Yüklenen seti kullan
-    
+    def compile_words():
+        words = _read_forbidden_words_file()
+        return words, SwearMatcher(words)
+
+    loop = asyncio.get_running_loop()
+    try:
+        words, matcher = await loop.run_in_executor(None, compile_words)
+    except Exception as e:
+        logger.error("Yasaklı kelimeler yeniden yüklenirken bir hata oluştu: %s. Eski liste kullanılmaya devam ediliyor.", e)
+        _words_file_mtime = mtime # Aynı hatalı dosya için tekrar deneme
+        return False
+
+    # Olay döngüsü içinde, await olmadan yapılan atamalar: kontroller yarım kalmış bir liste görmez
+    _forbidden_words_set, _matcher, _words_file_mtime = words, matcher, mtime
+    _chat_matchers.clear() # Sohbete özel listeler yeni genel listeden tekrar derlenecek
+    logger.info("Yasaklı kelimeler dosyası değişti, %d kelime yeniden yüklendi.", len(words))
+    return True
+
+async def watch_forbidden_words_job(context: ContextTypes.DEFAULT_TYPE):
+    """yasakli.txt değişikliklerini düzenli aralıklarla kontrol eden zamanlanmış iş."""
+    await reload_forbidden_words_if_changed()
+
+# --- Sohbete özel listeler ---
+# Bir sohbet genel listeye kelime ekleyebilir veya listedeki bir kelimeyi serbest bırakabilir.
+# Bu sohbetlerin eşleştiricileri ilk ihtiyaçta derlenir ve LRU önbellekte tutulur.
+_chats_with_overrides: set[int] = set()
+_chat_matchers: OrderedDict[int, SwearMatcher] = OrderedDict()
+
+def load_chat_override_index():
+    """Özel kelime ayarı olan sohbetleri yükler. Bot başlarken bir kez çağrılır."""
+    global _chats_with_overrides
+    _chats_with_overrides = set(database.get_chats_with_word_overrides())
+    _chat_matchers.clear()
+
+def _compile_chat_matcher(base_words: set[str], overrides: dict[str, bool]) -> SwearMatcher:
+    words = {word for word in base_words if overrides.get(word, True)}
+    words.update(word for word, is_forbidden in overrides.items() if is_forbidden)
+    return SwearMatcher(words)
+
+def _remember_chat_matcher(chat_id: int, matcher: SwearMatcher):
+    _chat_matchers[chat_id] = matcher
+    _chat_matchers.move_to_end(chat_id)
+    while len(_chat_matchers) > CHAT_MATCHER_CACHE_SIZE:
+        _chat_matchers.popitem(last=False)
+
+async def get_chat_matcher(chat_id: int | None) -> SwearMatcher | None:
+    """Sohbet için geçerli eşleştiriciyi döndürür; özel ayarı olmayan sohbetler genel listeyi kullanır."""
+    if chat_id is None or chat_id not in _chats_with_overrides:
+        return _matcher
+    matcher = _chat_matchers.get(chat_id)
+    if matcher is not None:
+        _chat_matchers.move_to_end(chat_id)
+        return matcher
+
+    base_words = _forbidden_words_set
+    overrides = await async_database.get_chat_word_overrides(chat_id)
+    loop = asyncio.get_running_loop()
+    matcher = await loop.run_in_executor(None, _compile_chat_matcher, base_words, overrides)
+    if base_words is _forbidden_words_set: # Derleme sırasında genel liste değişmediyse önbelleğe al
+        _remember_chat_matcher(chat_id, matcher)
+    return matcher
+
+async def add_chat_word(chat_id: int, word: str):
+    """Kelimeyi bu sohbette yasaklı yapar. Derlenmiş eşleştirici varsa yalnızca bu kelime eklenir."""
+    word = word.strip().lower()
+    if word in _forbidden_words_set:
+        await async_database.delete_chat_word_override(chat_id, word) # Genel listede zaten var, serbest bırakmayı kaldır
+    else:
+        await async_database.set_chat_word_override(chat_id, word, True)
+    _chats_with_overrides.add(chat_id)
+    matcher = _chat_matchers.get(chat_id)
+    if matcher is not None:
+        matcher.add_word(word)
+
+async def remove_chat_word(chat_id: int, word: str):
+    """Kelimeyi bu sohbette serbest bırakır. Derlenmiş eşleştirici varsa yalnızca bu kelime çıkarılır."""
+    word = word.strip().lower()
+    if word in _forbidden_words_set:
+        await async_database.set_chat_word_override(chat_id, word, False)
+        _chats_with_overrides.add(chat_id)
+    else:
+        await async_database.delete_chat_word_override(chat_id, word) # Sohbete özel eklenmiş kelimeyi sil
+    matcher = _chat_matchers.get(chat_id)
+    if matcher is not None:
+        matcher.remove_word(word)
+
+def find_swears(message_content: str, matcher: SwearMatcher | None = None) -> list[SwearMatch]:
+    """Mesajdaki yasaklı kelimeleri, mesaj içindeki konumlarıyla birlikte döndürür."""
+    matcher = matcher or _matcher
+    if matcher is None or not matcher.words:
+        return []
+    return matcher.find(message_content)
+
+def check_for_swears(user_id: str, message_content: str, matcher: SwearMatcher | None = None) -> bool:
+    """
+    Mesaj içeriğinde yasaklı kelime olup olmadığını kontrol eder.
+    matcher verilirse (sohbete özel liste) o kullanılır, verilmezse genel liste kullanılır.
+    """
+    found_swears = find_swears(message_content, matcher)
+
     if found_swears:
-        print(f"[{datetime.datetime.now()}] KÜFÜR TESPİT EDİLDİ! Kullanıcı: {user_id}, Mesaj: '{message_content}'")
-        print(f"Tespit edilen kelimeler: {', '.join(found_swears)}")
+        # Eşleşen kelimeler mesajın parçası olduğu için yalnızca sayısı yazılır; metin LOG_MESSAGE_CONTENT'e tabidir
+        logger.info("KÜFÜR TESPİT EDİLDİ! Kullanıcı: %s, %d eşleşme", user_id, len(found_swears),
+                    extra={'event': 'swear_detected', **message_text(message_content)})
         # Burada gerçek bir bot ortamında mesajı silme veya kullanıcıya uyarı gönderme işlemi yapılır.
         return True
     return False
@@ -13,9 +13,37 @@ BOT_TOKEN = "8154263807:AAHK2apy8aI-wYygzGTxKcyjXegL1II15N4"
 ## Yönetici ID'leri (Bot'un adminleri)
 ADMIN_IDS = ["5104018162", "1087968824"] # Yönetici yetkisi vereceğiniz kullanıcıların ID'lerini buraya ekleyin
 
+# Bot API sunucusu
+# Boş bırakılırsa Telegram'ın sunucusu kullanılır. Yerel bir Bot API sunucusu veya yük testindeki sahte sunucu
+# (tools/load_test.py) için ör. "http://127.0.0.1:8081/bot" verilebilir; token adresin sonuna eklenir.
+BOT_API_BASE_URL = os.environ.get("BOT_API_BASE_URL", "")
+
+# Güncellemelerin alınma yöntemi
+# "polling": bot getUpdates ile Telegram'a sürekli sorar (sunucu gerektirmez).
+# "webhook": Telegram güncellemeleri botun dahili HTTP sunucusuna gönderir; uzun sorgulama gecikmesi olmaz.
+BOT_MODE = "polling"
+WEBHOOK_LISTEN = "0.0.0.0" # HTTP sunucusunun dinleyeceği adres
+WEBHOOK_PORT = 8443 # HTTP sunucusunun dinleyeceği port
+WEBHOOK_URL_PATH = "telegram" # Güncellemelerin POST edileceği yol
+WEBHOOK_URL = None # Telegram'a kaydedilecek genel HTTPS adresi (ör. "https://bot.ornek.com/telegram"); webhook modunda zorunlu
+# Telegram her istekte bu değeri X-Telegram-Bot-Api-Secret-Token başlığında gönderir; eşleşmeyen istekler reddedilir.
+# Boş bırakılırsa her açılışta rastgele üretilir (bu durumda tools/post_update.py ile yerel test yapılamaz).
+WEBHOOK_SECRET_TOKEN = os.environ.get("WEBHOOK_SECRET_TOKEN", "")
+WEBHOOK_MAX_CONNECTIONS = 40 # Telegram'ın aynı anda açacağı en fazla bağlantı
+
+# Çok süreçli çalışma
+# 0'dan büyükse güncellemeleri alan süreç, her güncellemeyi sohbetine göre bu sayıdaki işçi süreçten birine iletir.
+# Aynı sohbetin güncellemeleri hep aynı işçide sırayla işlenir. Genelde işlemci çekirdeği sayısı kadar seçilir.
+WORKER_PROCESSES = 0 # 0: tek süreç
+WORKER_SHUTDOWN_TIMEOUT_S = 10 # Kapanışta işçilerin kuyruklarını bitirmesi için beklenecek en fazla süre (sn)
+# Aynı anda işlenen en fazla güncelleme. Farklı sohbetlerin güncellemeleri eşzamanlı, aynı sohbetinkiler sırayla işlenir;
+# sırasını bekleyen güncellemeler de bu sayıya dahildir.
+UPDATE_CONCURRENCY = 256
+
 # Veritabanı dosyasının yolu
 # Bu, bot_data.db dosyasını config.py ile aynı dizinde (yani ana bot dizininde) oluşturur.
-DB_PATH = os.path.join(os.path.dirname(__file__), 'bot_data.db') # Eklendi: Veritabanı yolu
+# BOT_DB_PATH ortam değişkeni verilirse o dosya kullanılır (ör. yük testinde geçici veritabanı).
+DB_PATH = os.environ.get("BOT_DB_PATH") or os.path.join(os.path.dirname(__file__), 'bot_data.db') # Eklendi: Veritabanı yolu
 
 # Mehter Marşı MP3 dosyasının yolu
 MEHTER_MP3_PATH = os.path.join(os.path.dirname(__file__), 'music', 'mehter.mp3') # Eklendi: Mehter Marşı yolu
@@ -28,3 +56,104 @@ CENK_MP3_PATH = os.path.join(os.path.dirname(__file__), 'music', 'cenk.mp3') # E
 
 # Selamlama Görsellerinin bulunduğu dizin yolu
 GREETING_IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'greetings') # Eklendi: Selamlama görselleri yolu
+
+# Veritabanı bağlantı ayarları
+# Bot tek bir kalıcı yazma bağlantısı ve küçük bir okuma bağlantısı havuzu kullanır.
+DB_READ_POOL_SIZE = 4 # Eşzamanlı okuma bağlantısı sayısı
+DB_CACHE_SIZE_KB = 16384 # Bağlantı başına SQLite sayfa önbelleği (KB)
+DB_MMAP_SIZE = 64 * 1024 * 1024 # Bellek eşlemeli G/Ç boyutu (bayt)
+DB_STATEMENT_CACHE_SIZE = 256 # Bağlantı başına önbelleğe alınan hazır sorgu sayısı
+DB_BUSY_TIMEOUT_MS = 5000 # Kilitli veritabanında bekleme süresi (ms)
+DB_EXECUTOR_WORKERS = 4 # Veritabanı işlerini olay döngüsü dışında çalıştıran thread sayısı
+
+# Sohbete göre ayrılmış kayıtlar
+# Mesajlar, istatistikler ve cezalar sohbet başına tutulur. Bu ayrımdan önce kaydedilmiş mesajların ve cezaların
+# hangi sohbete ait olduğu bilinmediği için göç sırasında bu sohbete atanırlar (botun kullanıldığı grubun ID'si,
+# ör. -1001234567890). None bırakılırsa kayıtlarda geçen tek grup kullanılır; böyle bir grup yoksa ve taşınacak
+# kayıt varsa göç yapılmaz ve bot başlamaz.
+LEGACY_CHAT_ID = None
+
+# Mesaj kayıtları için yazma tamponu (write-behind)
+# Mesaj ve kullanıcı kayıtları bellekte biriktirilir ve toplu olarak tek bir işlemde yazılır.
+INGEST_FLUSH_INTERVAL_MS = 500 # Tampon en geç bu aralıkla diske yazılır (ms)
+INGEST_FLUSH_ROWS = 200 # Bu kadar kayıt biriktiğinde tampon beklemeden yazılır
+INGEST_MAX_PENDING_ROWS = 5000 # Tamponun üst sınırı; dolduğunda yeni kayıtlar yazma bitene kadar bekler
+USER_ACTIVITY_FLUSH_INTERVAL_S = 60 # Kullanıcıların son etkinlik zamanları bu aralıkla toplu yazılır (sn)
+
+# Yasaklı kelime listesi yenileme
+FORBIDDEN_WORDS_RELOAD_INTERVAL_S = 30 # yasakli.txt değişiklikleri bu aralıkla kontrol edilir (sn)
+CHAT_MATCHER_CACHE_SIZE = 128 # Bellekte tutulan sohbete özel derlenmiş kelime listesi sayısı
+
+# Hatırlatıcı zamanlayıcısı
+# Zamanı bu süre içinde gelecek hatırlatıcılar JobQueue'ya saniye hassasiyetiyle tek tek zamanlanır.
+REMINDER_SCHEDULE_HORIZON_S = 3600
+
+# Hatırlatıcı gönderimi (Telegram hız sınırları giden istek kuyruğunda uygulanır)
+REMINDER_DELIVERY_CONCURRENCY = 8 # Kuyrukta aynı anda bekleyen/gönderilen en fazla hatırlatıcı; birikmiş hatırlatıcılar diğer gönderimlerin önüne geçmez
+REMINDER_MAX_ATTEMPTS = 5 # Geçici hatalarda (ağ hatası, zaman aşımı) en fazla deneme sayısı
+REMINDER_RETRY_BASE_DELAY_S = 5 # İlk yeniden deneme gecikmesi; her denemede iki katına çıkar (sn)
+REMINDER_REMOVE_FLUSH_INTERVAL_S = 2 # Gönderilen hatırlatıcılar bu aralıkla toplu olarak silinir (sn)
+
+# Giden istek kuyruğu (Telegram hız sınırları)
+OUTBOUND_GLOBAL_RATE_PER_S = 25 # Bot genelinde saniyede en fazla istek (Telegram sınırı ~30/sn)
+OUTBOUND_GLOBAL_BURST = 25 # Genel sınırda anlık olarak gönderilebilecek istek sayısı
+OUTBOUND_GROUP_RATE_PER_MIN = 20 # Bir grupta dakikada en fazla mesaj (Telegram sınırı ~20/dk)
+OUTBOUND_GROUP_BURST = 5 # Bir grupta anlık olarak gönderilebilecek mesaj sayısı
+OUTBOUND_PRIVATE_RATE_PER_S = 1 # Özel sohbette saniyede en fazla mesaj
+OUTBOUND_PRIVATE_BURST = 3 # Özel sohbette anlık olarak gönderilebilecek mesaj sayısı
+OUTBOUND_MAX_CONCURRENCY = 16 # Aynı anda Telegram'a gönderilen en fazla istek
+OUTBOUND_MAX_RETRY_AFTER = 5 # RetryAfter (429) alan bir isteğin en fazla kaç kez kuyruğa geri konacağı
+OUTBOUND_QUEUE_WARN_DEPTH = 200 # Kuyruk bu uzunluğa ulaştığında uyarı loglanır
+
+# Gecikmeli mesaj silme
+# Geçici bot mesajları (uyarılar, hata mesajları, görseller) veritabanına kaydedilir ve tek bir süpürücü iş
+# tarafından sohbet başına toplu olarak (deleteMessages, istek başına en fazla 100 mesaj) silinir.
+DELETION_SWEEP_INTERVAL_S = 1 # Zamanı gelen silme işlemlerinin kontrol aralığı (sn)
+DELETION_RETRY_DELAY_S = 30 # Geçici hatayla silinemeyen mesajların tekrar deneme gecikmesi (sn)
+
+# İstatistik önbelleği
+# Oluşturulan istatistik metinleri kısa bir süre önbellekte tutulur; aynı anda butona basan kullanıcılar aynı sonucu paylaşır.
+STATS_CACHE_TTL_S = 15 # Önbellekteki istatistik metninin geçerlilik süresi (sn)
+STATS_CACHE_INVALIDATE_MESSAGES = 50 # Bu kadar yeni mesaj yazıldığında önbellek süresi dolmadan yenilenir
+
+# Metrikler
+# İşleyicilerin, veritabanı fonksiyonlarının ve Bot API isteklerinin süreleri ve hata sayıları tutulur.
+METRICS_ENABLED = True # Kapalıysa hiçbir ölçüm yapılmaz
+# 0'dan büyükse metrikler Prometheus metin formatında http://127.0.0.1:<port>/metrics adresinde sunulur.
+# Çok süreçli çalışmada işçiler sırasıyla port+1, port+2, ... kullanır.
+METRICS_PORT = 0
+METRICS_SUMMARY_INTERVAL_S = 300 # Son aralığın özeti bu aralıkla tek satır olarak loglanır (sn); 0 kapatır
+
+# Mesaj taşkını (flood) koruması
+# Kullanıcılar ve sohbetler için token bucket: BURST kadar mesaj art arda gönderilebilir, sonra saniyede RATE mesaj.
+FLOOD_ENABLED = True
+FLOOD_USER_RATE_PER_S = 0.5 # Bir kullanıcının bir sohbette sürekli gönderebileceği mesaj hızı
+FLOOD_USER_BURST = 8 # Bir kullanıcının art arda gönderebileceği mesaj sayısı
+FLOOD_CHAT_RATE_PER_S = 10 # Bir sohbetin toplam mesaj hızı; aşıldığında mesajlar istatistiklere kaydedilmez
+FLOOD_CHAT_BURST = 60
+# Sınırı aşan kullanıcıya bu süre içinde tek ihlal verilir; aradaki taşkın mesajları yalnızca silinir (sn)
+FLOOD_STRIKE_COOLDOWN_S = 10
+FLOOD_MAX_TRACKED_USERS = 50000 # Bellekte tutulacak en fazla kullanıcı kovası (en eski kullanılan silinir)
+MUTE_NOTICE_COOLDOWN_S = 30 # Susturulmuş kullanıcıya "şu anda susturulmuş durumdasınız" bildirimi en fazla bu aralıkla gönderilir (sn)
+
+# Loglama
+# Log kayıtları kuyruğa konur ve arka planda tek bir thread tarafından yazılır; olay döngüsü diske/terminale yazmayı beklemez.
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "json" # "json": satır başına bir JSON nesnesi, "text": okunabilir satırlar
+LOG_FILE = None # Verilirse loglar stdout'a ek olarak bu dosyaya da yazılır
+# Kullanıcı mesajlarının loglardaki hâli: "full" metnin kendisi, "redact" yalnızca uzunluğu, "drop" hiçbiri
+LOG_MESSAGE_CONTENT = "redact"
+# Yüksek hacimli olayların yazılacak oranı (0-1); listede olmayan olayların hepsi yazılır
+LOG_SAMPLE_RATES = {
+    'message_received': 0.1,
+}
+LOG_EVENT_RATE_LIMIT_PER_S = 20 # Bir olaydan saniyede yazılacak en fazla kayıt (uyarı ve hatalar sınırlanmaz)
+LOG_QUEUE_SIZE = 10000 # Kuyruk dolarsa yeni kayıtlar beklemeden atılır ve sayısı sonraki kayda eklenir
+
+# Mesaj kayıtlarının saklanması
+# Ham mesaj kayıtları bu süreden sonra silinir; günlük ve toplam özetler silinmez, bu yüzden genel istatistikler korunur.
+MESSAGE_RETENTION_DAYS = 90 # Ham mesaj kayıtlarının saklanacağı gün sayısı (gece yarısına yuvarlanır)
+HOURLY_ROLLUP_RETENTION_DAYS = 7 # Saatlik özetlerin saklanacağı gün sayısı (son 24 saat istatistiği için en az 2 olmalı)
+RETENTION_INTERVAL_S = 3600 # Saklama işinin çalışma aralığı (sn)
+RETENTION_BATCH_ROWS = 5000 # Tek işlemde silinecek en fazla ham kayıt
+RETENTION_VACUUM_PAGES = 1000 # Bir adımda dosyadan geri verilecek en fazla boş sayfa
@@ -1,58 +1,98 @@
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes, JobQueue
+from telegram.request import BaseRequest
+from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, TypeHandler, filters, ContextTypes, JobQueue
 import logging
 import datetime
 import re
+import secrets
 from collections import Counter, defaultdict
 
 # Kendi komut modüllerinizi içe aktarın
 # GREETING_IMAGES_DIR ekliydi, GREETING diye bir şey yoktu. BITI_HUCUM_MP3_PATH, CENK_MP3_PATH eklendi
-from config import BOT_TOKEN, GAME_SERVER_UTC_OFFSET_HOURS, ADMIN_IDS, MEHTER_MP3_PATH, BITI_HUCUM_MP3_PATH, CENK_MP3_PATH, GREETING_IMAGES_DIR
+from config import BOT_TOKEN, GAME_SERVER_UTC_OFFSET_HOURS, ADMIN_IDS, MEHTER_MP3_PATH, BITI_HUCUM_MP3_PATH, CENK_MP3_PATH, GREETING_IMAGES_DIR, INGEST_FLUSH_INTERVAL_MS, USER_ACTIVITY_FLUSH_INTERVAL_S, FORBIDDEN_WORDS_RELOAD_INTERVAL_S, REMINDER_SCHEDULE_HORIZON_S, REMINDER_REMOVE_FLUSH_INTERVAL_S, DELETION_SWEEP_INTERVAL_S, RETENTION_INTERVAL_S
+from config import BOT_MODE, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_URL_PATH, WEBHOOK_URL, WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS
+from config import WORKER_PROCESSES, UPDATE_CONCURRENCY, BOT_API_BASE_URL, METRICS_PORT, METRICS_SUMMARY_INTERVAL_S
 from commands.swear_filter import check_for_swears, load_forbidden_words_from_file
+from commands import swear_filter # Yasaklı kelime listesinin yenilenmesi ve sohbete özel listeler
 from commands.notes import handle_note_command as notes_handler
 from commands.reminders import handle_reminder_command as reminders_handler
 from commands.game_time import get_game_server_time
 from commands.greetings import send_greeting_image
-from commands.utils import get_user_display_name_and_storage_name, is_admin, delete_message_job
+from commands.utils import get_user_display_name_and_storage_name, is_admin
 from commands import database # Eklendi: Veritabanı modülü
+from commands import async_database # Olay döngüsünü bloklamayan veritabanı erişimi
+from commands import ingest # Mesaj ve kullanıcı kayıtları için yazma tamponu
+from commands import punishments # Bellek içi ceza durumu önbelleği
+from commands import reminder_scheduler # Hatırlatıcıların tek tek zamanlanması
 from commands import stats # Eklendi: İstatistik modülü
-
-# Loglama ayarlarını yapılandırın
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO
-)
+from commands import outbound # Giden Telegram istekleri için öncelikli, hız sınırlı kuyruk
+from commands import deletions # Geçici bot mesajlarının toplu ve kalıcı silinmesi
+from commands import media_cache # Yüklenen medya dosyalarının file_id önbelleği
+from commands import retention # Eski ham mesaj kayıtlarının silinmesi
+from commands import sharding # Güncellemelerin sohbete göre işçi süreçlere dağıtılması
+from commands import metrics # İşleyici, sorgu ve Bot API süreleri
+from commands import flood # Kullanıcı ve sohbet başına mesaj taşkını tespiti
+from commands import log_pipeline # Bloklamayan, yapılandırılmış loglama
+
+# Loglama ayarlarını yapılandırın: kayıtlar kuyruk üzerinden arka plandaki yazıcı thread'ine gider
+log_pipeline.configure()
 logger = logging.getLogger(__name__)
 
-async def check_reminders(context: ContextTypes.DEFAULT_TYPE):
-    """Süresi dolan hatırlatıcıları kontrol eder ve kullanıcılara özel mesaj gönderir."""
-    logger.debug("Running check_reminders job...")
-    now = datetime.datetime.now()
-    
-    all_reminders_by_user = database.get_all_reminders() # Veritabanından tüm hatırlatıcıları al
-    user_id_to_display_name = database.get_user_display_names() # Veritabanından kullanıcı adlarını al
-    
-    for user_id, reminders in all_reminders_by_user.items():
-        for reminder in reminders:
-            if reminder['remind_at'] <= now:
-                display_name = user_id_to_display_name.get(user_id, f"Kullanıcı {user_id}")
-                reminder_text = reminder['reminder_text']
-                try:
-                    await context.bot.send_message(chat_id=user_id, text=f"ZeaLouS: Hatırlatma: '{reminder_text}'")
-                    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id})'ye hatırlatma gönderildi: '{reminder_text}'")
-                    database.remove_reminder(reminder['id']) # Hatırlatma gönderildiyse veritabanından sil
-                except Exception as e:
-                    logger.error(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id})'ye hatırlatma gönderilirken hata oluştu: {e}. Hatırlatma ID: {reminder['id']}")
-                    database.remove_reminder(reminder['id'])
-
+# Kayıtlı işleyicilerin kullandığı güncelleme tipleri: komutlar ve metin mesajları (message) ile istatistik
+# butonları (callback_query). Telegram diğer tipleri (düzenlenen mesajlar, üyelik değişiklikleri vb.) hiç göndermez.
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Bot başlatıldığında gönderilecek mesaj."""
     user = update.effective_user # Kullanıcı objesini al
     user_id, display_name, user_name_for_storage = get_user_display_name_and_storage_name(update)
-    # database.update_user_info çağrısı güncellendi
-    database.update_user_info(user_id, user.username, user.first_name, user.last_name, user.is_bot)
+    await ingest.record_user_info(user_id, user.username, user.first_name, user.last_name, user.is_bot)
     help_hint = "Komutları görmek için `/help` yazabilirsiniz."
-    await update.message.reply_text(f'Merhaba {display_name}! Ben ZeaLouS, mesajlarınızı kontrol etmek ve komutlarınızı işlemek için buradayım. {help_hint}')
+    await outbound.reply_text(update.message, f'Merhaba {display_name}! Ben ZeaLouS, mesajlarınızı kontrol etmek ve komutlarınızı işlemek için buradayım. {help_hint}')
+
+
+async def apply_strike(update: Update, context: ContextTypes.DEFAULT_TYPE, user_data: punishments.PunishmentState, display_name: str, violation: str, warning_message_text: str) -> None:
+    """
+    Kullanıcıya bir ihlal verir: mesajını siler, uyarır ve ihlal sayısı 3'e ulaştıysa susturma basamağını uygular.
+    `violation` ihlalin türüdür ('swear', 'flood'); hepsi aynı ihlal sayacını ve susturma basamaklarını paylaşır.
+    """
+    user_id = user_data.user_id
+    now = datetime.datetime.now()
+    user_data.strike_count += 1
+    current_strike_count = user_data.strike_count
+
+    # Uyarı gönderildiğinde silinmesi zamanlanır (15 sn). Gönderim beklenmez: sohbetin hız sınırı dolmuşsa uyarı
+    # saniyelerce kuyrukta kalabilir ve işleyici bu sürede diğer güncellemeleri bekletmemelidir.
+    outbound.reply_text_nowait(update.message, warning_message_text, outbound.PRIORITY_MODERATION, on_sent=lambda sent: deletions.schedule_message(sent, 15))
+    outbound.delete_nowait(update.message)
+    logger.info("Kullanıcı %s (%s) %d ihlale ulaştı. Bir sonraki susturma tipi: %s. Uyarı mesajı silinmek üzere zamanlandı.", display_name, user_id, current_strike_count, user_data.next_mute_type, extra={'event': 'strike', 'violation': violation})
+
+    if current_strike_count >= 3:
+        mute_duration = None
+
+        if user_data.next_mute_type == '5_min':
+            mute_duration = datetime.timedelta(minutes=5)
+            user_data.next_mute_type = '1_hr'
+        elif user_data.next_mute_type == '1_hr':
+            mute_duration = datetime.timedelta(hours=1)
+            user_data.next_mute_type = '1_hr_served'
+
+        if mute_duration:
+            user_data.is_muted = True
+            user_data.mute_until = now + mute_duration
+            user_data.total_mutes_served += 1
+            user_data.strike_count = 0
+
+            logger.info("Kullanıcı %s (%s) için %s süreli susturma uygulandı. Yeni susturma tipi: %s. İhlaller sıfırlandı.", display_name, user_id, mute_duration, user_data.next_mute_type)
+
+            # Ceza uygulandı mesajı gönderildiğinde silinmesi zamanlanır (15 sn)
+            punishment_message_text = f"ZeaLouS: {display_name}, ceza uygulandı!"
+            outbound.reply_text_nowait(update.message, punishment_message_text, outbound.PRIORITY_MODERATION, on_sent=lambda sent: deletions.schedule_message(sent, 15))
+
+            # Kullanıcıya özel detaylı ceza bildirimi gönder (bu mesaj kalıcı olabilir); gönderilemezse hata loglanır
+            outbound.send_message_nowait(context.bot, user_id, f"ZeaLouS: Ceza aldınız. Süre: {mute_duration}. Kuralları gözden geçirin: /rules", outbound.PRIORITY_MODERATION)
+
+    await punishments.save_state(user_data)
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -62,30 +102,33 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         message_content = update.message.text
         now = datetime.datetime.now()
 
-        # database.update_user_info çağrısı güncellendi
-        database.update_user_info(user_id, user.username, user.first_name, user.last_name, user.is_bot)
-        
-        logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) mesaj gönderdi: '{message_content}'")
+        logger.info("Kullanıcı %s (%s) mesaj gönderdi.", display_name, user_id, extra={'event': 'message_received', **log_pipeline.message_text(message_content)})
 
-        user_data = database.get_punishment_data(user_id)
+        chat_id = update.message.chat_id
+        user_data = punishments.get_state(chat_id, user_id)
 
-        if user_data['is_muted'] and user_data['mute_until'] and now > user_data['mute_until']:
+        # Taşkın kontrolü her şeyden önce yapılır; sınırı aşan kullanıcının mesajları için hiçbir kayıt yazılmaz
+        flood_verdict = flood.check_message(chat_id, user_id)
+        if flood_verdict not in (flood.USER_FLOOD_STRIKE, flood.USER_FLOOD):
+            await ingest.record_user_info(user_id, user.username, user.first_name, user.last_name, user.is_bot)
+
+        if user_data.is_muted and user_data.mute_until and now > user_data.mute_until:
             # Mute süresi dolduğunda gönderilen mesaj kalıcı kalabilir
-            await update.message.reply_text(f"ZeaLouS: {display_name}, cezanız sona erdi. Tekrar mesaj atabilirsiniz.")
+            outbound.reply_text_nowait(update.message, f"ZeaLouS: {display_name}, cezanız sona erdi. Tekrar mesaj atabilirsiniz.", outbound.PRIORITY_MODERATION)
             
-            if user_data['next_mute_type'] == '1_hr_served':
-                database.clear_user_punishments(user_id)
-                user_data = database.get_punishment_data(user_id)
-                logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) için tüm cezalar sıfırlandı.")
+            if user_data.next_mute_type == '1_hr_served':
+                await punishments.clear_state(chat_id, user_id)
+                user_data = punishments.get_state(chat_id, user_id)
+                logger.info("Kullanıcı %s (%s) için tüm cezalar sıfırlandı.", display_name, user_id)
             else:
-                user_data['is_muted'] = False
-                user_data['mute_until'] = None
-                user_data['strike_count'] = 0
-                database.save_punishment_data(user_id, user_data)
+                user_data.is_muted = False
+                user_data.mute_until = None
+                user_data.strike_count = 0
+                await punishments.save_state(user_data)
             
-        if user_data['is_muted']:
-            await update.message.delete() # Susturulmuş kullanıcının mesajını sil
-            remaining_time = user_data['mute_until'] - now
+        if user_data.is_muted:
+            outbound.delete_nowait(update.message) # Susturulmuş kullanıcının mesajını sil
+            remaining_time = user_data.mute_until - now
             minutes, seconds = divmod(remaining_time.seconds, 60)
             hours, minutes = divmod(minutes, 60)
             
@@ -98,79 +141,30 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 mute_status_message += f" Cezanız {minutes} dakika, {seconds} saniye daha devam ediyor."
             mute_status_message += " Bu mesaj 5 saniye sonra silinecektir." # Geçici mesaj olduğunu belirt
 
-            try:
-                # Durum mesajını gruba gönder
-                sent_message = await context.bot.send_message(chat_id=update.message.chat_id, text=mute_status_message)
-                # Mesajı 5 saniye sonra silmek için zamanla
-                context.job_queue.run_once(
-                    delete_message_job, # commands.utils.delete_message_job kullanıldı
-                    5, # 5 saniye gecikme
-                    data={'chat_id': sent_message.chat_id, 'message_id': sent_message.message_id}
-                )
-                logger.info(f"[{now}] Kullanıcı {display_name} ({user_id}) susturulmuşken mesaj attı. Geçici bildirim gönderildi ve silinmesi zamanlandı.")
-            except Exception as e:
-                logger.error(f"[{now}] Kullanıcı {display_name} ({user_id}) susturulmuşken bildirim gönderilirken/silinirken hata oluştu: {e}")
+            # Durum mesajı kullanıcıya MUTE_NOTICE_COOLDOWN_S içinde en fazla bir kez gönderilir; arada gelen mesajlar
+            # yalnızca silinir. Gönderildiğinde 5 saniye sonra silinmek üzere zamanlanır.
+            if flood.notice_due(chat_id, user_id):
+                outbound.send_message_nowait(context.bot, chat_id, mute_status_message, outbound.PRIORITY_MODERATION, on_sent=lambda sent: deletions.schedule_message(sent, 5))
+                logger.info("Kullanıcı %s (%s) susturulmuşken mesaj attı. Geçici bildirim kuyruğa eklendi.", display_name, user_id, extra={'event': 'muted_message'})
             return
 
-        if check_for_swears(user_id, message_content):
-            user_data['strike_count'] += 1
-            current_strike_count = user_data['strike_count']
-            
-            # Yasaklı kelime tespit edildiğinde gönderilen mesajı yakala ve silinmesini zamanla
-            warning_message_text = (
-                f'ZeaLouS: Mesajınızda yasaklı kelime tespit edildi {display_name}.'
-                f'\nYasaklı kelime sayınız: {current_strike_count}'
-            )
-            sent_warning_message = await update.message.reply_text(warning_message_text)
-            context.job_queue.run_once(
-                delete_message_job, # commands.utils.delete_message_job kullanıldı
-                15, # 15 saniye sonra silinecek
-                data={'chat_id': sent_warning_message.chat_id, 'message_id': sent_warning_message.message_id}
-            )
-            await update.message.delete()
-            logger.info(f"[{now}] Kullanıcı {display_name} ({user_id}) {current_strike_count} ihlale ulaştı. Bir sonraki susturma tipi: {user_data['next_mute_type']}. Uyarı mesajı silinmek üzere zamanlandı.")
-
-
-            if current_strike_count >= 3:
-                mute_duration = None
-
-                if user_data['next_mute_type'] == '5_min':
-                    mute_duration = datetime.timedelta(minutes=5)
-                    user_data['next_mute_type'] = '1_hr'
-                elif user_data['next_mute_type'] == '1_hr':
-                    mute_duration = datetime.timedelta(hours=1)
-                    user_data['next_mute_type'] = '1_hr_served'
-
-                if mute_duration:
-                    user_data['is_muted'] = True
-                    user_data['mute_until'] = now + mute_duration
-                    user_data['total_mutes_served'] += 1
-                    user_data['strike_count'] = 0
-
-                    logger.info(f"[{now}] Kullanıcı {display_name} ({user_id}) için {mute_duration} süreli susturma uygulandı. Yeni susturma tipi: {user_data['next_mute_type']}. İhlaller sıfırlandı.")
-
-                    # Ceza uygulandı mesajını yakala ve silinmesini zamanla
-                    punishment_message_text = f"ZeaLouS: {display_name}, ceza uygulandı!"
-                    sent_punishment_message = await update.message.reply_text(punishment_message_text)
-                    context.job_queue.run_once(
-                        delete_message_job, # commands.utils.delete_message_job kullanıldı
-                        15, # 15 saniye sonra silinecek
-                        data={'chat_id': sent_punishment_message.chat_id, 'message_id': sent_punishment_message.message_id}
-                    )
-
-                    try:
-                        # Kullanıcıya özel detaylı ceza bildirimi gönder (bu mesaj kalıcı olabilir)
-                        await context.bot.send_message(chat_id=user_id, text=f"ZeaLouS: Ceza aldınız. Süre: {mute_duration}. Kuralları gözden geçirin: /rules")
-                    except Exception as e:
-                        logger.warning(f"[{now}] Kullanıcı {display_name} ({user_id})'ye özel ceza mesajı gönderilirken hata oluştu: {e}")
-
-                    database.save_punishment_data(user_id, user_data)
-                    return
-            
-            database.save_punishment_data(user_id, user_data)
+        # Kullanıcının hızı aşıldıysa mesaj silinir ve taşkın başına bir ihlal verilir
+        if flood_verdict == flood.USER_FLOOD_STRIKE:
+            await apply_strike(update, context, user_data, display_name, 'flood',
+                               f'ZeaLouS: Çok hızlı mesaj gönderiyorsunuz {display_name}.\nİhlal sayınız: {user_data.strike_count + 1}')
+            return
+        if flood_verdict == flood.USER_FLOOD:
+            outbound.delete_nowait(update.message) # İhlal zaten verildi; taşkının kalan mesajları yalnızca silinir
             return
 
-        database.add_message_record(user_id)
+        matcher = await swear_filter.get_chat_matcher(chat_id)
+        if check_for_swears(user_id, message_content, matcher):
+            await apply_strike(update, context, user_data, display_name, 'swear',
+                               f'ZeaLouS: Mesajınızda yasaklı kelime tespit edildi {display_name}.\nYasaklı kelime sayınız: {user_data.strike_count + 1}')
+            return
+
+        if flood_verdict != flood.CHAT_FLOOD: # Sohbet genelindeki taşkın sırasında mesajlar istatistiklere yazılmaz
+            await ingest.record_message(chat_id, user_id, now)
 
 
 async def notes_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -183,31 +177,27 @@ async def reminders_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def statistics_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Detaylı istatistikleri butonlarla birlikte gönderir ve komut mesajını siler."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     chat_id = update.message.chat_id
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) /istatistik komutunu kullandı. Detaylı istatistikler gönderiliyor.")
+    logger.info("Kullanıcı %s (%s) /istatistik komutunu kullandı. Detaylı istatistikler gönderiliyor.", display_name, user_id)
     try:
         # İstatistik mesajı kalıcı kalacak (butonlar için)
         await stats.send_statistics_message(update, context, chat_id)
     except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) için istatistik mesajı gönderilirken hata oluştu: {e}")
+        logger.error("Kullanıcı %s (%s) için istatistik mesajı gönderilirken hata oluştu: %s", display_name, user_id, e)
         error_msg = f"ZeaLouS: Üzgünüm, istatistikler şu anda gösterilemiyor. Bir hata oluştu."
-        sent_error = await context.bot.send_message(chat_id=chat_id, text=error_msg)
-        context.job_queue.run_once(delete_message_job, 15, data={'chat_id': sent_error.chat_id, 'message_id': sent_error.message_id}) # Hata mesajı 15 saniye sonra silinecek
+        sent_error = await outbound.send_message(context.bot, chat_id, error_msg)
+        deletions.schedule_message(sent_error, 15) # Hata mesajı 15 saniye sonra silinecek
 
 
 async def game_time_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Oyun sunucusunun saatini gösterir ve komut mesajını siler."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     game_time = get_game_server_time()
-    sent_message = await update.message.reply_text(f"ZeaLouS: {game_time}")
-    context.job_queue.run_once(
-        delete_message_job,
-        15, # 15 saniye sonra silinecek olarak güncellendi
-        data={'chat_id': sent_message.chat_id, 'message_id': sent_message.message_id}
-    )
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {get_user_display_name_and_storage_name(update)[1]} /oyunsaati komutunu kullandı. Yanıt mesajı silinmek üzere zamanlandı.")
+    sent_message = await outbound.reply_text(update.message, f"ZeaLouS: {game_time}")
+    deletions.schedule_message(sent_message, 15)
+    logger.info("Kullanıcı %s /oyunsaati komutunu kullandı. Yanıt mesajı silinmek üzere zamanlandı.", get_user_display_name_and_storage_name(update)[1])
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -241,10 +231,13 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if is_admin(user_id):
         help_text += (
             "**🛡️ Yönetici Komutları:**\n"
-            "⚠️ /cezatemizle `[kullanıcı_id_veya_adı]` - Belirtilen kullanıcının tüm cezalarını sıfırlar.\n"
+            "⚠️ /cezatemizle `[kullanıcı_id_veya_adı]` - Belirtilen kullanıcının bu sohbetteki tüm cezalarını sıfırlar.\n"
+            "🚫 /yasakekle `<kelime>` - Kelimeyi bu sohbette yasaklı kelimelere ekler.\n"
+            "✅ /yasakkaldir `<kelime>` - Kelimeyi bu sohbette yasaklı kelimelerden çıkarır.\n"
+            "🔄 /istatistikdoldur - İstatistik özetlerini tüm mesaj geçmişinden yeniden oluşturur.\n"
         )
 
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+    await outbound.reply_text(update.message, help_text, parse_mode='Markdown')
 
 
 async def rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -255,64 +248,48 @@ async def rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "3. Yine 3 ihlalde 1 saat mute.\n"
         "4. 1 saatlik ceza sonunda tüm sayaçlar sıfırlanır."
     )
-    await update.message.reply_text(f"ZeaLouS:\n{rules_text}")
+    await outbound.reply_text(update.message, f"ZeaLouS:\n{rules_text}")
 
 
 async def hello_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """'Merhaba' görseli gönderir ve komut mesajını siler."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
     sent_photo_message = await send_greeting_image(update, context, 'hello.png', display_name, user_id, context.job_queue)
     if sent_photo_message: # Eğer görsel başarıyla gönderildiyse, onu silinmek üzere zamanla
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_photo_message.chat_id, 'message_id': sent_photo_message.message_id}
-        )
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} /hello komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).")
+        deletions.schedule_message(sent_photo_message, 15)
+    logger.info("Kullanıcı %s /hello komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).", display_name)
 
 
 async def goodmorning_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """'Günaydın' görseli gönderir ve komut mesajını siler."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
     sent_photo_message = await send_greeting_image(update, context, 'goodmorning.png', display_name, user_id, context.job_queue)
     if sent_photo_message:
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_photo_message.chat_id, 'message_id': sent_photo_message.message_id}
-        )
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} /goodmorning komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).")
+        deletions.schedule_message(sent_photo_message, 15)
+    logger.info("Kullanıcı %s /goodmorning komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).", display_name)
 
 
 async def goodnight_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """'İyi Geceler' görseli gönderir ve komut mesajını siler."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
     sent_photo_message = await send_greeting_image(update, context, 'goodnight.png', display_name, user_id, context.job_queue)
     if sent_photo_message:
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_photo_message.chat_id, 'message_id': sent_photo_message.message_id}
-        )
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} /goodnight komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).")
+        deletions.schedule_message(sent_photo_message, 15)
+    logger.info("Kullanıcı %s /goodnight komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).", display_name)
 
 
 async def welcome_command_svg(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """'Hoş Geldin' görseli gönderir ve komut mesajını siler."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
     caption = f"ZeaLouS: {display_name}, topluluğa hoş geldin!"
     sent_photo_message = await send_greeting_image(update, context, 'welcome.png', display_name, user_id, context.job_queue, caption=caption)
     if sent_photo_message:
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_photo_message.chat_id, 'message_id': sent_photo_message.message_id}
-        )
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} /welcome komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).")
+        deletions.schedule_message(sent_photo_message, 15)
+    logger.info("Kullanıcı %s /welcome komutunu kullandı. Görsel yanıtı silinmek üzere zamanlandı (eğer gönderildiyse).", display_name)
 
 
 # ✔ KOMUT ADI SADECE BURADA DEĞİŞTİRİLDİ
@@ -320,114 +297,212 @@ async def clear_punishments_command(update: Update, context: ContextTypes.DEFAUL
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
 
     if not is_admin(user_id):
-        await update.message.reply_text(f"ZeaLouS: {display_name}, bu komutu kullanamazsınız.")
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, bu komutu kullanamazsınız.")
         return
 
     if not context.args:
-        await update.message.reply_text(f"ZeaLouS: {display_name}, kullanıcı ID veya username belirtmeniz gerekir. Örn: `/cezatemizle 12345/username`")
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, kullanıcı ID veya username belirtmeniz gerekir. Örn: `/cezatemizle 12345/username`")
         return
 
     target_user_id = context.args[0]
-    target_display_name = database.get_user_display_names().get(target_user_id, f"Kullanıcı {target_user_id}")
+    target_display_name = (await async_database.get_user_display_names()).get(target_user_id, f"Kullanıcı {target_user_id}")
+
+    await punishments.clear_state(update.message.chat_id, target_user_id)
+    await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, {target_display_name} kullanıcısının bu sohbetteki tüm cezaları temizlendi.")
+
+
+async def add_forbidden_word_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Bu sohbete özel yasaklı kelime ekler (sadece yöneticiler)."""
+    user_id, display_name, _ = get_user_display_name_and_storage_name(update)
+
+    if not is_admin(user_id):
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, bu komutu kullanamazsınız.")
+        return
+
+    word = " ".join(context.args).strip().lower()
+    if not word:
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, eklenecek kelimeyi belirtmeniz gerekir. Örn: `/yasakekle kelime`")
+        return
 
-    database.clear_user_punishments(target_user_id)
-    await update.message.reply_text(f"ZeaLouS: {display_name}, {target_display_name} kullanıcısının tüm cezaları temizlendi.")
+    await swear_filter.add_chat_word(update.message.chat_id, word)
+    await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, '{word}' bu sohbette yasaklı kelimelere eklendi.")
+    logger.info("Kullanıcı %s (%s) sohbet %s için yasaklı kelime ekledi: '%s'", display_name, user_id, update.message.chat_id, word)
+
+
+async def remove_forbidden_word_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Bir kelimeyi bu sohbette yasaklı kelimelerden çıkarır (sadece yöneticiler)."""
+    user_id, display_name, _ = get_user_display_name_and_storage_name(update)
+
+    if not is_admin(user_id):
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, bu komutu kullanamazsınız.")
+        return
+
+    word = " ".join(context.args).strip().lower()
+    if not word:
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, çıkarılacak kelimeyi belirtmeniz gerekir. Örn: `/yasakkaldir kelime`")
+        return
+
+    await swear_filter.remove_chat_word(update.message.chat_id, word)
+    await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, '{word}' bu sohbette yasaklı kelimelerden çıkarıldı.")
+    logger.info("Kullanıcı %s (%s) sohbet %s için yasaklı kelime çıkardı: '%s'", display_name, user_id, update.message.chat_id, word)
+
+
+async def rebuild_rollups_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """İstatistik özet tablolarını mevcut mesaj geçmişinden yeniden oluşturur (sadece yöneticiler)."""
+    user_id, display_name, _ = get_user_display_name_and_storage_name(update)
+
+    if not is_admin(user_id):
+        await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, bu komutu kullanamazsınız.")
+        return
+
+    await ingest.flush() # Tamponda bekleyen mesajlar da özetlere dahil olsun
+    started = datetime.datetime.now()
+    message_count = await async_database.rebuild_rollups()
+    stats.invalidate()
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    await outbound.reply_text(update.message, f"ZeaLouS: {display_name}, istatistik özetleri yeniden oluşturuldu. {message_count} mesaj işlendi ({elapsed:.1f} sn).")
+    logger.info("Kullanıcı %s (%s) istatistik özetlerini yeniden oluşturdu: %s mesaj, %.1f sn.", display_name, user_id, message_count, elapsed)
 
 
 async def mehter_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Mehter Marşı MP3'ünü gönderir, komut mesajını siler ancak gönderilen sesi bırakır."""
-    await update.message.delete() # Kullanıcının komut mesajını sil
+    await outbound.delete(update.message) # Kullanıcının komut mesajını sil
     chat_id = update.message.chat_id
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) /mehter komutunu kullandı.")
+    logger.info("Kullanıcı %s (%s) /mehter komutunu kullandı.", display_name, user_id)
     
     try:
-        with open(MEHTER_MP3_PATH, 'rb') as audio_file:
-            await context.bot.send_audio(chat_id=chat_id, audio=audio_file, caption="ZeaLouS: Mehter Marşı çalıyor!")
-        logger.info(f"[{datetime.datetime.now()}] Mehter Marşı '{MEHTER_MP3_PATH}' başarıyla gönderildi ve sohbette bırakıldı.")
+        await media_cache.send_audio(context.bot, chat_id, MEHTER_MP3_PATH, caption="ZeaLouS: Mehter Marşı çalıyor!")
+        logger.info("Mehter Marşı '%s' başarıyla gönderildi ve sohbette bırakıldı.", MEHTER_MP3_PATH)
     except FileNotFoundError:
-        logger.error(f"[{datetime.datetime.now()}] Mehter Marşı dosyası bulunamadı: {MEHTER_MP3_PATH}")
-        sent_error_message = await update.message.reply_text("ZeaLouS: Mehter Marşı dosyası bulunamadı.")
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
+        logger.error("Mehter Marşı dosyası bulunamadı: %s", MEHTER_MP3_PATH)
+        sent_error_message = await outbound.reply_text(update.message, "ZeaLouS: Mehter Marşı dosyası bulunamadı.")
+        deletions.schedule_message(sent_error_message, 15)
     except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] Mehter Marşı gönderilirken hata oluştu: {e}")
-        sent_error_message = await update.message.reply_text("ZeaLouS: Mehter Marşı gönderilirken bir hata oluştu.")
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
+        logger.error("Mehter Marşı gönderilirken hata oluştu: %s", e)
+        sent_error_message = await outbound.reply_text(update.message, "ZeaLouS: Mehter Marşı gönderilirken bir hata oluştu.")
+        deletions.schedule_message(sent_error_message, 15)
 
 
 async def hucum_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Biti Hücum Marşı MP3'ünü gönderir, komut mesajını siler ancak gönderilen sesi bırakır."""
-    await update.message.delete()
+    await outbound.delete(update.message)
     chat_id = update.message.chat_id
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) /hucum komutunu kullandı.")
+    logger.info("Kullanıcı %s (%s) /hucum komutunu kullandı.", display_name, user_id)
     
     try:
-        with open(BITI_HUCUM_MP3_PATH, 'rb') as audio_file:
-            await context.bot.send_audio(chat_id=chat_id, audio=audio_file, caption="ZeaLouS: Hücum Marşı çalıyor!")
-        logger.info(f"[{datetime.datetime.now()}] Biti Hücum Marşı '{BITI_HUCUM_MP3_PATH}' başarıyla gönderildi ve sohbette bırakıldı.")
+        await media_cache.send_audio(context.bot, chat_id, BITI_HUCUM_MP3_PATH, caption="ZeaLouS: Hücum Marşı çalıyor!")
+        logger.info("Biti Hücum Marşı '%s' başarıyla gönderildi ve sohbette bırakıldı.", BITI_HUCUM_MP3_PATH)
     except FileNotFoundError:
-        logger.error(f"[{datetime.datetime.now()}] Biti Hücum Marşı dosyası bulunamadı: {BITI_HUCUM_MP3_PATH}")
-        sent_error_message = await update.message.reply_text("ZeaLouS: Biti Hücum Marşı dosyası bulunamadı.")
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
+        logger.error("Biti Hücum Marşı dosyası bulunamadı: %s", BITI_HUCUM_MP3_PATH)
+        sent_error_message = await outbound.reply_text(update.message, "ZeaLouS: Biti Hücum Marşı dosyası bulunamadı.")
+        deletions.schedule_message(sent_error_message, 15)
     except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] Biti Hücum Marşı gönderilirken hata oluştu: {e}")
-        sent_error_message = await update.message.reply_text("ZeaLouS: Biti Hücum Marşı gönderilirken bir hata oluştu.")
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
+        logger.error("Biti Hücum Marşı gönderilirken hata oluştu: %s", e)
+        sent_error_message = await outbound.reply_text(update.message, "ZeaLouS: Biti Hücum Marşı gönderilirken bir hata oluştu.")
+        deletions.schedule_message(sent_error_message, 15)
 
 
 async def cenk_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Cenk Marşı MP3'ünü gönderir, komut mesajını siler ancak gönderilen sesi bırakır."""
-    await update.message.delete()
+    await outbound.delete(update.message)
     chat_id = update.message.chat_id
     user_id, display_name, _ = get_user_display_name_and_storage_name(update)
-    logger.info(f"[{datetime.datetime.now()}] Kullanıcı {display_name} ({user_id}) /cenk komutunu kullandı.")
+    logger.info("Kullanıcı %s (%s) /cenk komutunu kullandı.", display_name, user_id)
     
     try:
-        with open(CENK_MP3_PATH, 'rb') as audio_file:
-            await context.bot.send_audio(chat_id=chat_id, audio=audio_file, caption="ZeaLouS: Cenk Marşı çalıyor!")
-        logger.info(f"[{datetime.datetime.now()}] Cenk Marşı '{CENK_MP3_PATH}' başarıyla gönderildi ve sohbette bırakıldı.")
+        await media_cache.send_audio(context.bot, chat_id, CENK_MP3_PATH, caption="ZeaLouS: Cenk Marşı çalıyor!")
+        logger.info("Cenk Marşı '%s' başarıyla gönderildi ve sohbette bırakıldı.", CENK_MP3_PATH)
     except FileNotFoundError:
-        logger.error(f"[{datetime.datetime.now()}] Cenk Marşı dosyası bulunamadı: {CENK_MP3_PATH}")
-        sent_error_message = await update.message.reply_text("ZeaLouS: Cenk Marşı dosyası bulunamadı.")
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
+        logger.error("Cenk Marşı dosyası bulunamadı: %s", CENK_MP3_PATH)
+        sent_error_message = await outbound.reply_text(update.message, "ZeaLouS: Cenk Marşı dosyası bulunamadı.")
+        deletions.schedule_message(sent_error_message, 15)
     except Exception as e:
-        logger.error(f"[{datetime.datetime.now()}] Cenk Marşı gönderilirken hata oluştu: {e}")
-        sent_error_message = await update.message.reply_text("ZeaLouS: Cenk Marşı gönderilirken bir hata oluştu.")
-        context.job_queue.run_once(
-            delete_message_job,
-            15, # 15 saniye sonra silinecek olarak güncellendi
-            data={'chat_id': sent_error_message.chat_id, 'message_id': sent_error_message.message_id}
-        )
+        logger.error("Cenk Marşı gönderilirken hata oluştu: %s", e)
+        sent_error_message = await outbound.reply_text(update.message, "ZeaLouS: Cenk Marşı gönderilirken bir hata oluştu.")
+        deletions.schedule_message(sent_error_message, 15)
 
 
-def main() -> None:
-    application = Application.builder().token(BOT_TOKEN).build()
+async def on_stop(application: Application) -> None:
+    """Bot dururken (bağlantı henüz kapanmadan) işçileri durdurur, kuyrukta bekleyen silme ve bildirimleri gönderir."""
+    await sharding.stop_workers()
+    await outbound.shutdown()
+    metrics.stop_server()
+
 
-    database.create_tables()
+async def on_shutdown(application: Application) -> None:
+    """Bot kapanırken yazma tamponunu boşaltır, bekleyen veritabanı işlerini bitirir ve bağlantıları kapatır."""
+    try:
+        await ingest.flush()
+        await ingest.flush_activity()
+    except Exception as e:
+        logger.error("Kapanışta yazma tamponu boşaltılamadı: %s. %s kayıt kaybedildi.", e, ingest.pending_count())
+    try:
+        await deletions.flush()
+    except Exception as e:
+        logger.error("Kapanışta bekleyen silme işlemleri yazılamadı: %s", e)
+    try:
+        await reminder_scheduler.flush_finished()
+    except Exception:
+        pass # Silinemeyen hatırlatıcılar bir sonraki açılışta tekrar gönderilir
+    await async_database.shutdown()
+
+
+def build_application(role: str = sharding.ROLE_SINGLE, request: BaseRequest | None = None) -> Application:
+    """
+    Veritabanını ve önbellekleri hazırlar; zamanlanmış işleri ve işleyicileri kaydedilmiş uygulamayı döndürür.
+    Çok süreçli çalışmada giriş süreci (ROLE_INGRESS) yalnızca güncellemeleri işçilere iletir ve tekil işleri
+    çalıştırır; işçiler (ROLE_WORKER) güncelleme almaz, kendi sohbetlerinin güncellemelerini işler.
+    `request` verilirse Bot API istekleri onunla gönderilir (ör. tools/replay_bench.py'deki sahte istemci).
+    """
+    builder = Application.builder().token(BOT_TOKEN).post_stop(on_stop).post_shutdown(on_shutdown)
+    if request is not None:
+        builder = builder.request(request)
+    if BOT_API_BASE_URL:
+        builder = builder.base_url(BOT_API_BASE_URL)
+    if role == sharding.ROLE_WORKER:
+        builder = builder.updater(None) # Güncellemeler giriş sürecinden gelir
+    elif role == sharding.ROLE_INGRESS:
+        builder = builder.post_init(sharding.start_control_loop)
+    if role != sharding.ROLE_INGRESS:
+        # Bir sohbette Telegram yanıtını bekleyen işleyici diğer sohbetlerin güncellemelerini bekletmesin
+        builder = builder.concurrent_updates(sharding.ChatOrderedUpdateProcessor(UPDATE_CONCURRENCY))
+    application = builder.build()
+
+    if METRICS_PORT:
+        metrics.start_server(METRICS_PORT + (sharding.worker_index() + 1 if sharding.is_worker() else 0))
+    metrics.register_gauge('bot_outbound_queue_depth', "Giden istek kuyruğunda bekleyen istek sayısı", outbound.queue_depth)
+    if METRICS_SUMMARY_INTERVAL_S:
+        application.job_queue.run_repeating(metrics.summary_job, interval=METRICS_SUMMARY_INTERVAL_S, first=METRICS_SUMMARY_INTERVAL_S)
+
+    if role != sharding.ROLE_WORKER:
+        database.create_tables() # Göçler yalnızca bir kez, işçiler başlamadan önce çalışır
+        # Tekil işler: yakında zamanı gelecek hatırlatıcıları yükle; yükleme aralığın yarısında tekrarlanır ki arada boşluk kalmasın
+        application.job_queue.run_repeating(reminder_scheduler.load_upcoming_reminders_job, interval=REMINDER_SCHEDULE_HORIZON_S / 2, first=0)
+        application.job_queue.run_repeating(reminder_scheduler.flush_finished_job, interval=REMINDER_REMOVE_FLUSH_INTERVAL_S)
+        application.job_queue.run_repeating(retention.retention_job, interval=RETENTION_INTERVAL_S, first=60)
+
+    if role == sharding.ROLE_INGRESS:
+        application.add_handler(TypeHandler(Update, sharding.forward_update))
+        # İşçide eklenen ve zamanı yakın olan hatırlatıcılar burada zamanlanır
+        sharding.on_control('reminder', lambda app, reminder: reminder_scheduler.schedule_if_due_soon(app.job_queue, reminder))
+        metrics.instrument_handlers(application)
+        log_pipeline.bind_handlers(application)
+        return application
+
+    punishments.load_cache()
+    deletions.load_pending()
     load_forbidden_words_from_file()
+    swear_filter.load_chat_override_index()
 
-    application.job_queue.run_repeating(check_reminders, interval=60, first=0)
+    application.job_queue.run_repeating(deletions.sweep_job, interval=DELETION_SWEEP_INTERVAL_S, first=0)
+    application.job_queue.run_repeating(ingest.flush_job, interval=INGEST_FLUSH_INTERVAL_MS / 1000)
+    application.job_queue.run_repeating(ingest.activity_flush_job, interval=USER_ACTIVITY_FLUSH_INTERVAL_S)
+    application.job_queue.run_repeating(swear_filter.watch_forbidden_words_job, interval=FORBIDDEN_WORDS_RELOAD_INTERVAL_S)
+    metrics.register_gauge('bot_ingest_pending_rows', "Yazma tamponunda bekleyen kayıt sayısı", ingest.pending_count)
+    metrics.register_gauge('bot_pending_deletions', "Silinmeyi bekleyen geçici mesaj sayısı", deletions.pending_count)
+    metrics.register_gauge('bot_flood_tracked_users', "Taşkın tespiti için bellekte tutulan kullanıcı kovası sayısı", flood.tracked_count)
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
@@ -442,6 +517,9 @@ def main() -> None:
     application.add_handler(CommandHandler("welcome", welcome_command_svg))
 
     application.add_handler(CommandHandler("cezatemizle", clear_punishments_command))
+    application.add_handler(CommandHandler("yasakekle", add_forbidden_word_command))
+    application.add_handler(CommandHandler("yasakkaldir", remove_forbidden_word_command))
+    application.add_handler(CommandHandler("istatistikdoldur", rebuild_rollups_command))
     application.add_handler(CommandHandler("mehter", mehter_command))
     application.add_handler(CommandHandler("hucum", hucum_command)) # Komut adı ve handler /hucum olarak değiştirildi
     application.add_handler(CommandHandler("cenk", cenk_command))
@@ -450,9 +528,55 @@ def main() -> None:
     application.add_handler(CallbackQueryHandler(stats.handle_stats_callback, pattern='^stats_'))
 
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    metrics.instrument_handlers(application)
+    log_pipeline.bind_handlers(application)
+    return application
+
+
+def _worker_main(index: int, count: int, update_queue, control_queue) -> None:
+    """İşçi sürecinin giriş noktası (sharding.start_workers tarafından yeni süreçte çağrılır)."""
+    sharding.configure_worker(index, count, control_queue)
+    outbound.set_global_rate_share(1 / (count + 1))
+    application = build_application(sharding.ROLE_WORKER)
+    sharding.run_worker(application, update_queue)
 
-    logger.info("Bot başlatılıyor...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+
+def run_webhook(application: Application) -> None:
+    """Güncellemeleri dahili HTTP sunucusuyla alır; webhook'u gizli anahtarla Telegram'a kaydeder."""
+    if not WEBHOOK_URL:
+        logger.error("Webhook modu için config.py içinde WEBHOOK_URL ayarlanmalıdır.")
+        return
+    secret_token = WEBHOOK_SECRET_TOKEN
+    if not secret_token:
+        secret_token = secrets.token_urlsafe(32)
+        logger.warning("WEBHOOK_SECRET_TOKEN ayarlanmamış; bu açılış için rastgele bir gizli anahtar üretildi.")
+
+    logger.info("Bot webhook modunda başlatılıyor: %s:%s/%s", WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_URL_PATH)
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_URL_PATH,
+        webhook_url=WEBHOOK_URL,
+        secret_token=secret_token,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=ALLOWED_UPDATES
+    )
+
+
+def main() -> None:
+    if WORKER_PROCESSES > 0:
+        # Genel hız sınırı giriş süreci ve işçiler arasında paylaştırılır
+        outbound.set_global_rate_share(1 / (WORKER_PROCESSES + 1))
+        application = build_application(sharding.ROLE_INGRESS)
+        sharding.start_workers(WORKER_PROCESSES, _worker_main)
+    else:
+        application = build_application()
+
+    if BOT_MODE == "webhook":
+        run_webhook(application)
+    else:
+        logger.info("Bot başlatılıyor...")
+        application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":
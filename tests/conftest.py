@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands import database
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Veritabanı modülünü geçici bir dosyaya yönlendirir; test sonunda bağlantılar kapatılır."""
+    database.close_connections()
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    yield database
+    database.close_connections()
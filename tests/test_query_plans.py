@@ -0,0 +1,34 @@
+import pytest
+
+from commands import database
+
+
+def _assert_uses_index(plans: dict[str, tuple[bool, str]]):
+    assert set(plans) == set(database.HOT_QUERIES)
+    for name, (uses_index, plan) in plans.items():
+        table_accesses = [detail for detail in plan.split('; ') if detail.startswith(('SCAN', 'SEARCH'))]
+        assert uses_index, f"{name} indeks kullanmıyor: {plan}"
+        assert table_accesses, f"{name} için tablo erişimi bulunamadı: {plan}"
+        assert not any(detail.startswith('SCAN') for detail in table_accesses), f"{name} tablo taraması yapıyor: {plan}"
+
+
+def test_hot_queries_use_indexes_on_fresh_database(temp_db):
+    temp_db.run_migrations()
+    _assert_uses_index(temp_db.check_hot_query_plans())
+
+
+@pytest.mark.parametrize('legacy_version', [5, 6])
+def test_hot_queries_use_indexes_after_upgrade(temp_db, monkeypatch, legacy_version):
+    # Eski sürümde kayıt birikmiş bir veritabanı güncel şemaya yükseltilir
+    migrations = temp_db.MIGRATIONS
+    monkeypatch.setattr(temp_db, 'MIGRATIONS', migrations[:legacy_version])
+    temp_db.run_migrations()
+    writer = temp_db._get_writer()
+    writer.execute("INSERT INTO messages (user_id, timestamp) VALUES ('1', '2026-01-01 10:00:00'), ('2', NULL)")
+    writer.execute("INSERT INTO punishments (user_id, strike_count) VALUES ('1', 2)")
+    writer.commit()
+
+    monkeypatch.setattr(temp_db, 'MIGRATIONS', migrations)
+    monkeypatch.setattr(temp_db, 'LEGACY_CHAT_ID', -1001)
+    temp_db.run_migrations()
+    _assert_uses_index(temp_db.check_hot_query_plans())
@@ -0,0 +1,29 @@
+import pytest
+
+from commands.swear_filter import SwearMatch, SwearMatcher
+
+
+@pytest.mark.parametrize('text', ['hey cock suck now', 'hey cock   suck now', 'hey cock,\nsuck now'])
+def test_multi_word_entry_split_across_chunks(text):
+    matcher = SwearMatcher(['cock suck', 'sik'])
+    # Ön eleme önbelleği ısınmışken de eşleşme bulunmalı
+    assert matcher.find('hey there now') == []
+    start = text.index('cock')
+    assert matcher.find(text) == [SwearMatch('cock suck', start, text.index('suck') + len('suck'))]
+    assert matcher.find('cock here') == []
+    assert matcher.find('suck here') == []
+
+
+def test_added_multi_word_entry_invalidates_clean_chunks():
+    matcher = SwearMatcher(['sik'])
+    assert matcher.find('çok kötü söz') == []
+    matcher.add_word('kötü söz')
+    assert matcher.find('çok kötü söz') == [SwearMatch('kötü söz', 4, 12)]
+    matcher.remove_word('kötü söz')
+    assert matcher.find('çok kötü söz') == []
+
+
+def test_single_letters_merge_across_chunks():
+    matcher = SwearMatcher(['sik'])
+    assert matcher.find('merhaba dostum') == []
+    assert matcher.find('merhaba s i k dostum') == [SwearMatch('sik', 8, 13)]
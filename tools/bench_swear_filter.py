@@ -0,0 +1,173 @@
+"""
+Küfür filtresi performans karşılaştırması.
+
+Eski kelime bazlı kontrol (re.findall + set) ile derlenmiş SwearMatcher'ın mesaj başına
+işleme hızını üç mesaj kümesinde ölçer:
+
+- tekrarlı: birkaç düzine sık kelimeden oluşan mesajlar (önbellekler neredeyse her zaman isabet eder)
+- çeşitli: rastgele üretilmiş 20.000 kelimelik bir sözlükten Zipf dağılımıyla seçilen kelimeler, noktalama,
+  büyük harf, sayı ve tek harfler (gerçek sohbet metnine yakın)
+- soğuk: her kelimesi yalnızca bir kez geçen mesajlar; ölçümden önce bütün önbellekler boşaltılır
+  (önbelleksiz, en kötü durum mesaj başına maliyet)
+
+Son olarak tek bir uzun mesajda kelime başına süre farklı uzunluklarda ölçülür (doğrusallık kontrolü).
+
+Proje kök dizininden çalıştırın:
+
+    python tools/bench_swear_filter.py [mesaj_sayısı]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from commands import swear_filter # noqa: E402
+
+CLEAN_WORDS = [
+    "merhaba", "bugün", "akşam", "oyun", "sunucu", "saat", "kaçta", "geliyor", "musun", "tamam",
+    "sık", "sık", "çok", "şık", "güzel", "arkadaşlar", "hücum", "saldırı", "savunma", "lonca",
+]
+OBFUSCATED = ["s.i.k", "siiiik", "S1K", "a.q", "ѕik", "AMCIK"]
+
+
+def legacy_check(words_set: set, message_content: str) -> bool:
+    """Önceki sürümdeki kontrol: küçük harfe çevir, kelimelere ayır, sette ara."""
+    words = re.findall(r'\b\w+\b', message_content.lower())
+    return any(word in words_set for word in words)
+
+
+def _insert_swear(rng: random.Random, words: list[str], forbidden: list[str], swear_ratio: float):
+    if rng.random() < swear_ratio:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(forbidden + OBFUSCATED))
+
+
+def build_messages(count: int, swear_ratio: float = 0.1) -> list[str]:
+    """Tekrarlı küme: CLEAN_WORDS'ten seçilen kelimeler."""
+    rng = random.Random(42)
+    forbidden = sorted(swear_filter._forbidden_words_set)
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(CLEAN_WORDS) for _ in range(rng.randint(3, 25))]
+        _insert_swear(rng, words, forbidden, swear_ratio)
+        messages.append(" ".join(words))
+    return messages
+
+
+SYLLABLES = [c + v for c in "bcçdfghjklmnprsştvyz" for v in "aeıioöuü"] + list("aeıioöuü")
+PUNCTUATION = ["", "", "", "", ",", ".", "!", "?", "...", ":)"]
+
+
+def _random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+
+def _decorate(rng: random.Random, word: str) -> str:
+    """Kelimeye ara sıra büyük harf, sayı veya noktalama ekler."""
+    roll = rng.random()
+    if roll < 0.05:
+        word = word.upper()
+    elif roll < 0.15:
+        word = word.capitalize()
+    elif roll < 0.18:
+        word = str(rng.randint(0, 2030))
+    elif roll < 0.20:
+        word = rng.choice("abcdeoş") # Tek harfler (ör. "o", "a") ön elemeden geçemez
+    return word + rng.choice(PUNCTUATION)
+
+
+def build_varied_messages(count: int, swear_ratio: float = 0.1, vocabulary_size: int = 20000) -> list[str]:
+    """Çeşitli küme: rastgele sözlükten Zipf dağılımıyla (s=1) seçilen kelimeler."""
+    rng = random.Random(43)
+    forbidden = sorted(swear_filter._forbidden_words_set)
+    vocabulary = [_random_word(rng) for _ in range(vocabulary_size)]
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+    messages = []
+    for _ in range(count):
+        words = [_decorate(rng, word) for word in rng.choices(vocabulary, weights, k=rng.randint(1, 30))]
+        _insert_swear(rng, words, forbidden, swear_ratio)
+        messages.append(" ".join(words))
+    return messages
+
+
+def build_cold_messages(count: int, swear_ratio: float = 0.1) -> list[str]:
+    """Soğuk küme: her kelime benzersizdir (5-8 hece), önbellek hiç isabet etmez."""
+    rng = random.Random(44)
+    forbidden = sorted(swear_filter._forbidden_words_set)
+    seen = set()
+
+    def unique_word() -> str:
+        while True:
+            word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(5, 8)))
+            if word not in seen:
+                seen.add(word)
+                return word
+
+    messages = []
+    for _ in range(count):
+        words = [_decorate(rng, unique_word()) for _ in range(rng.randint(1, 30))]
+        _insert_swear(rng, words, forbidden, swear_ratio)
+        messages.append(" ".join(words))
+    return messages
+
+
+def clear_caches():
+    """Normalizasyon ve ön eleme önbelleklerini boşaltır."""
+    swear_filter._token_cache.clear()
+    swear_filter._char_cache.clear()
+    if swear_filter._matcher is not None:
+        swear_filter._matcher._clean_chunks.clear()
+        swear_filter._matcher._isolated_chunks.clear()
+
+
+def measure(label: str, func, messages: list[str]) -> float:
+    start = time.perf_counter()
+    hits = sum(1 for message in messages if func(message))
+    elapsed = time.perf_counter() - start
+    rate = len(messages) / elapsed
+    print(f"{label:<22} {rate:>12,.0f} mesaj/sn  {elapsed / len(messages) * 1e6:>8.2f} µs/mesaj  {hits} eşleşme")
+    return rate
+
+
+def measure_scaling(lengths=(1000, 4000, 16000)):
+    """Tek bir uzun mesajda kelime başına süreyi ölçer; süre mesaj uzunluğuyla doğrusal artmalıdır."""
+    rng = random.Random(45)
+    forbidden = sorted(swear_filter._forbidden_words_set)
+    print("\nuzunluk ölçeklenmesi (soğuk önbellek, %10 yasaklı kelime)")
+    for length in lengths:
+        words = [_decorate(rng, _random_word(rng)) for _ in range(length)]
+        for _ in range(length // 10):
+            words[rng.randrange(length)] = rng.choice(forbidden)
+        message = " ".join(words)
+        clear_caches()
+        start = time.perf_counter()
+        found = len(swear_filter.find_swears(message))
+        elapsed = time.perf_counter() - start
+        print(f"{length:>6} kelime  {elapsed * 1e3:>8.1f} ms  {elapsed / length * 1e6:>6.2f} µs/kelime  {found} eşleşme")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    swear_filter.load_forbidden_words_from_file()
+    words_set = swear_filter._forbidden_words_set
+    corpora = [
+        ("tekrarlı", build_messages(count)),
+        ("çeşitli", build_varied_messages(count)),
+        ("soğuk", build_cold_messages(count)),
+    ]
+
+    print(f"{count} mesaj, {len(words_set)} yasaklı kelime")
+    for name, messages in corpora:
+        average_words = sum(len(message.split()) for message in messages) / len(messages)
+        print(f"\n{name} ({average_words:.1f} kelime/mesaj)")
+        legacy_rate = measure("eski (re + set)", lambda message: legacy_check(words_set, message), messages)
+        clear_caches() # Her küme boş önbellekle başlar; soğuk kümede hiçbir kelime tekrar etmez
+        matcher_rate = measure("SwearMatcher", lambda message: bool(swear_filter.find_swears(message)), messages)
+        print(f"oran (SwearMatcher / eski): {matcher_rate / legacy_rate:.2f}")
+    measure_scaling()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Mevcut veritabanı dosyasını auto_vacuum=INCREMENTAL moduna dönüştürür.
+
+Bu moddan önce oluşturulmuş dosyalarda saklama işi silinen kayıtların yerini dosyadan geri veremez. Dönüştürme
+tam bir VACUUM gerektirir: bütün dosya yeniden yazılır, süre dosya boyutuyla artar ve bu sırada dosya kadar boş
+disk alanı gerekir. Bu yüzden bot durdurulmuşken, proje kök dizininden çalıştırın:
+
+    python tools/convert_auto_vacuum.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import DB_PATH # noqa: E402
+from commands import database # noqa: E402
+
+
+def main():
+    if not os.path.exists(DB_PATH):
+        print(f"Veritabanı bulunamadı: {DB_PATH}")
+        return 1
+    started = time.perf_counter()
+    size_before = os.path.getsize(DB_PATH)
+    try:
+        converted = database.convert_to_incremental_vacuum()
+    finally:
+        database.close_connections()
+    if not converted:
+        print("Veritabanı zaten auto_vacuum=INCREMENTAL modunda.")
+        return 0
+    print(
+        f"Veritabanı dönüştürüldü ({time.perf_counter() - started:.1f} sn): "
+        f"{size_before / 1024 / 1024:.1f} MB -> {os.path.getsize(DB_PATH) / 1024 / 1024:.1f} MB"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
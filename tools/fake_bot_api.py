@@ -0,0 +1,245 @@
+"""
+Yük testi için yerel, sahte Telegram Bot API sunucusu.
+
+Botun kullandığı metotları (getMe, getUpdates, sendMessage, deleteMessage, deleteMessages, editMessageText,
+sendPhoto, sendAudio, answerCallbackQuery) gerçek HTTP üzerinden yanıtlar. Her isteğe ayarlanabilir gecikme
+eklenebilir ve mesaj gönderen/düzenleyen/silen isteklerin bir kısmı 429 (RetryAfter) ile reddedilebilir.
+getUpdates uzun sorgulamayı (timeout) destekler; güncellemeler push_update() ile kuyruğa eklenir.
+
+Bot bu sunucuya config.py'deki BOT_API_BASE_URL (ortam değişkeni) ile yönlendirilir. Yük üretimi için
+tools/load_test.py kullanılır; tek başına çalıştırıldığında sunucu yalnızca istek istatistiklerini yazar:
+
+    python tools/fake_bot_api.py --port 8081 --latency-ms 40 --error-429-rate 0.01
+    BOT_API_BASE_URL=http://127.0.0.1:8081/bot BOT_DB_PATH=/tmp/yuk.db python main.py
+"""
+import argparse
+import email.parser
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+BOT_USER = {'id': 8154263807, 'is_bot': True, 'first_name': 'ZeaLouS', 'username': 'zealous_load_bot'}
+
+# Gecikme ve 429 yalnızca Telegram'ın hız sınırına tabi metotlara uygulanır
+LIMITED_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendAudio', 'editMessageText', 'deleteMessage', 'deleteMessages', 'answerCallbackQuery'
+}
+MAX_UPDATES_PER_RESPONSE = 100
+
+
+def _decode_value(value: str):
+    """PTB metin olmayan parametreleri JSON olarak gönderir; metinler olduğu gibi gelir."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def parse_parameters(content_type: str, body: bytes) -> dict:
+    """İstek gövdesindeki parametreleri (form, multipart veya JSON) sözlüğe çevirir. Yüklenen dosyalar atlanır."""
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+    if content_type.startswith('multipart/form-data'):
+        message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        parameters = {}
+        for part in message.get_payload():
+            if part.get_filename() is None:
+                parameters[part.get_param('name', header='content-disposition')] = _decode_value(part.get_payload(decode=True).decode('utf-8'))
+        return parameters
+    return {key: _decode_value(value) for key, value in urllib.parse.parse_qsl(body.decode('utf-8'))}
+
+
+class FakeBotApi:
+    """
+    Sahte Bot API sunucusu. İstekler ayrı thread'lerde yanıtlanır; sayaçlar `_lock` altında tutulur.
+    `on_request` verilirse hız sınırına tabi her başarılı istekte (metot, parametreler, zaman) ile çağrılır.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8081, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_429_rate: float = 0.0, retry_after: int = 1, seed: int | None = None,
+                 on_request: Callable[[str, dict, float], None] | None = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_429_rate = error_429_rate
+        self.retry_after = retry_after
+        self.on_request = on_request
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._updates_available = threading.Condition(self._lock)
+        self._updates: deque[dict] = deque()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(50_000_000)
+        self._file_ids = itertools.count(1)
+        self.requests = Counter() # Metot -> istek sayısı (429 ile reddedilenler dahil)
+        self.rate_limited = Counter() # Metot -> 429 ile reddedilen istek sayısı
+        self.updates_pushed = 0
+        self.updates_acknowledged = 0 # Botun offset ile onayladığı (aldığı) güncelleme sayısı
+        self.first_poll = threading.Event() # Bot ilk getUpdates isteğini yaptığında işaretlenir
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-bot-api', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._updates_available:
+            self._updates_available.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def push_update(self, update: dict) -> int:
+        """Güncellemeyi getUpdates kuyruğuna ekler ve verilen update_id'yi döndürür."""
+        with self._updates_available:
+            update_id = next(self._update_ids)
+            self._updates.append(dict(update, update_id=update_id))
+            self.updates_pushed += 1
+            self._updates_available.notify_all()
+        return update_id
+
+    def pending_updates(self) -> int:
+        with self._lock:
+            return len(self._updates)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'rate_limited': dict(self.rate_limited),
+                'updates_pushed': self.updates_pushed,
+                'updates_acknowledged': self.updates_acknowledged,
+            }
+
+    def _get_updates(self, parameters: dict) -> list[dict]:
+        offset = int(parameters.get('offset') or 0)
+        limit = min(int(parameters.get('limit') or MAX_UPDATES_PER_RESPONSE), MAX_UPDATES_PER_RESPONSE)
+        deadline = time.monotonic() + float(parameters.get('timeout') or 0)
+        self.first_poll.set()
+        with self._updates_available:
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+                self.updates_acknowledged += 1
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._server_running():
+                    return []
+                self._updates_available.wait(remaining)
+            return list(itertools.islice(self._updates, limit))
+
+    def _server_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _message(self, parameters: dict, **content) -> dict:
+        chat_id = int(parameters.get('chat_id', 0))
+        if chat_id < 0:
+            chat = {'id': chat_id, 'type': 'supergroup', 'title': 'Yük Testi'}
+        else:
+            chat = {'id': chat_id, 'type': 'private', 'first_name': 'Yük'}
+        message_id = int(parameters.get('message_id') or next(self._message_ids))
+        return dict({'message_id': message_id, 'date': int(time.time()), 'chat': chat, 'from': BOT_USER}, **content)
+
+    def _result(self, method: str, parameters: dict):
+        if method == 'getMe':
+            return dict(BOT_USER, can_join_groups=True, can_read_all_group_messages=False, supports_inline_queries=False)
+        if method == 'getUpdates':
+            return self._get_updates(parameters)
+        if method in ('sendMessage', 'editMessageText'):
+            return self._message(parameters, text=str(parameters.get('text', '')))
+        if method in ('sendPhoto', 'sendAudio'):
+            file_id = f"load_{method}_{next(self._file_ids)}"
+            media = {'file_id': file_id, 'file_unique_id': file_id}
+            if method == 'sendPhoto':
+                return self._message(parameters, photo=[dict(media, width=512, height=512)])
+            return self._message(parameters, audio=dict(media, duration=1))
+        return True # deleteMessage(s), answerCallbackQuery, deleteWebhook vb.
+
+    def handle(self, method: str, parameters: dict) -> tuple[int, dict]:
+        """Bir Bot API çağrısını yanıtlar: (HTTP durum kodu, JSON gövdesi)."""
+        limited = method in LIMITED_METHODS
+        with self._lock:
+            self.requests[method] += 1
+            throttled = limited and self._rng.random() < self.error_429_rate
+            if throttled:
+                self.rate_limited[method] += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000 if limited else 0.0
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            return 429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {self.retry_after}",
+                'parameters': {'retry_after': self.retry_after},
+            }
+        result = self._result(method, parameters)
+        if limited and self.on_request is not None:
+            self.on_request(method, parameters, time.monotonic())
+        return 200, {'ok': True, 'result': result}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Bağlantılar açık tutulur (httpx bağlantı havuzu)
+
+    def _respond(self):
+        # Yol: /bot<token>/<metot>
+        method = self.path.rsplit('/', 1)[-1].split('?', 1)[0]
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        parameters = parse_parameters(self.headers.get('Content-Type', ''), body)
+        if '?' in self.path:
+            parameters.update((key, _decode_value(value)) for key, value in urllib.parse.parse_qsl(self.path.split('?', 1)[1]))
+        status, payload = self.server.api.handle(method, parameters)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass # Her isteği yazmak ölçümü bozar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel sahte Telegram Bot API sunucusu.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Her isteğe eklenen ortalama gecikme (ms)")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Gecikmeye eklenen ± rastgele sapma (ms)")
+    parser.add_argument('--error-429-rate', type=float, default=0.0, help="429 ile reddedilecek isteklerin oranı (0-1)")
+    parser.add_argument('--retry-after', type=int, default=1, help="429 yanıtlarındaki retry_after (sn)")
+    args = parser.parse_args()
+
+    api = FakeBotApi(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_429_rate, args.retry_after)
+    api.start()
+    print(f"Sahte Bot API {api.base_url} adresinde dinliyor. Durdurmak için Ctrl+C.")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(api.snapshot(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Sahte Bot API sunucusuna karşı uçtan uca yük testi.
+
+tools/fake_bot_api.py'deki sunucu bu süreçte başlatılır ve gerçek bot (main.py) ayrı bir süreçte, BOT_API_BASE_URL
+ile bu sunucuya yönlendirilerek geçici bir veritabanıyla çalıştırılır. Belirtilen hızda (açık döngü) mesaj ve komut
+güncellemeleri getUpdates kuyruğuna eklenir. Üretim bittiğinde bir işaret komutu gönderilir; bot güncellemeleri
+sırayla işlediği için işaretin yanıtı geldiğinde önceki bütün güncellemeler işlenmiş olur.
+
+Raporlanan değerler: sürdürülebilen güncelleme/sn, metot başına giden istek hızı, 429 ve hata oranı, yanıt üreten
+güncellemelerin uçtan uca gecikmesi (p50/p95/p99). Botun çıktısı geçici dizindeki bot.log dosyasına yazılır.
+Proje kök dizininden çalıştırın:
+
+    python tools/load_test.py --rate 50 --duration 30
+    python tools/load_test.py --rate 200 --duration 60 --latency-ms 40 --jitter-ms 20 --error-429-rate 0.01
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import FORBIDDEN_WORDS_FILE # noqa: E402
+from fake_bot_api import FakeBotApi # noqa: E402
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+MARKER_CHAT_ID = -1009999999999 # İşaret komutu için ayrı sohbet; sohbet hız sınırı önceki yanıtlarla dolmamış olur
+CLEAN_WORDS = [
+    "merhaba", "bugün", "akşam", "oyun", "sunucu", "saat", "kaçta", "geliyor", "musun", "tamam",
+    "çok", "güzel", "arkadaşlar", "hücum", "saldırı", "savunma", "lonca", "sefer", "kale", "yarın",
+]
+COMMANDS = ["/start", "/help", "/rules", "/oyunsaati", "/istatistik"]
+
+
+def load_forbidden_words() -> list[str]:
+    try:
+        with open(FORBIDDEN_WORDS_FILE, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')] or ["yasakli"]
+    except FileNotFoundError:
+        return ["yasakli"]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class LoadGenerator:
+    """Güncellemeleri üretir ve botun yanıtlarını (reply_parameters ile) gönderilen mesajlarla eşleştirir."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.forbidden = load_forbidden_words()
+        self.chat_ids = [-1001000000000 - i for i in range(args.chats)]
+        self._message_ids = iter(range(1, 2**31))
+        self._lock = threading.Lock()
+        self._sent_at: dict[tuple[int, int], float] = {} # (sohbet, mesaj) -> güncellemenin eklendiği an
+        self.latencies: list[float] = []
+        self.marker_replied = threading.Event()
+        self._marker_key: tuple[int, int] | None = None
+
+    def on_request(self, method: str, parameters: dict, now: float):
+        """Sahte sunucudan çağrılır: botun bir mesaja verdiği ilk yanıtın gecikmesini kaydeder."""
+        reply = parameters.get('reply_parameters')
+        if method != 'sendMessage' or not isinstance(reply, dict):
+            return
+        key = (int(parameters.get('chat_id', 0)), int(reply.get('message_id', 0)))
+        with self._lock:
+            sent_at = self._sent_at.pop(key, None)
+            if sent_at is not None:
+                self.latencies.append(now - sent_at)
+        if key == self._marker_key:
+            self.marker_replied.set()
+
+    def _message_update(self, chat_id: int, user_id: int, text: str) -> dict:
+        message_id = next(self._message_ids)
+        message = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'supergroup', 'title': 'Yük Testi'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'Oyuncu{user_id % 1000}', 'username': f'oyuncu_{user_id}'},
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'message': message}
+
+    def next_update(self) -> dict:
+        chat_id = self.rng.choice(self.chat_ids)
+        user_id = 2_000_000 + self.rng.randrange(self.args.users)
+        roll = self.rng.random()
+        words = [self.rng.choice(CLEAN_WORDS) for _ in range(self.rng.randint(3, 20))]
+        if roll < self.args.command_ratio:
+            return self._message_update(chat_id, user_id, self.rng.choice(COMMANDS))
+        if roll < self.args.command_ratio + self.args.swear_ratio:
+            words.insert(self.rng.randrange(len(words) + 1), self.rng.choice(self.forbidden))
+        return self._message_update(chat_id, user_id, " ".join(words))
+
+    def push(self, api: FakeBotApi, update: dict, marker: bool = False):
+        message = update['message']
+        key = (message['chat']['id'], message['message_id'])
+        with self._lock:
+            self._sent_at[key] = time.monotonic()
+            if marker:
+                self._marker_key = key
+        api.push_update(update)
+
+    def push_marker(self, api: FakeBotApi):
+        self.push(api, self._message_update(MARKER_CHAT_ID, 1_999_999, "/oyunsaati"), marker=True)
+
+
+def start_bot(api: FakeBotApi, work_dir: str) -> tuple[subprocess.Popen, str]:
+    """Botu sahte sunucuya yönlendirilmiş ve geçici veritabanıyla ayrı bir süreçte başlatır."""
+    env = dict(os.environ, BOT_API_BASE_URL=api.base_url, BOT_DB_PATH=os.path.join(work_dir, 'bot_data.db'))
+    log_path = os.path.join(work_dir, 'bot.log')
+    log_file = open(log_path, 'w', encoding='utf-8')
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'main.py')], cwd=ROOT_DIR, env=env,
+                               stdout=log_file, stderr=subprocess.STDOUT)
+    log_file.close()
+    return process, log_path
+
+
+def stop_bot(process: subprocess.Popen, timeout: float) -> int | None:
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return process.returncode
+
+
+def run(args) -> dict:
+    generator = LoadGenerator(args)
+    api = FakeBotApi(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                     error_429_rate=args.error_429_rate, retry_after=args.retry_after, seed=args.seed,
+                     on_request=generator.on_request)
+    api.start()
+    work_dir = tempfile.mkdtemp(prefix='load_test_')
+    process, log_path = start_bot(api, work_dir)
+    try:
+        if not api.first_poll.wait(args.startup_timeout):
+            raise RuntimeError(f"Bot {args.startup_timeout} sn içinde getUpdates isteği yapmadı. Çıktı: {log_path}")
+
+        total = int(args.rate * args.duration)
+        started = time.monotonic()
+        before = api.snapshot()
+        for index in range(total):
+            delay = started + index / args.rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            generator.push(api, generator.next_update())
+            if process.poll() is not None:
+                raise RuntimeError(f"Bot yük altında kapandı (çıkış kodu {process.returncode}). Çıktı: {log_path}")
+        generated_in = time.monotonic() - started
+        backlog = api.pending_updates()
+
+        generator.push_marker(api)
+        drained = generator.marker_replied.wait(args.drain_timeout)
+        elapsed = time.monotonic() - started
+        after = api.snapshot()
+    finally:
+        exit_code = stop_bot(process, args.stop_timeout)
+        api.stop()
+
+    requests = Counter(after['requests'])
+    requests.subtract(before['requests'])
+    rate_limited = Counter(after['rate_limited'])
+    rate_limited.subtract(before['rate_limited'])
+    outbound = {method: count for method, count in requests.items() if method not in ('getUpdates', 'getMe', 'deleteWebhook') and count > 0}
+    outbound_total = sum(outbound.values())
+    latencies = sorted(generator.latencies)
+    return {
+        'offered_updates_per_s': args.rate,
+        'updates': total,
+        'generation_s': round(generated_in, 2),
+        'unfetched_backlog_at_end': backlog,
+        'drained': drained,
+        'sustained_updates_per_s': round(total / elapsed, 1) if drained else None,
+        'elapsed_s': round(elapsed, 2),
+        'outbound_requests': dict(sorted(outbound.items())),
+        'outbound_requests_per_s': round(outbound_total / elapsed, 1),
+        'rate_limited_429': sum(rate_limited.values()),
+        'error_rate': round(sum(rate_limited.values()) / outbound_total, 4) if outbound_total else 0.0,
+        'replies': len(latencies),
+        'reply_latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 1),
+            'p95': round(percentile(latencies, 0.95) * 1000, 1),
+            'p99': round(percentile(latencies, 0.99) * 1000, 1),
+        },
+        'bot_exit_code': exit_code,
+        'bot_log': log_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Botu sahte Bot API sunucusuna karşı yük altında çalıştırır.")
+    parser.add_argument('--rate', type=float, default=50, help="Saniyede üretilecek güncelleme sayısı")
+    parser.add_argument('--duration', type=float, default=30, help="Yük üretim süresi (sn)")
+    parser.add_argument('--chats', type=int, default=50, help="Güncellemelerin dağıtılacağı grup sayısı")
+    parser.add_argument('--users', type=int, default=1000, help="Farklı kullanıcı sayısı")
+    parser.add_argument('--swear-ratio', type=float, default=0.05, help="Yasaklı kelime içeren mesaj oranı")
+    parser.add_argument('--command-ratio', type=float, default=0.05, help="Komut oranı")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Sahte sunucuda istek başına ortalama gecikme (ms)")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Gecikmeye eklenen ± rastgele sapma (ms)")
+    parser.add_argument('--error-429-rate', type=float, default=0.0, help="429 ile reddedilecek isteklerin oranı (0-1)")
+    parser.add_argument('--retry-after', type=int, default=1, help="429 yanıtlarındaki retry_after (sn)")
+    parser.add_argument('--port', type=int, default=8081, help="Sahte sunucunun portu")
+    parser.add_argument('--seed', type=int, default=42, help="Rastgele üretim tohumu")
+    parser.add_argument('--startup-timeout', type=float, default=60, help="Botun açılması için beklenecek süre (sn)")
+    parser.add_argument('--drain-timeout', type=float, default=120, help="Üretim bittikten sonra işlenmenin bitmesi için beklenecek süre (sn)")
+    parser.add_argument('--stop-timeout', type=float, default=30, help="Botun kapanması için beklenecek süre (sn)")
+    parser.add_argument('--json', metavar='DOSYA', help="Sonuçları bu dosyaya JSON olarak kaydet")
+    args = parser.parse_args()
+
+    result = run(args)
+    latency = result['reply_latency_ms']
+    print(f"Önerilen yük: {args.rate:g} güncelleme/sn, {result['updates']} güncelleme ({result['generation_s']} sn)")
+    if result['drained']:
+        print(f"Sürdürülen: {result['sustained_updates_per_s']} güncelleme/sn ({result['elapsed_s']} sn)")
+    else:
+        print(f"Bot {args.drain_timeout:g} sn içinde kuyruğu bitiremedi; önerilen yük kapasitenin üstünde.")
+    print(f"Üretim sonunda alınmamış güncelleme: {result['unfetched_backlog_at_end']}")
+    print(f"Giden istek: {result['outbound_requests_per_s']}/sn {result['outbound_requests']}")
+    print(f"429: {result['rate_limited_429']} (hata oranı %{result['error_rate'] * 100:.2f})")
+    print(f"Yanıt gecikmesi ({result['replies']} yanıt): p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms")
+    print(f"Bot çıkış kodu: {result['bot_exit_code']}, çıktı: {result['bot_log']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if result['drained'] else 1)
+
+
+if __name__ == "__main__":
+    main()
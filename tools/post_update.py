@@ -0,0 +1,102 @@
+"""
+Webhook modunda çalışan bota kayıtlı güncellemeleri POST eder (yerel test için).
+
+Telegram'ın webhook'a gönderdiği gibi her güncelleme ayrı bir istekle, X-Telegram-Bot-Api-Secret-Token
+başlığıyla gönderilir. Dosya tek bir güncelleme (JSON nesnesi), güncelleme listesi (JSON dizisi) veya
+satır başına bir güncelleme (JSONL) içerebilir. Dosya yerine --text verilirse basit bir metin mesajı üretilir.
+Proje kök dizininden çalıştırın:
+
+    python tools/post_update.py kayitli_guncellemeler.jsonl
+    python tools/post_update.py --text "merhaba" --chat-id -1001234567890 --user-id 5104018162
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import WEBHOOK_PORT, WEBHOOK_URL_PATH, WEBHOOK_SECRET_TOKEN # noqa: E402
+
+
+def load_updates(path: str) -> list[dict]:
+    """Dosyadaki güncellemeleri okur (JSON nesnesi, JSON dizisi veya JSONL)."""
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+    if not content:
+        return []
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+def build_text_update(update_id: int, text: str, chat_id: int, user_id: int) -> dict:
+    """Komut veya metin mesajı içeren en küçük geçerli güncellemeyi oluşturur."""
+    is_group = chat_id < 0
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'supergroup', 'title': 'Test Grubu'} if is_group else {'id': chat_id, 'type': 'private', 'first_name': 'Test'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test', 'username': f'test_{user_id}'},
+        'text': text,
+    }
+    if text.startswith('/'):
+        command = text.split()[0]
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+    return {'update_id': update_id, 'message': message}
+
+
+def post_update(url: str, secret_token: str, update: dict) -> int:
+    """Güncellemeyi POST eder ve HTTP durum kodunu döndürür."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(update).encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': secret_token},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook moduna kayıtlı Telegram güncellemelerini gönderir.")
+    parser.add_argument('file', nargs='?', help="Güncellemeleri içeren JSON/JSONL dosyası")
+    parser.add_argument('--url', default=f"http://127.0.0.1:{WEBHOOK_PORT}/{WEBHOOK_URL_PATH}", help="Webhook adresi")
+    parser.add_argument('--secret', default=WEBHOOK_SECRET_TOKEN, help="Gizli anahtar (varsayılan: WEBHOOK_SECRET_TOKEN)")
+    parser.add_argument('--text', help="Dosya yerine gönderilecek mesaj metni")
+    parser.add_argument('--chat-id', type=int, default=-1000000000001, help="--text için sohbet ID'si")
+    parser.add_argument('--user-id', type=int, default=1000001, help="--text için kullanıcı ID'si")
+    parser.add_argument('--delay', type=float, default=0.0, help="Güncellemeler arasındaki bekleme (sn)")
+    args = parser.parse_args()
+
+    if args.text is not None:
+        updates = [build_text_update(int(time.time() * 1000) % 2_000_000_000, args.text, args.chat_id, args.user_id)]
+    elif args.file:
+        updates = load_updates(args.file)
+    else:
+        parser.error("Bir güncelleme dosyası veya --text belirtilmelidir.")
+    if not args.secret:
+        print("Uyarı: gizli anahtar boş; bot WEBHOOK_SECRET_TOKEN ile çalışıyorsa istekler 403 ile reddedilir.")
+
+    failed = 0
+    for update in updates:
+        status = post_update(args.url, args.secret, update)
+        if status != 200:
+            failed += 1
+        print(f"update_id={update.get('update_id')}: HTTP {status}")
+        if args.delay:
+            time.sleep(args.delay)
+    print(f"{len(updates)} güncelleme gönderildi, {failed} başarısız.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,440 @@
+"""
+Güncelleme işleme yolunun çevrimdışı ölçümü (replay benchmark).
+
+Sentetik Telegram güncellemeleri (temiz mesajlar, yasaklı kelimeli mesajlar, susturulmuş kullanıcılar, komutlar,
+istatistik butonları) main.py'deki işleyicilerin kayıtlı olduğu uygulamaya sırayla verilir. Bot API istekleri
+ağa çıkmaz; süreç içindeki sahte bir istemci (FakeRequest) yanıtlar ve çağrılan metotları sayar. Veritabanı
+geçici bir dizinde oluşturulur, bot_data.db'ye dokunulmaz. Telegram hız sınırları ölçüm sırasında kaldırılır;
+yalnızca botun kendi işlem maliyeti ölçülür.
+
+Her senaryo için güncelleme/sn, p50/p95/p99 gecikme, güncelleme başına SQL ifadesi ve commit sayısı ile güncelleme
+başına Bot API çağrısı raporlanır. Sonuçlar JSON olarak kaydedilip sonraki ölçümlerle karşılaştırılabilir.
+Proje kök dizininden çalıştırın:
+
+    python tools/replay_bench.py --save tools/replay_baseline.json
+    python tools/replay_bench.py --compare tools/replay_baseline.json
+
+Kayıtlı JSON, ölçülen commit'i ve yükü belirleyen ayarları (senaryo başına güncelleme sayısı, ısınma, tohum, sohbet
+ve kullanıcı sayıları) içerir; karşılaştırmada ayarlar farklıysa uyarı verilir.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import telegram # noqa: E402
+from telegram import Update # noqa: E402
+from telegram.request import BaseRequest, RequestData # noqa: E402
+
+import config # noqa: E402
+
+# Veritabanı modülü içe aktarılmadan önce geçici veritabanına yönlendirilir
+config.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='replay_bench_'), 'bot_data.db')
+
+from commands import database # noqa: E402
+database.DB_PATH = config.DB_PATH
+
+import main # noqa: E402
+from commands import deletions, flood, ingest, log_pipeline, outbound, punishments, swear_filter # noqa: E402
+
+CHAT_COUNT = 20
+USERS_PER_CHAT = 200
+MUTED_USERS_PER_CHAT = 10
+SEED_MESSAGES_PER_USER = 5
+BOT_USER = {'id': 8154263807, 'is_bot': True, 'first_name': 'ZeaLouS', 'username': 'zealous_bench_bot'}
+
+CLEAN_WORDS = [
+    "merhaba", "bugün", "akşam", "oyun", "sunucu", "saat", "kaçta", "geliyor", "musun", "tamam",
+    "çok", "güzel", "arkadaşlar", "hücum", "saldırı", "savunma", "lonca", "sefer", "kale", "yarın",
+]
+COMMANDS = ["/start", "/help", "/rules", "/oyunsaati", "/istatistik", "/not yarın sefer var", "/hello"]
+STATS_CALLBACKS = ["stats_general", "stats_top_senders", "stats_leaderboard", "stats_refresh"]
+
+# Senaryo adı -> güncelleme türlerinin ağırlıkları
+SCENARIOS = {
+    'clean': {'clean': 1.0},
+    'swear': {'swear': 1.0},
+    'muted': {'muted': 1.0},
+    'commands': {'command': 1.0},
+    'stats_callbacks': {'callback': 1.0},
+    'mixed': {'clean': 0.80, 'swear': 0.08, 'muted': 0.04, 'command': 0.05, 'callback': 0.03},
+}
+
+
+class FakeRequest(BaseRequest):
+    """
+    Bot API isteklerini ağa göndermeden yanıtlayan istemci. Gönderme ve düzenleme metotları geçerli bir Message,
+    diğerleri True döndürür. Çağrılan metotlar `calls` sayacında tutulur.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self._message_ids = iter(range(10_000_000, 2**31))
+        self._file_ids = iter(range(1, 2**31))
+
+    @property
+    def read_timeout(self) -> float | None:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _message(self, parameters: dict, **content) -> dict:
+        chat_id = int(parameters.get('chat_id', 0))
+        chat = {'id': chat_id, 'type': 'supergroup', 'title': 'Bench'} if chat_id < 0 else {'id': chat_id, 'type': 'private', 'first_name': 'Bench'}
+        message = {'message_id': int(parameters.get('message_id') or next(self._message_ids)), 'date': int(time.time()), 'chat': chat, 'from': BOT_USER}
+        message.update(content)
+        return message
+
+    def _result(self, method: str, parameters: dict):
+        if method == 'getMe':
+            return dict(BOT_USER, can_join_groups=True, can_read_all_group_messages=False, supports_inline_queries=False)
+        if method in ('sendMessage', 'editMessageText'):
+            return self._message(parameters, text=parameters.get('text', ''))
+        if method in ('sendPhoto', 'sendAudio'):
+            file_id = f"bench_{method}_{next(self._file_ids)}"
+            media = {'file_id': file_id, 'file_unique_id': file_id}
+            if method == 'sendPhoto':
+                return self._message(parameters, photo=[dict(media, width=512, height=512)])
+            return self._message(parameters, audio=dict(media, duration=1))
+        return True
+
+    async def do_request(self, url: str, method: str, request_data: RequestData | None = None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None) -> tuple[int, bytes]:
+        api_method = url.rsplit('/', 1)[-1]
+        self.calls[api_method] += 1
+        parameters = request_data.parameters if request_data else {}
+        return 200, json.dumps({'ok': True, 'result': self._result(api_method, parameters)}).encode('utf-8')
+
+
+class StatementCounter:
+    """Açılan her SQLite bağlantısına trace callback ekleyerek çalıştırılan ifadeleri ve commit'leri sayar."""
+
+    def __init__(self):
+        self._lock = threading.Lock() # Veritabanı işleri executor thread'lerinde çalışır
+        self.statements = 0
+        self.commits = 0
+
+    def install(self):
+        original = database.get_db_connection
+
+        def get_db_connection():
+            conn = original()
+            conn.set_trace_callback(self._trace)
+            return conn
+
+        database.get_db_connection = get_db_connection
+
+    def _trace(self, statement: str):
+        keyword = statement.lstrip()[:8].upper()
+        with self._lock:
+            if keyword.startswith('COMMIT'):
+                self.commits += 1
+            elif not keyword.startswith(('BEGIN', 'ROLLBACK')):
+                self.statements += 1
+
+    def reset(self):
+        with self._lock:
+            self.statements = 0
+            self.commits = 0
+
+
+class UpdateFactory:
+    """Senaryolar için sentetik güncelleme sözlükleri üretir."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.update_ids = iter(range(1, 2**31))
+        self.forbidden = sorted(swear_filter._forbidden_words_set) or ["yasakli"]
+        self.chat_ids = [-1001000000000 - i for i in range(CHAT_COUNT)]
+
+    def _user(self, user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'Oyuncu{user_id % 1000}', 'username': f'oyuncu_{user_id}'}
+
+    def _message(self, chat_id: int, user_id: int, text: str) -> dict:
+        message = {
+            'message_id': next(self.update_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'supergroup', 'title': 'Bench'},
+            'from': self._user(user_id),
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'update_id': message['message_id'], 'message': message}
+
+    def _text(self) -> str:
+        return " ".join(self.rng.choice(CLEAN_WORDS) for _ in range(self.rng.randint(3, 20)))
+
+    def build(self, kind: str) -> dict:
+        chat_index = self.rng.randrange(CHAT_COUNT)
+        chat_id = self.chat_ids[chat_index]
+        user_id = active_user_id(chat_index, self.rng.randrange(USERS_PER_CHAT))
+        if kind == 'clean':
+            return self._message(chat_id, user_id, self._text())
+        if kind == 'swear':
+            words = self._text().split()
+            words.insert(self.rng.randrange(len(words) + 1), self.rng.choice(self.forbidden))
+            return self._message(chat_id, user_id, " ".join(words))
+        if kind == 'muted':
+            return self._message(chat_id, muted_user_id(chat_index, self.rng.randrange(MUTED_USERS_PER_CHAT)), self._text())
+        if kind == 'command':
+            return self._message(chat_id, user_id, self.rng.choice(COMMANDS))
+        update_id = next(self.update_ids)
+        return {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id),
+                'from': self._user(user_id),
+                'chat_instance': str(chat_id),
+                'data': self.rng.choice(STATS_CALLBACKS),
+                'message': {
+                    'message_id': 1000 + chat_index,
+                    'date': int(time.time()),
+                    'chat': {'id': chat_id, 'type': 'supergroup', 'title': 'Bench'},
+                    'from': BOT_USER,
+                    'text': "📚 Genel Durum:",
+                },
+            },
+        }
+
+    def scenario(self, weights: dict[str, float], count: int) -> list[dict]:
+        kinds = self.rng.choices(list(weights), weights=list(weights.values()), k=count)
+        return [self.build(kind) for kind in kinds]
+
+
+def active_user_id(chat_index: int, index: int) -> int:
+    return 2_000_000 + chat_index * 10_000 + index
+
+
+def muted_user_id(chat_index: int, index: int) -> int:
+    return 3_000_000 + chat_index * 10_000 + index
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def disable_rate_limits():
+    """Telegram hız sınırlarını kaldırır; sahte istemcide beklemek yalnızca ölçümü bozar."""
+    outbound.OUTBOUND_GLOBAL_RATE_PER_S = outbound.OUTBOUND_GLOBAL_BURST = 1e9
+    outbound.OUTBOUND_GROUP_RATE_PER_MIN = outbound.OUTBOUND_GROUP_BURST = 1e9
+    outbound.OUTBOUND_PRIVATE_RATE_PER_S = outbound.OUTBOUND_PRIVATE_BURST = 1e9
+    # Senaryolar sohbet başına gerçek zamandan çok daha hızlı mesaj gönderir; taşkın kontrolü yine çalışır ama tetiklenmez
+    flood.FLOOD_USER_RATE_PER_S = flood.FLOOD_USER_BURST = 1e9
+    flood.FLOOD_CHAT_RATE_PER_S = flood.FLOOD_CHAT_BURST = 1e9
+
+
+def seed_database(factory: UpdateFactory):
+    """İstatistik sorgularının gerçekçi olması için geçmiş mesajlar ve susturulmuş kullanıcılar ekler."""
+    now = datetime.datetime.now()
+    user_rows, message_rows = [], []
+    for chat_index, chat_id in enumerate(factory.chat_ids):
+        for index in range(USERS_PER_CHAT):
+            user_id = str(active_user_id(chat_index, index))
+            user_rows.append((user_id, f'oyuncu_{user_id}', f'Oyuncu{index}', f'Oyuncu{index}', None, 0, now))
+            for _ in range(SEED_MESSAGES_PER_USER):
+                message_rows.append((chat_id, user_id, now - datetime.timedelta(minutes=factory.rng.randrange(2 * 24 * 60))))
+    database.write_ingest_batch(message_rows, user_rows)
+
+
+async def mute_users(factory: UpdateFactory):
+    mute_until = datetime.datetime.now() + datetime.timedelta(days=1)
+    for chat_index, chat_id in enumerate(factory.chat_ids):
+        for index in range(MUTED_USERS_PER_CHAT):
+            state = punishments.get_state(chat_id, str(muted_user_id(chat_index, index)))
+            state.is_muted = True
+            state.mute_until = mute_until
+            state.next_mute_type = '1_hr'
+            await punishments.save_state(state)
+
+
+async def drain():
+    """Giden istek kuyruğunu ve yazma tamponlarını boşaltır; bunların maliyeti de ölçüme dahildir."""
+    # Önce istekler: gönderilen uyarıların silinmesi gönderim tamamlandığında zamanlanır
+    while not outbound.is_idle():
+        await asyncio.sleep(0)
+    await ingest.flush()
+    await ingest.flush_activity()
+    await deletions.flush()
+
+
+async def run_scenario(application, request: FakeRequest, counter: StatementCounter, updates: list[dict]) -> dict:
+    await drain()
+    request.calls.clear()
+    counter.reset()
+    latencies = []
+    started = time.perf_counter()
+    for data in updates:
+        update = Update.de_json(data, application.bot)
+        update_started = time.perf_counter()
+        await application.process_update(update)
+        latencies.append(time.perf_counter() - update_started)
+    await drain()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    count = len(updates)
+    return {
+        'updates': count,
+        'updates_per_s': round(count / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+        },
+        'db_statements_per_update': round(counter.statements / count, 3),
+        'db_commits_per_update': round(counter.commits / count, 3),
+        'api_calls_per_update': round(sum(request.calls.values()) / count, 3),
+        'api_calls': dict(sorted(request.calls.items())),
+    }
+
+
+async def run(args) -> dict:
+    request = FakeRequest()
+    counter = StatementCounter()
+    counter.install()
+    disable_rate_limits()
+
+    application = main.build_application(request=request)
+    factory = UpdateFactory(args.seed)
+    seed_database(factory)
+    await application.initialize()
+    try:
+        await mute_users(factory)
+        await run_scenario(application, request, counter, factory.scenario(SCENARIOS['mixed'], args.warmup))
+        results = {}
+        for name in args.scenarios:
+            results[name] = await run_scenario(application, request, counter, factory.scenario(SCENARIOS[name], args.updates))
+            print_result(name, results[name])
+    finally:
+        await outbound.shutdown()
+        await application.shutdown()
+    return results
+
+
+def print_result(name: str, result: dict):
+    latency = result['latency_ms']
+    print(
+        f"{name:<16} {result['updates_per_s']:>9,.0f} güncelleme/sn  "
+        f"p50 {latency['p50']:>7.3f} ms  p95 {latency['p95']:>7.3f} ms  p99 {latency['p99']:>7.3f} ms  "
+        f"SQL {result['db_statements_per_update']:>6.2f}  commit {result['db_commits_per_update']:>5.2f}  "
+        f"API {result['api_calls_per_update']:>5.2f}"
+    )
+
+
+def bench_settings(args) -> dict:
+    """Ölçümün yükünü belirleyen ayarlar; yalnızca aynı ayarlarla alınmış ölçümler karşılaştırılabilir."""
+    return {
+        'updates_per_scenario': args.updates,
+        'warmup_updates': args.warmup,
+        'seed': args.seed,
+        'scenarios': args.scenarios,
+        'chat_count': CHAT_COUNT,
+        'users_per_chat': USERS_PER_CHAT,
+        'muted_users_per_chat': MUTED_USERS_PER_CHAT,
+        'seed_messages_per_user': SEED_MESSAGES_PER_USER,
+        'rate_limits_disabled': True,
+    }
+
+
+def source_revision() -> str | None:
+    """Ölçülen ağacın git commit'i; yerel değişiklik varsa sonuna '-dirty' eklenir."""
+    root = os.path.join(os.path.dirname(__file__), '..')
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if dirty else revision
+
+
+def compare(baseline: dict, results: dict, threshold: float, settings: dict) -> int:
+    """Sonuçları kayıtlı ölçümle karşılaştırır ve eşiği aşan gerilemelerin sayısını döndürür."""
+    baseline_settings = baseline.get('settings', {})
+    for key, value in settings.items():
+        if key in baseline_settings and baseline_settings[key] != value:
+            print(f"UYARI: kayıtlı ölçüm farklı ayarla alınmış: {key} = {baseline_settings[key]} (şimdi {value})")
+    # Metrik -> (değer fonksiyonu, büyük değer daha mı iyi)
+    metrics = {
+        'updates_per_s': (lambda r: r['updates_per_s'], True),
+        'p95_ms': (lambda r: r['latency_ms']['p95'], False),
+        'p99_ms': (lambda r: r['latency_ms']['p99'], False),
+        'db_statements_per_update': (lambda r: r['db_statements_per_update'], False),
+        'db_commits_per_update': (lambda r: r['db_commits_per_update'], False),
+        'api_calls_per_update': (lambda r: r['api_calls_per_update'], False),
+    }
+    regressions = 0
+    print(f"\nKarşılaştırma ({baseline.get('created_at', '?')}, {baseline.get('revision') or '?'} ölçümüne göre, eşik %{threshold * 100:.0f}):")
+    for name, result in results.items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        for metric, (value, higher_is_better) in metrics.items():
+            before, after = value(old), value(result)
+            if before == 0:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = "GERİLEME" if worse > threshold else ""
+            regressions += bool(flag)
+            print(f"  {name:<16} {metric:<26} {before:>10.3f} -> {after:>10.3f}  {change * 100:+7.1f}%  {flag}")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Güncelleme işleme yolunu sahte Bot API ile ölçer.")
+    parser.add_argument('--updates', type=int, default=2000, help="Senaryo başına güncelleme sayısı")
+    parser.add_argument('--warmup', type=int, default=300, help="Ölçüm öncesi ısınma güncellemesi sayısı")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS), help="Çalıştırılacak senaryolar")
+    parser.add_argument('--seed', type=int, default=42, help="Rastgele üretim tohumu")
+    parser.add_argument('--save', metavar='JSON', help="Sonuçları bu dosyaya kaydet")
+    parser.add_argument('--compare', metavar='JSON', help="Sonuçları kayıtlı ölçümle karşılaştır")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Gerileme sayılacak değişim oranı (varsayılan 0.2)")
+    args = parser.parse_args()
+
+    # Loglar yazıcı thread'inde biçimlendirilir (maliyeti ölçüme dahil) ama ekrana yazılmaz
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    log_pipeline.redirect_output(devnull)
+
+    print(f"{CHAT_COUNT} sohbet, sohbet başına {USERS_PER_CHAT} kullanıcı, senaryo başına {args.updates} güncelleme")
+    settings = bench_settings(args)
+    results = asyncio.run(run(args))
+
+    report = {
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': source_revision(),
+        'python': platform.python_version(),
+        'python_telegram_bot': telegram.__version__,
+        'settings': settings,
+        'scenarios': results,
+    }
+    regressions = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, args.threshold, settings)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Sonuçlar {args.save} dosyasına kaydedildi.")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main_cli()